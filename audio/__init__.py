@@ -2,12 +2,31 @@
 Пакет обработки аудио
 """
 
-from .audio_capture import AudioCapture
 from .noise_reduction import NoiseReduction
 from .vad import VoiceActivityDetector
+from .ring_buffer import AudioRingBuffer
+from .audio_format import to_float32, to_int16
+from .noise_tracker import NoiseFloorTracker
+from .resampler import StreamingResampler, resample_audio
+from .beamformer import DelayAndSumBeamformer
 
 __all__ = [
     'AudioCapture',
     'NoiseReduction', 
-    'VoiceActivityDetector'
-]
\ No newline at end of file
+    'VoiceActivityDetector',
+    'AudioRingBuffer',
+    'NoiseFloorTracker',
+    'StreamingResampler',
+    'resample_audio',
+    'DelayAndSumBeamformer',
+    'to_float32',
+    'to_int16'
+]
+
+def __getattr__(name):
+    """AudioCapture импортируется по требованию: PyAudio нужен только для
+    захвата с микрофона, а не рабочим процессам ASR, пакетному режиму и бенчмаркам"""
+    if name == 'AudioCapture':
+        from .audio_capture import AudioCapture
+        return AudioCapture
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
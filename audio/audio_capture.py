@@ -5,18 +5,61 @@
 import pyaudio
 import numpy as np
 from config.audio_config import AUDIO_CONFIG
+from utils.helpers import load_config, save_config
+from utils.cpu_budget import get_cpu_budget
+from .ring_buffer import AudioRingBuffer
 
 class AudioCapture:
     def __init__(self):
         self.config = AUDIO_CONFIG
         self.audio = pyaudio.PyAudio()
         self.stream = None
+        self.ring_buffer = None
+        self.capture_mode = self.config.get('capture_mode', 'blocking')
+        self._callback_pinned = False
         
         # Автоматически определяем параметры подключенного микрофона
         self.device_info = self.detect_microphone()
         self.setup_stream()
+        
+        # Сохраненный режим не открылся (другое устройство, смена драйвера) - полный перебор
+        if self.stream is None and self.device_info and self.device_info.get('from_cache'):
+            print("Сохраненный режим микрофона не работает, повторный поиск...")
+            self._forget_probe_result(self.device_info)
+            self.device_info = self.detect_microphone(use_cache=False)
+            self.setup_stream()
+    
+    def _probe_cache_key(self, device):
+        """Ключ кэша: индекс и имя устройства"""
+        return f"{device['index']}:{device['name']}"
+    
+    def _load_probe_result(self, device):
+        """Сохраненный рабочий режим устройства из data/config.json"""
+        cache = load_config(self.config['probe_cache_path']).get('microphone_probe', {})
+        return cache.get(self._probe_cache_key(device))
+    
+    def _save_probe_result(self, device_info):
+        """Запись рабочего режима устройства в data/config.json"""
+        try:
+            config = load_config(self.config['probe_cache_path'])
+            config.setdefault('microphone_probe', {})[self._probe_cache_key(device_info)] = {
+                'rate': device_info['rate'],
+                'channels': device_info['channels']
+            }
+            save_config(config, self.config['probe_cache_path'])
+        except Exception as e:
+            print(f"Ошибка сохранения параметров микрофона: {e}")
+    
+    def _forget_probe_result(self, device_info):
+        """Удаление неработающего режима из кэша"""
+        try:
+            config = load_config(self.config['probe_cache_path'])
+            if config.get('microphone_probe', {}).pop(self._probe_cache_key(device_info), None) is not None:
+                save_config(config, self.config['probe_cache_path'])
+        except Exception as e:
+            print(f"Ошибка обновления кэша микрофона: {e}")
     
-    def detect_microphone(self):
+    def detect_microphone(self, use_cache=True):
         """Найти подключенный микрофон и его рабочие параметры"""
         print("\nПоиск доступных микрофонов...")
         
@@ -40,6 +83,18 @@ class AudioCapture:
         # Выбираем первое рабочее устройство
         selected_device = available_devices[0]
         
+        # Устройство уже проверялось: режим проверит само открытие потока в setup_stream
+        cached = self._load_probe_result(selected_device) if use_cache else None
+        if cached:
+            print(f"Сохраненный режим: {cached['rate']} Hz, {cached['channels']} канал(ов)")
+            return {
+                'index': selected_device['index'],
+                'rate': cached['rate'],
+                'channels': cached['channels'],
+                'name': selected_device['name'],
+                'from_cache': True
+            }
+        
         # Определяем оптимальные параметры
         # Для USB микрофонов обычно 44100/48000 Hz, 1-2 канала
         # Для встроенных обычно 16000/44100 Hz, 1 канал
@@ -83,18 +138,24 @@ class AudioCapture:
             if working_rate:
                 break
         
+        probe_succeeded = working_rate is not None
         if not working_rate:
             # Если не нашли рабочий режим, используем параметры по умолчанию
             working_rate = int(selected_device['default_rate'])
             working_channels = min(selected_device['max_channels'], 1)
             print(f"Используем параметры по умолчанию: {working_rate} Hz, {working_channels} канал(ов)")
         
-        return {
+        device_info = {
             'index': selected_device['index'],
             'rate': working_rate,
             'channels': working_channels,
             'name': selected_device['name']
         }
+        
+        if probe_succeeded:
+            self._save_probe_result(device_info)
+        
+        return device_info
     
     def setup_stream(self):
         """Настройка аудиопотока с определенными параметрами"""
@@ -106,21 +167,46 @@ class AudioCapture:
         try:
             print(f"Запуск микрофона: {self.device_info['rate']} Hz, {self.device_info['channels']} канал(ов)")
             
+            stream_callback = None
+            if self.capture_mode == 'callback':
+                # Буфер выделяется один раз на все время работы
+                capacity = int(self.device_info['rate'] * self.device_info['channels']
+                               * self.config.get('ring_buffer_seconds', 30))
+                self.ring_buffer = AudioRingBuffer(capacity)
+                stream_callback = self._stream_callback
+            
             self.stream = self.audio.open(
                 format=self.audio.get_format_from_width(self.config['sample_width']),
                 channels=self.device_info['channels'],
                 rate=self.device_info['rate'],
                 input=True,
                 frames_per_buffer=self.config['chunk'],
-                input_device_index=self.device_info['index']
+                input_device_index=self.device_info['index'],
+                stream_callback=stream_callback
             )
             
-            print("Микрофон готов")
+            if stream_callback is not None:
+                self.stream.start_stream()
+                print(f"Микрофон готов (режим callback, буфер {self.config.get('ring_buffer_seconds', 30)} сек)")
+            else:
+                print("Микрофон готов")
             
         except Exception as e:
             print(f"Ошибка запуска микрофона: {e}")
             print("Работа без микрофона")
             self.stream = None
+            self.ring_buffer = None
+    
+    def _stream_callback(self, in_data, frame_count, time_info, status):
+        """Callback PyAudio: запись входных данных в кольцевой буфер"""
+        if not self._callback_pinned:
+            # Поток PortAudio создается драйвером, закрепляется при первом вызове
+            get_cpu_budget().pin_thread('capture')
+            self._callback_pinned = True
+        self.ring_buffer.write(np.frombuffer(in_data, dtype=np.int16))
+        if status & pyaudio.paInputOverflow:
+            self.ring_buffer.count_input_overflow()
+        return (None, pyaudio.paContinue)
     
     def record_chunk(self):
         """Запись одного чанка аудио"""
@@ -129,6 +215,12 @@ class AudioCapture:
                 channels = self.device_info['channels'] if self.device_info else 1
                 return np.zeros(self.config['chunk'] * channels, dtype=np.int16)
             
+            if self.ring_buffer is not None:
+                # Следующий непрочитанный чанк; копия, т.к. чанки хранятся дальше по конвейеру
+                chunk_samples = self.config['chunk'] * self.device_info['channels']
+                data = self.ring_buffer.read_new(chunk_samples, timeout=self.config.get('read_timeout', 0.5))
+                return data.copy() if len(data) > 0 else None
+            
             data = self.stream.read(self.config['chunk'], exception_on_overflow=False)
             return np.frombuffer(data, dtype=np.int16)
             
@@ -148,7 +240,12 @@ class AudioCapture:
         chunks_needed = int(self.device_info['rate'] / self.config['chunk'] * duration)
         
         for _ in range(chunks_needed):
-            frames.append(self.record_chunk())
+            chunk = self.record_chunk()
+            if chunk is not None:
+                frames.append(chunk)
+        
+        if not frames:
+            return np.zeros(0, dtype=np.int16)
         
         audio = np.concatenate(frames)
         
@@ -158,6 +255,23 @@ class AudioCapture:
         else:
             return audio
     
+    def get_latest_audio(self, duration):
+        """Последние duration секунд аудио как view без копирования (режим callback)"""
+        if self.ring_buffer is None or self.device_info is None:
+            return None
+        
+        num_samples = int(self.device_info['rate'] * duration) * self.device_info['channels']
+        return self.ring_buffer.get_latest(num_samples)
+    
+    def get_capture_stats(self):
+        """Статистика захвата: переполнения и потери кольцевого буфера"""
+        if self.ring_buffer is None:
+            return {'mode': 'blocking'}
+        
+        stats = self.ring_buffer.get_stats()
+        stats['mode'] = 'callback'
+        return stats
+    
     def get_audio_params(self):
         """Получить параметры аудио"""
         if self.device_info:
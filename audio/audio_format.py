@@ -0,0 +1,21 @@
+"""
+Преобразования формата аудио
+"""
+
+import numpy as np
+
+INT16_SCALE = 32768.0
+
+def to_float32(audio_data):
+    """Приведение аудио к float32 в диапазоне [-1, 1]"""
+    audio_data = np.asarray(audio_data)
+    if audio_data.dtype == np.int16:
+        return audio_data.astype(np.float32) / INT16_SCALE
+    return audio_data.astype(np.float32, copy=False)
+
+def to_int16(audio_data):
+    """Приведение float-аудио [-1, 1] к int16 с ограничением диапазона"""
+    audio_data = np.asarray(audio_data)
+    if audio_data.dtype == np.int16:
+        return audio_data
+    return np.clip(np.round(audio_data * INT16_SCALE), -32768, 32767).astype(np.int16)
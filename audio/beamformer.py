@@ -0,0 +1,92 @@
+"""
+Потоковое формирование луча (delay-and-sum) для двухканального микрофона
+"""
+
+import numpy as np
+from config.audio_config import AUDIO_CONFIG
+from .audio_format import to_float32
+
+class DelayAndSumBeamformer:
+    """Сложение каналов с выравниванием по задержке на говорящего
+
+    Межканальная задержка оценивается по GCC-PHAT на блоках FFT. Взаимный
+    спектр сглаживается между блоками, поэтому оценка держится на доминирующем
+    источнике, а не на случайных пиках шума. Задержка применяется ко всем
+    входящим сэмплам сразу, без дополнительной задержки на накопление блока.
+    """
+
+    def __init__(self, sample_rate=16000, max_delay_ms=None, block_size=None, smoothing=None):
+        self.sample_rate = sample_rate
+        max_delay_ms = max_delay_ms if max_delay_ms is not None else AUDIO_CONFIG['beam_max_delay_ms']
+        self.max_lag = max(1, int(round(sample_rate * max_delay_ms / 1000.0)))
+        self.block_size = block_size or AUDIO_CONFIG['beam_block']
+        self.smoothing = smoothing if smoothing is not None else AUDIO_CONFIG['beam_smoothing']
+        self.min_block_rms = AUDIO_CONFIG['beam_min_rms']
+        self.switch_margin = AUDIO_CONFIG['beam_switch_margin']
+
+        self.fft_size = 2 * self.block_size  # без кругового наложения корреляции
+        self.window = np.hanning(self.block_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.fft_size, 1.0 / sample_rate)
+        band = AUDIO_CONFIG['vad_speech_band']
+        self.band_mask = (freqs >= band[0]) & (freqs <= band[1])
+        self.reset()
+
+    def reset(self):
+        """Сброс оценки задержки и истории каналов"""
+        self.cross_spectrum = None
+        self.delay = 0              # Задержка второго канала относительно первого (сэмплов)
+        self.blocks_analyzed = 0
+        self._history = np.zeros((self.max_lag, 2), dtype=np.float32)
+        self._pending = np.zeros((0, 2), dtype=np.float32)
+
+    def estimate_delay(self, block):
+        """GCC-PHAT по блоку (block_size, 2); обновляет self.delay"""
+        if np.sqrt(np.mean(block ** 2)) < self.min_block_rms:
+            return self.delay  # тишина не несет информации о направлении
+
+        spectra = np.fft.rfft(block * self.window[:, np.newaxis], n=self.fft_size, axis=0)
+        cross = spectra[:, 1] * np.conj(spectra[:, 0]) * self.band_mask
+
+        # Усредняется ненормированный взаимный спектр: когерентная речь
+        # накапливается, независимый шум каналов усредняется
+        if self.cross_spectrum is None:
+            self.cross_spectrum = cross
+        else:
+            self.cross_spectrum = self.smoothing * self.cross_spectrum + (1 - self.smoothing) * cross
+
+        # PHAT: остается только фаза
+        correlation = np.fft.irfft(self.cross_spectrum / (np.abs(self.cross_spectrum) + 1e-12), n=self.fft_size)
+
+        # Лаги от -max_lag до +max_lag
+        lags = np.concatenate((correlation[-self.max_lag:], correlation[:self.max_lag + 1]))
+        best = int(np.argmax(lags))
+
+        # Гистерезис: задержка меняется только при заметно лучшем пике
+        if lags[best] > self.switch_margin * lags[self.delay + self.max_lag]:
+            self.delay = best - self.max_lag
+        self.blocks_analyzed += 1
+        return self.delay
+
+    def process(self, audio_chunk):
+        """Двухканальный чанк (n, 2) или чередующийся 1-D -> моно float32"""
+        samples = to_float32(audio_chunk)
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 2)
+
+        # Оценка задержки по полным блокам
+        self._pending = np.concatenate((self._pending, samples))
+        n_blocks = len(self._pending) // self.block_size
+        for index in range(n_blocks):
+            self.estimate_delay(self._pending[index * self.block_size:(index + 1) * self.block_size])
+        self._pending = self._pending[n_blocks * self.block_size:]
+
+        # Опережающий канал задерживается на |delay| сэмплов
+        buffer = np.concatenate((self._history, samples))
+        n_samples = len(samples)
+        shift_first = max(self.delay, 0)
+        shift_second = max(-self.delay, 0)
+        first = buffer[self.max_lag - shift_first:self.max_lag - shift_first + n_samples, 0]
+        second = buffer[self.max_lag - shift_second:self.max_lag - shift_second + n_samples, 1]
+
+        self._history = buffer[len(buffer) - self.max_lag:]
+        return (0.5 * (first + second)).astype(np.float32)
@@ -4,12 +4,31 @@
 
 import numpy as np
 import librosa
+from config.audio_config import AUDIO_CONFIG
+from .audio_format import to_float32, to_int16
 
 class NoiseReduction:
-    def __init__(self):
+    def __init__(self, frame_size=None, noise_tracker=None):
         self.noise_profile = None
         self.is_calibrated = False
-    
+        self.noise_tracker = noise_tracker  # Общая с VAD оценка шума (NoiseFloorTracker)
+
+        # Потоковое подавление: окно sqrt-Hann, перекрытие 50%
+        self.frame_size = frame_size or AUDIO_CONFIG['denoise_frame']
+        self.hop = self.frame_size // 2
+        self.window = np.sqrt(np.hanning(self.frame_size + 1)[:-1]).astype(np.float32)
+        self._noise_psd = None          # Собственный спектр шума, если нет общего трекера
+        self.noise_smoothing = AUDIO_CONFIG['denoise_noise_smoothing']
+        self.over_subtraction = AUDIO_CONFIG['denoise_over_subtraction']
+        self.gain_floor = AUDIO_CONFIG['denoise_gain_floor']
+        self.reset_stream()
+
+    def reset_stream(self):
+        """Сброс состояния overlap-add"""
+        # Задержка на (frame_size - hop) сэмплов: каждый входной сэмпл дает выходной
+        self._stream_input = np.zeros(self.frame_size - self.hop, dtype=np.float32)
+        self._overlap_tail = np.zeros(self.hop, dtype=np.float32)
+
     def calibrate_noise(self, audio_data, duration=1):
         """Калибровка шумового профиля"""
         try:
@@ -20,12 +39,12 @@ class NoiseReduction:
             print("Шумовой профиль откалиброван")
         except Exception as e:
             print(f"Ошибка калибровки шума: {e}")
-    
+
     def reduce_noise_simple(self, audio_data):
         """Простое подавление шума"""
         if not self.is_calibrated:
             return audio_data
-        
+
         try:
             # Пороговая фильтрация
             threshold = self.noise_profile * 2
@@ -34,7 +53,74 @@ class NoiseReduction:
         except Exception as e:
             print(f"Ошибка подавления шума: {e}")
             return audio_data
+
+    @property
+    def noise_psd(self):
+        """Текущий спектр шума по частотным бинам"""
+        if self.noise_tracker is not None:
+            return self.noise_tracker.noise_psd
+        return self._noise_psd
     
+    def update_noise_spectrum(self, power):
+        """Обновление спектра шума по кадрам без речи"""
+        if self.noise_tracker is not None:
+            self.noise_tracker.update(power)
+            return
+        
+        frame_mean = np.mean(power, axis=0)
+        if self._noise_psd is None:
+            self._noise_psd = frame_mean
+        else:
+            alpha = self.noise_smoothing ** len(power)
+            self._noise_psd = alpha * self._noise_psd + (1 - alpha) * frame_mean
+
+    def process_chunk(self, audio_chunk, update_noise=False):
+        """Потоковое спектральное подавление шума для одного чанка
+
+        Кадры, накопленные с прошлого вызова, обрабатываются одной матрицей FFT;
+        хвост последнего кадра хранится для overlap-add со следующим чанком.
+        Выход задержан на frame_size/2 сэмплов и имеет тот же тип, что вход.
+        """
+        try:
+            samples = to_float32(audio_chunk).ravel()
+            buffer = np.concatenate((self._stream_input, samples))
+
+            n_frames = (len(buffer) - self.frame_size) // self.hop + 1
+            if n_frames <= 0:
+                self._stream_input = buffer
+                return np.zeros(0, dtype=np.asarray(audio_chunk).dtype)
+
+            frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_size)[::self.hop][:n_frames]
+            spectrum = np.fft.rfft(frames * self.window, axis=1)
+            power = spectrum.real ** 2 + spectrum.imag ** 2
+
+            if update_noise:
+                self.update_noise_spectrum(power)
+
+            noise_psd = self.noise_psd
+            if noise_psd is not None:
+                # Вычитание спектра мощности с нижней границей усиления
+                gain = 1.0 - self.over_subtraction * noise_psd / (power + 1e-12)
+                gain = np.sqrt(np.maximum(gain, self.gain_floor ** 2))
+                spectrum = spectrum * gain
+
+            synthesis = np.fft.irfft(spectrum, n=self.frame_size, axis=1) * self.window
+
+            # Overlap-add соседних кадров
+            previous_tails = np.vstack((self._overlap_tail[np.newaxis, :], synthesis[:-1, self.hop:]))
+            output = (synthesis[:, :self.hop] + previous_tails).ravel()
+
+            self._overlap_tail = synthesis[-1, self.hop:].copy()
+            self._stream_input = buffer[n_frames * self.hop:]
+
+            if np.asarray(audio_chunk).dtype == np.int16:
+                return to_int16(output)
+            return output.astype(np.float32)
+
+        except Exception as e:
+            print(f"Ошибка потокового подавления шума: {e}")
+            return audio_chunk
+
     def spectral_gating(self, audio_data, rate=16000):
         """Спектральное подавление шума"""
         try:
@@ -42,7 +128,7 @@ class NoiseReduction:
             stft = librosa.stft(audio_data.astype(float))
             magnitude = np.abs(stft)
             phase = np.angle(stft)
-            
+
             if self.noise_profile:
                 # Маска на основе шумового профиля
                 noise_mag = self.noise_profile
@@ -50,12 +136,15 @@ class NoiseReduction:
                 clean_magnitude = magnitude * mask
             else:
                 clean_magnitude = magnitude
-            
+
             # Обратное STFT
             clean_stft = clean_magnitude * np.exp(1j * phase)
-            clean_audio = librosa.istft(clean_stft)
-            
-            return (clean_audio * 32767).astype(np.int16)
+            clean_audio = librosa.istft(clean_stft, length=len(audio_data))
+
+            # Масштаб входа сохраняется, без умножения на 32767
+            if audio_data.dtype == np.int16:
+                return np.clip(np.round(clean_audio), -32768, 32767).astype(np.int16)
+            return clean_audio.astype(np.float32)
         except Exception as e:
             print(f"Ошибка спектрального подавления: {e}")
-            return audio_data
\ No newline at end of file
+            return audio_data
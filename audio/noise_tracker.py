@@ -0,0 +1,94 @@
+"""
+Непрерывная оценка фонового шума методом минимальной статистики
+"""
+
+import numpy as np
+from config.audio_config import AUDIO_CONFIG
+from .audio_format import to_float32
+
+class NoiseFloorTracker:
+    """Оценка спектра шума по минимумам сглаженного спектра мощности
+
+    Сглаженный спектр мощности отслеживается по кадрам без речи. Минимум
+    за последние n_subwindows * subwindow_frames кадров хранится как кольцо
+    минимумов подокон, поэтому каждый кадр стоит O(число бинов) и история
+    никогда не пересчитывается.
+
+    Публикуются спектр шума по бинам (noise_psd) для шумоподавителя и
+    широкополосный уровень шума (floor_rms) для порога VAD.
+    """
+
+    def __init__(self, frame_size=None, smoothing=None, subwindow_frames=None, n_subwindows=None, bias=None):
+        self.frame_size = frame_size or AUDIO_CONFIG['denoise_frame']
+        self.n_bins = self.frame_size // 2 + 1
+        self.smoothing = smoothing if smoothing is not None else AUDIO_CONFIG['noise_tracker_smoothing']
+        self.subwindow_frames = subwindow_frames or AUDIO_CONFIG['noise_tracker_subwindow_frames']
+        self.n_subwindows = n_subwindows or AUDIO_CONFIG['noise_tracker_subwindows']
+        self.bias = bias if bias is not None else AUDIO_CONFIG['noise_tracker_bias']
+
+        # Окно анализа совпадает с окном потокового шумоподавителя
+        self.window = np.sqrt(np.hanning(self.frame_size + 1)[:-1]).astype(np.float32)
+        self.window_power = float(np.sum(self.window ** 2))
+
+        self.reset()
+
+    def reset(self):
+        """Сброс оценки"""
+        self.smoothed_power = None
+        self.current_min = None
+        self.subwindow_mins = np.full((self.n_subwindows, self.n_bins), np.inf)
+        self.history_min = np.full(self.n_bins, np.inf)
+        self.subwindow_index = 0
+        self.frames_in_subwindow = 0
+        self.frames_seen = 0
+
+        self.noise_psd = None       # Спектр мощности шума по бинам (float-шкала [-1, 1])
+        self.floor_rms = 0.0        # Широкополосный RMS шума (float-шкала [-1, 1])
+        self._remainder = np.zeros(0, dtype=np.float32)
+
+    @property
+    def is_ready(self):
+        return self.noise_psd is not None
+
+    def update(self, power_frames):
+        """Обновление по спектрам мощности кадров без речи (n_frames, n_bins)"""
+        for power in np.atleast_2d(power_frames):
+            if self.smoothed_power is None:
+                self.smoothed_power = power.astype(np.float64)
+                self.current_min = self.smoothed_power.copy()
+            else:
+                self.smoothed_power *= self.smoothing
+                self.smoothed_power += (1 - self.smoothing) * power
+                np.minimum(self.current_min, self.smoothed_power, out=self.current_min)
+
+            self.frames_in_subwindow += 1
+            self.frames_seen += 1
+
+            if self.frames_in_subwindow >= self.subwindow_frames:
+                # Подокно заполнено: минимум уходит в кольцо, раз в subwindow_frames кадров
+                self.subwindow_mins[self.subwindow_index] = self.current_min
+                self.subwindow_index = (self.subwindow_index + 1) % self.n_subwindows
+                self.history_min = np.min(self.subwindow_mins, axis=0)
+                self.current_min = self.smoothed_power.copy()
+                self.frames_in_subwindow = 0
+
+        if self.smoothed_power is not None:
+            self.noise_psd = self.bias * np.minimum(self.history_min, self.current_min)
+            self.floor_rms = self._psd_to_rms(self.noise_psd)
+
+    def update_audio(self, audio_chunk):
+        """Обновление по сырому аудио без речи (когда спектр не посчитан шумоподавителем)"""
+        samples = np.concatenate((self._remainder, to_float32(audio_chunk).ravel()))
+        n_frames = len(samples) // self.frame_size
+        self._remainder = samples[n_frames * self.frame_size:]
+        if n_frames == 0:
+            return
+
+        frames = samples[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        self.update(spectrum.real ** 2 + spectrum.imag ** 2)
+
+    def _psd_to_rms(self, psd):
+        """Среднеквадратичный уровень сигнала по одностороннему спектру (теорема Парсеваля)"""
+        total = psd[0] + psd[-1] + 2 * np.sum(psd[1:-1])
+        return float(np.sqrt(total / (self.frame_size * self.window_power)))
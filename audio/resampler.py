@@ -0,0 +1,94 @@
+"""
+Потоковая передискретизация и сведение каналов к формату распознавания
+"""
+
+from math import gcd
+import numpy as np
+from config.audio_config import AUDIO_CONFIG
+from .audio_format import to_float32
+
+class StreamingResampler:
+    """Полифазный ресемплер с сохранением состояния фильтра между чанками
+
+    Приводит чанки с частотой и числом каналов микрофона к каноническому
+    формату распознавания: float32, моно, AUDIO_CONFIG['asr_rate'] Hz.
+    Все выходные сэмплы чанка считаются одной векторной операцией.
+    """
+
+    def __init__(self, in_rate, out_rate=None, channels=1, taps_per_phase=None, downmix=True):
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate or AUDIO_CONFIG['asr_rate'])
+        self.channels = channels
+        self.downmix = downmix
+
+        divisor = gcd(self.in_rate, self.out_rate)
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+        self.passthrough = self.up == self.down
+
+        # Длина фильтра задается на более низкой из двух частот, при понижении
+        # частоты на каждую фазу приходится больше входных отводов
+        base_taps = taps_per_phase or AUDIO_CONFIG['resampler_taps']
+        self.taps_per_phase = -(-base_taps * max(self.up, self.down) // self.up)
+
+        if not self.passthrough:
+            self.filter_bank = self._design_filter_bank()
+        self.reset()
+
+    def _design_filter_bank(self):
+        """ФНЧ-прототип (windowed sinc, окно Кайзера), разложенный на фазы"""
+        num_taps = self.up * self.taps_per_phase
+        cutoff = 0.9 * min(1.0 / self.up, 1.0 / self.down)  # доля от частоты Найквиста при up*in_rate
+
+        n = np.arange(num_taps) - (num_taps - 1) / 2.0
+        prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(num_taps, 8.0)
+        prototype *= self.up / np.sum(prototype)
+
+        # bank[p, j] = h[p + j * up]: фаза p умножается на x[k - j]
+        return prototype.reshape(self.taps_per_phase, self.up).T.astype(np.float32)
+
+    def reset(self):
+        """Сброс состояния между независимыми потоками"""
+        out_channels = 1 if self.downmix else self.channels
+        self._history = np.zeros((self.taps_per_phase - 1, out_channels), dtype=np.float32)
+        self._phase_position = 0  # позиция следующего выходного сэмпла в единицах in_rate * up
+
+    def _prepare(self, audio_chunk):
+        """Разбор чередующихся каналов и сведение в моно"""
+        samples = to_float32(audio_chunk)
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, self.channels)
+
+        if self.downmix and samples.shape[1] > 1:
+            samples = samples.mean(axis=1, keepdims=True)
+        return samples
+
+    def process(self, audio_chunk):
+        """Преобразование очередного чанка; возвращает float32 (моно - 1-D массив)"""
+        samples = self._prepare(audio_chunk)
+
+        if self.passthrough:
+            output = samples
+        else:
+            buffer = np.concatenate((self._history, samples))
+            n_input = len(samples)
+
+            # Позиции выходных сэмплов в сетке с повышенной частотой
+            total = n_input * self.up
+            n_output = max(0, -(-(total - self._phase_position) // self.down))
+            positions = self._phase_position + self.down * np.arange(n_output)
+            input_index = positions // self.up + (self.taps_per_phase - 1)
+            phases = positions % self.up
+
+            taps = input_index[:, np.newaxis] - np.arange(self.taps_per_phase)[np.newaxis, :]
+            output = np.einsum('nj,njc->nc', self.filter_bank[phases], buffer[taps])
+
+            self._phase_position = self._phase_position + n_output * self.down - total
+            self._history = buffer[len(buffer) - (self.taps_per_phase - 1):]
+
+        output = output.astype(np.float32, copy=False)
+        return output[:, 0] if output.shape[1] == 1 else output
+
+def resample_audio(audio_data, in_rate, out_rate=None, channels=1):
+    """Однократная передискретизация целого фрагмента в канонический формат"""
+    return StreamingResampler(in_rate, out_rate, channels).process(audio_data)
@@ -0,0 +1,130 @@
+"""
+Кольцевой буфер аудио фиксированного размера
+"""
+
+import threading
+import numpy as np
+
+class AudioRingBuffer:
+    """Кольцевой буфер int16 с чтением без копирования.
+
+    Память выделяется один раз. Каждый сэмпл пишется дважды (в основную
+    и в зеркальную половину массива), поэтому любое окно длиной до
+    capacity сэмплов всегда непрерывно и отдается как view без копирования.
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.dtype = dtype
+        self._data = np.zeros(self.capacity * 2, dtype=dtype)
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+
+        self.total_written = 0      # Всего записано сэмплов
+        self.read_position = 0      # Позиция чтения потребителя (в сэмплах)
+        self.overruns = 0           # Сколько раз непрочитанные данные были перезаписаны
+        self.lost_samples = 0       # Сколько непрочитанных сэмплов потеряно
+        self.input_overflows = 0    # Переполнения, о которых сообщил PortAudio
+
+    def write(self, samples):
+        """Запись сэмплов в буфер (вызывается из потока захвата)"""
+        samples = np.asarray(samples, dtype=self.dtype).ravel()
+        if len(samples) > self.capacity:
+            # В буфер помещается только хвост
+            with self._lock:
+                self._register_loss(len(samples) - self.capacity)
+            samples = samples[-self.capacity:]
+
+        count = len(samples)
+        if count == 0:
+            return
+
+        start = self.total_written % self.capacity
+        first = min(count, self.capacity - start)
+
+        # Основная и зеркальная копии
+        self._data[start:start + first] = samples[:first]
+        self._data[start + self.capacity:start + self.capacity + first] = samples[:first]
+        if first < count:
+            rest = count - first
+            self._data[:rest] = samples[first:]
+            self._data[self.capacity:self.capacity + rest] = samples[first:]
+
+        with self._data_ready:
+            self.total_written += count
+            unread = self.total_written - self.read_position
+            if unread > self.capacity:
+                self.overruns += 1
+                self.lost_samples += unread - self.capacity
+                self.read_position = self.total_written - self.capacity
+            self._data_ready.notify_all()
+
+    def _register_loss(self, count):
+        """Учет потерянных сэмплов"""
+        self.overruns += 1
+        self.lost_samples += count
+
+    def count_input_overflow(self):
+        """Учет переполнения входного буфера драйвера"""
+        self.input_overflows += 1
+
+    def _view(self, end, count):
+        """View на count сэмплов, заканчивающихся на абсолютной позиции end"""
+        end_index = end % self.capacity + self.capacity
+        return self._data[end_index - count:end_index]
+
+    def get_latest(self, num_samples):
+        """Последние num_samples сэмплов как view (без копирования)
+
+        View остается валидным, пока writer не запишет еще capacity сэмплов.
+        Для долгого хранения данных нужно сделать .copy().
+        """
+        with self._lock:
+            available = min(self.total_written, self.capacity)
+            count = min(int(num_samples), available)
+            return self._view(self.total_written, count)
+
+    def available(self):
+        """Количество непрочитанных сэмплов"""
+        with self._lock:
+            return self.total_written - self.read_position
+
+    def read_new(self, num_samples=None, timeout=None):
+        """Чтение непрочитанных сэмплов как view с продвижением позиции чтения
+
+        Если задан timeout, ожидает появления num_samples сэмплов.
+        Возвращает меньше данных, если по таймауту их не набралось.
+        """
+        with self._data_ready:
+            if timeout is not None and num_samples is not None:
+                self._data_ready.wait_for(
+                    lambda: self.total_written - self.read_position >= num_samples,
+                    timeout=timeout
+                )
+
+            unread = self.total_written - self.read_position
+            count = unread if num_samples is None else min(unread, int(num_samples))
+            end = self.read_position + count
+            view = self._view(end, count)
+            self.read_position = end
+            return view
+
+    def get_stats(self):
+        """Статистика работы буфера"""
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'total_written': self.total_written,
+                'unread': self.total_written - self.read_position,
+                'overruns': self.overruns,
+                'lost_samples': self.lost_samples,
+                'input_overflows': self.input_overflows
+            }
+
+    def clear(self):
+        """Сброс позиции чтения и счетчиков"""
+        with self._lock:
+            self.read_position = self.total_written
+            self.overruns = 0
+            self.lost_samples = 0
+            self.input_overflows = 0
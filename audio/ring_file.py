@@ -0,0 +1,201 @@
+"""
+Кольцевой аудиофайл фиксированного размера в разделяемой памяти
+
+Формат файла:
+    заголовок (64 байта) - магическое число, версия, частота дискретизации,
+    число каналов, емкость в сэмплах, указатель записи и номер
+    последовательности;
+    область сэмплов int16 - 2 * capacity сэмплов (основная и зеркальная
+    половины, чтобы любое окно до capacity сэмплов было непрерывным).
+
+Писатель увеличивает номер последовательности до нечетного перед записью
+и до четного после нее. Читатель повторяет чтение указателя, если номер
+изменился за время чтения.
+"""
+
+import os
+import sys
+import mmap
+import struct
+import argparse
+import numpy as np
+
+RING_FILE_MAGIC = b'NKRF'
+RING_FILE_VERSION = 1
+HEADER_SIZE = 64
+
+# magic, version, sample_rate, channels, capacity
+_HEADER_FORMAT = '<4sIIII'
+_WRITE_POS_OFFSET = 24       # uint64 указатель записи, за ним uint64 номер последовательности
+
+class RingFileWriter:
+    """Производитель: запись аудио в кольцевой файл"""
+
+    def __init__(self, path, capacity, sample_rate=16000, channels=1):
+        self.path = path
+        self.capacity = int(capacity)
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+        file_size = HEADER_SIZE + self.capacity * 2 * 2  # зеркало * 2 байта на сэмпл
+
+        # Файл создается один раз и больше не растет. Без усечения до нуля,
+        # чтобы уже отображенные читателями страницы оставались валидными
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.ftruncate(self._fd, file_size)
+        self._mmap = mmap.mmap(self._fd, file_size)
+
+        struct.pack_into(_HEADER_FORMAT, self._mmap, 0, RING_FILE_MAGIC, RING_FILE_VERSION,
+                         sample_rate, channels, self.capacity)
+
+        self._counters = np.frombuffer(self._mmap, dtype=np.uint64, count=2, offset=_WRITE_POS_OFFSET)
+        self._samples = np.frombuffer(self._mmap, dtype=np.int16, count=self.capacity * 2, offset=HEADER_SIZE)
+        self._counters[:] = 0
+
+    @property
+    def write_position(self):
+        return int(self._counters[0])
+
+    def write(self, samples):
+        """Запись сэмплов int16 в кольцо"""
+        samples = np.asarray(samples, dtype=np.int16).ravel()
+        if len(samples) > self.capacity:
+            skipped = len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        else:
+            skipped = 0
+
+        count = len(samples)
+        if count == 0:
+            return
+
+        position = self.write_position + skipped
+        start = position % self.capacity
+        first = min(count, self.capacity - start)
+
+        self._counters[1] += 1  # нечетный номер - идет запись
+
+        self._samples[start:start + first] = samples[:first]
+        self._samples[start + self.capacity:start + self.capacity + first] = samples[:first]
+        if first < count:
+            rest = count - first
+            self._samples[:rest] = samples[first:]
+            self._samples[self.capacity:self.capacity + rest] = samples[first:]
+
+        self._counters[0] = position + count
+        self._counters[1] += 1  # четный номер - запись завершена
+
+    def write_bytes(self, data):
+        """Запись сырых байтов PCM 16-bit"""
+        self.write(np.frombuffer(data, dtype=np.int16))
+
+    def close(self):
+        """Закрытие файла (данные остаются для читателей)"""
+        try:
+            self._mmap.flush()
+            del self._counters
+            del self._samples
+            self._mmap.close()
+            os.close(self._fd)
+        except Exception as e:
+            print(f"Ошибка закрытия кольцевого файла: {e}")
+
+class RingFileReader:
+    """Потребитель: отображение кольцевого файла в память и чтение окон без копирования"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, sample_rate, channels, capacity = struct.unpack_from(_HEADER_FORMAT, self._mmap, 0)
+        if magic != RING_FILE_MAGIC or version != RING_FILE_VERSION:
+            self.close()
+            raise ValueError(f"Неверный формат кольцевого файла: {path}")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capacity = capacity
+
+        self._counters = np.frombuffer(self._mmap, dtype=np.uint64, count=2, offset=_WRITE_POS_OFFSET)
+        self._samples = np.frombuffer(self._mmap, dtype=np.int16, count=capacity * 2, offset=HEADER_SIZE)
+
+    @property
+    def write_position(self):
+        return int(self._counters[0])
+
+    @property
+    def sequence(self):
+        return int(self._counters[1])
+
+    def get_latest(self, num_samples, retries=3):
+        """Последние num_samples сэмплов как read-only view без копирования
+
+        View остается валидным, пока писатель не запишет еще capacity сэмплов.
+        """
+        num_samples = min(int(num_samples), self.capacity)
+        position = self.write_position
+
+        for _ in range(retries):
+            sequence = self.sequence
+            if sequence % 2:
+                continue  # писатель в процессе записи
+
+            position = self.write_position
+            if self.sequence == sequence:
+                break
+
+        count = min(num_samples, position)
+        end_index = position % self.capacity + self.capacity
+        return self._samples[end_index - count:end_index]
+
+    def close(self):
+        """Закрытие отображения файла"""
+        try:
+            self._counters = None
+            self._samples = None
+            self._mmap.close()
+            self._file.close()
+        except Exception as e:
+            print(f"Ошибка закрытия кольцевого файла: {e}")
+
+def pipe_to_ring_file(source, path, seconds=60, sample_rate=16000, channels=1, block_size=4096):
+    """Копирование потока сырого PCM (например, вывода arecord) в кольцевой файл"""
+    writer = RingFileWriter(path, int(seconds * sample_rate * channels), sample_rate, channels)
+    remainder = b''
+
+    try:
+        while True:
+            data = source.read(block_size)
+            if not data:
+                break
+
+            data = remainder + data
+            usable = len(data) - len(data) % 2
+            remainder = data[usable:]
+            writer.write_bytes(data[:usable])
+    finally:
+        writer.close()
+
+def main():
+    """Производитель кольцевого файла из stdin:
+
+        arecord -f S16_LE -r 16000 -c 1 -t raw | python -m audio.ring_file
+    """
+    from config.audio_config import AUDIO_CONFIG
+
+    parser = argparse.ArgumentParser(description="Запись потока PCM в кольцевой файл")
+    parser.add_argument('--output', default=AUDIO_CONFIG['ring_file_path'])
+    parser.add_argument('--seconds', type=float, default=AUDIO_CONFIG['ring_file_seconds'])
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['rate'])
+    parser.add_argument('--channels', type=int, default=AUDIO_CONFIG['channels'])
+    args = parser.parse_args()
+
+    print(f"Запись в кольцевой файл {args.output} ({args.seconds} сек, {args.rate} Hz)")
+    try:
+        pipe_to_ring_file(sys.stdin.buffer, args.output, args.seconds, args.rate, args.channels)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
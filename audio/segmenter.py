@@ -0,0 +1,113 @@
+"""
+Сегментация потока аудио на высказывания по решениям VAD
+"""
+
+from collections import deque
+import numpy as np
+from config.audio_config import AUDIO_CONFIG
+
+class UtteranceSegmenter:
+    """Выделение высказываний из потока чанков
+
+    Перед началом речи к высказыванию добавляется pre-roll (последние
+    чанки тишины), чтобы не терять тихое начало слова. Конец речи
+    фиксируется после hang-over - заданной длительности тишины, чтобы
+    короткие паузы между словами не разрывали фразу.
+    """
+
+    def __init__(self, vad, sample_rate=16000, channels=1, pre_roll=None, hangover=None,
+                 min_duration=None, max_duration=None):
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.pre_roll = pre_roll if pre_roll is not None else AUDIO_CONFIG['vad_pre_roll']
+        self.hangover = hangover if hangover is not None else AUDIO_CONFIG['vad_hangover']
+        self.min_duration = min_duration if min_duration is not None else AUDIO_CONFIG['min_utterance']
+        self.max_duration = max_duration if max_duration is not None else AUDIO_CONFIG['max_utterance']
+
+        self.pre_roll_chunks = deque()
+        self.pre_roll_samples = 0
+        self.speech_chunks = []
+        self.speech_samples = 0
+        self.voiced_samples = 0
+        self.silence_samples = 0
+        self.in_speech = False
+
+    def _seconds(self, num_samples):
+        return num_samples / float(self.sample_rate * self.channels)
+
+    def _push_pre_roll(self, chunk):
+        """Хранение последних чанков тишины для pre-roll"""
+        self.pre_roll_chunks.append(chunk)
+        self.pre_roll_samples += len(chunk)
+        while self.pre_roll_chunks and self._seconds(self.pre_roll_samples - len(self.pre_roll_chunks[0])) >= self.pre_roll:
+            self.pre_roll_samples -= len(self.pre_roll_chunks.popleft())
+
+    def _finish(self):
+        """Завершение текущего высказывания"""
+        voiced = self._seconds(self.voiced_samples)
+        utterance = np.concatenate(self.speech_chunks) if self.speech_chunks else None
+
+        self.speech_chunks = []
+        self.speech_samples = 0
+        self.voiced_samples = 0
+        self.silence_samples = 0
+        self.in_speech = False
+
+        if utterance is None or voiced < self.min_duration:
+            return None
+        return utterance
+
+    def is_speech(self, chunk):
+        """Решение VAD для чанка"""
+        return self.vad.detect_speech(chunk) in ("start", "continue")
+
+    def process_chunk(self, chunk, is_speech=None):
+        """Обработка чанка; возвращает аудио высказывания, когда оно завершено"""
+        if is_speech is None:
+            is_speech = self.is_speech(chunk)
+
+        if not self.in_speech:
+            if not is_speech:
+                self._push_pre_roll(chunk)
+                return None
+
+            # Начало речи: высказывание начинается с pre-roll
+            self.in_speech = True
+            self.speech_chunks = list(self.pre_roll_chunks)
+            self.speech_samples = self.pre_roll_samples
+            self.pre_roll_chunks.clear()
+            self.pre_roll_samples = 0
+
+        self.speech_chunks.append(chunk)
+        self.speech_samples += len(chunk)
+
+        if is_speech:
+            self.voiced_samples += len(chunk)
+            self.silence_samples = 0
+        else:
+            self.silence_samples += len(chunk)
+
+        # Конец речи по hang-over или по максимальной длительности
+        if self._seconds(self.silence_samples) >= self.hangover:
+            return self._finish()
+        if self._seconds(self.speech_samples) >= self.max_duration:
+            return self._finish()
+
+        return None
+
+    def flush(self):
+        """Принудительное завершение высказывания (например, при остановке)"""
+        if not self.in_speech:
+            return None
+        return self._finish()
+
+    def reset(self):
+        """Сброс состояния"""
+        self.pre_roll_chunks.clear()
+        self.pre_roll_samples = 0
+        self.speech_chunks = []
+        self.speech_samples = 0
+        self.voiced_samples = 0
+        self.silence_samples = 0
+        self.in_speech = False
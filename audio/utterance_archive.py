@@ -0,0 +1,215 @@
+"""
+Фоновый архив высказываний: сжатое аудио + индекс с расшифровкой
+"""
+
+import io
+import os
+import gzip
+import json
+import wave
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from config.audio_config import AUDIO_CONFIG
+from utils.helpers import ensure_dir
+from .audio_format import to_int16
+
+class UtteranceArchive:
+    """Архив высказываний с записью в отдельном потоке
+
+    submit() только кладет высказывание в ограниченную очередь и никогда
+    не ждет диск: при переполнении очереди запись отбрасывается и
+    учитывается в статистике. Поток записи сохраняет аудио как WAV,
+    сжатый gzip, а строки индекса index.jsonl дописывает пачкой за одну
+    операцию. При превышении квоты удаляются самые старые записи - сразу
+    с запасом (до archive_evict_to квоты), чтобы индекс переписывался
+    редко, а не после каждой пачки.
+    """
+
+    INDEX_NAME = 'index.jsonl'
+
+    def __init__(self, directory=None, quota_mb=None, queue_size=None, batch_size=None,
+                 flush_interval=None, sample_rate=None, evict_to=None):
+        self.directory = directory or AUDIO_CONFIG['archive_dir']
+        self.quota_bytes = int((quota_mb or AUDIO_CONFIG['archive_quota_mb']) * 1024 * 1024)
+        self.evict_to_bytes = int(self.quota_bytes * (evict_to or AUDIO_CONFIG.get('archive_evict_to', 0.9)))
+        self.batch_size = batch_size or AUDIO_CONFIG['archive_batch_size']
+        self.flush_interval = flush_interval or AUDIO_CONFIG['archive_flush_interval']
+        self.sample_rate = sample_rate or AUDIO_CONFIG['asr_rate']
+        self.index_path = os.path.join(self.directory, self.INDEX_NAME)
+
+        self.queue = queue.Queue(maxsize=queue_size or AUDIO_CONFIG['archive_queue_size'])
+        self.thread = None
+        self.sequence = 0
+
+        # Статистика
+        self.written = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.index_rewrites = 0
+
+        ensure_dir(self.directory)
+        self._scan_existing()
+
+    def _scan_existing(self):
+        """Учет уже сохраненных файлов для квоты (от старых к новым)"""
+        self.files = deque()
+        self.total_bytes = 0
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.wav.gz'):
+                size = os.path.getsize(os.path.join(self.directory, name))
+                self.files.append((name, size))
+                self.total_bytes += size
+
+    def start(self):
+        """Запуск потока записи"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._writer_loop, name='utterance-archive', daemon=True)
+        self.thread.start()
+
+    def submit(self, audio, text='', critical_level=None):
+        """Постановка высказывания в очередь записи без ожидания
+
+        Массив audio передается архиву и не должен изменяться вызывающим.
+        """
+        self.sequence += 1
+        item = {
+            'audio': audio,
+            'text': text or '',
+            'critical_level': critical_level,
+            'timestamp': datetime.now(),
+            'sequence': self.sequence
+        }
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _writer_loop(self):
+        """Цикл потока записи: пачки до batch_size элементов"""
+        running = True
+        while running:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            if first is None:
+                running = False
+            else:
+                batch.append(first)
+
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+
+    def _encode(self, audio):
+        """WAV 16-bit моно, сжатый gzip"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(to_int16(audio).tobytes())
+        return gzip.compress(buffer.getvalue(), compresslevel=6)
+
+    def _write_batch(self, batch):
+        """Запись пачки: файлы аудио и одна дозапись индекса"""
+        index_lines = []
+        for item in batch:
+            try:
+                name = f"{item['timestamp'].strftime('%Y%m%d_%H%M%S_%f')}_{item['sequence']:06d}.wav.gz"
+                data = self._encode(item['audio'])
+                with open(os.path.join(self.directory, name), 'wb') as f:
+                    f.write(data)
+
+                self.files.append((name, len(data)))
+                self.total_bytes += len(data)
+                self.written += 1
+
+                index_lines.append(json.dumps({
+                    'file': name,
+                    'time': item['timestamp'].isoformat(),
+                    'duration': round(len(item['audio']) / float(self.sample_rate), 3),
+                    'text': item['text'],
+                    'critical_level': item['critical_level']
+                }, ensure_ascii=False))
+            except Exception as e:
+                print(f"Ошибка записи высказывания в архив: {e}")
+
+        try:
+            if index_lines:
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(index_lines) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._enforce_quota()
+        except Exception as e:
+            print(f"Ошибка обновления индекса архива: {e}")
+
+    def _enforce_quota(self):
+        """Удаление самых старых записей при превышении квоты (до evict_to_bytes)"""
+        if self.total_bytes <= self.quota_bytes:
+            return
+        removed = set()
+        while self.total_bytes > self.evict_to_bytes and len(self.files) > 1:
+            name, size = self.files.popleft()
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+            self.evicted += 1
+            removed.add(name)
+
+        if removed and os.path.exists(self.index_path):
+            # Индекс переписывается только когда что-то удалено
+            temp_path = self.index_path + '.tmp'
+            with open(self.index_path, 'r', encoding='utf-8') as source, \
+                    open(temp_path, 'w', encoding='utf-8') as target:
+                for line in source:
+                    try:
+                        if json.loads(line).get('file') in removed:
+                            continue
+                    except json.JSONDecodeError:
+                        continue
+                    target.write(line)
+            os.replace(temp_path, self.index_path)
+            self.index_rewrites += 1
+
+    def get_stats(self):
+        """Статистика архива"""
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'evicted': self.evicted,
+            'index_rewrites': self.index_rewrites,
+            'queued': self.queue.qsize(),
+            'total_mb': round(self.total_bytes / (1024 * 1024), 2)
+        }
+
+    def stop(self, timeout=5.0):
+        """Остановка потока с записью оставшейся очереди"""
+        if self.thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
+        self.thread = None
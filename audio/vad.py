@@ -3,39 +3,158 @@
 """
 
 import numpy as np
+from config.audio_config import AUDIO_CONFIG
+from .audio_format import to_float32, INT16_SCALE
 
 class VoiceActivityDetector:
-    def __init__(self, threshold=500, min_duration=0.1):
-        self.threshold = threshold
+    """Детектор речи по нескольким признакам кадра
+
+    Для всех кадров блока за один проход NumPy считаются энергия (RMS),
+    доля переходов через ноль, спектральная плоскостность и доля энергии
+    в речевой полосе. Кадр считается речевым, если громкий сигнал не похож
+    ни на широкополосный шум (высокая плоскостность), ни на низкочастотный
+    гул оборудования (мало энергии в речевой полосе). Решения сглаживаются
+    hang-over: после речевого кадра еще несколько кадров считаются речью.
+    """
+
+    def __init__(self, threshold=500, min_duration=0.1, sample_rate=16000, noise_tracker=None):
+        self.threshold = threshold          # Порог RMS в единицах int16
+        self.noise_tracker = noise_tracker  # Общая с шумоподавителем оценка шума (NoiseFloorTracker)
+        self.min_threshold = AUDIO_CONFIG['vad_min_threshold']
+        self.noise_factor = AUDIO_CONFIG['vad_noise_factor']
         self.min_duration = min_duration
+        self.sample_rate = sample_rate
         self.speech_buffer = []
         self.is_speaking = False
-    
+
+        self.frame_length = int(sample_rate * AUDIO_CONFIG['vad_frame_ms'] / 1000)
+        self.hangover_frames = AUDIO_CONFIG['vad_hangover_frames']
+        self.max_flatness = AUDIO_CONFIG['vad_max_flatness']
+        self.max_zcr = AUDIO_CONFIG['vad_max_zcr']
+        self.min_band_ratio = AUDIO_CONFIG['vad_min_band_ratio']
+        self.speech_band = AUDIO_CONFIG['vad_speech_band']
+        self._setup_frame_analysis()
+
+        # Состояние между вызовами потокового API
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._frames_since_speech = self.hangover_frames + 1
+
+    def _setup_frame_analysis(self):
+        """Окно и маска речевой полосы для текущей длины кадра"""
+        self.window = np.hanning(self.frame_length).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / self.sample_rate)
+        self.band_mask = (freqs >= self.speech_band[0]) & (freqs <= self.speech_band[1])
+
+    def set_sample_rate(self, sample_rate):
+        """Смена частоты дискретизации входного потока"""
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * AUDIO_CONFIG['vad_frame_ms'] / 1000)
+        self._setup_frame_analysis()
+        self.reset()
+
+    def compute_features(self, frames):
+        """Признаки для матрицы кадров (n_frames, frame_length) за один проход"""
+        energy = np.sqrt(np.mean(frames ** 2, axis=1)) * INT16_SCALE
+
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(self.frame_length - 1)
+
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-12
+        total_power = np.sum(power, axis=1)
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / (total_power / power.shape[1])
+        band_ratio = np.sum(power[:, self.band_mask], axis=1) / total_power
+
+        return {
+            'energy': energy,
+            'zcr': zcr,
+            'flatness': flatness,
+            'band_ratio': band_ratio
+        }
+
+    def _apply_hangover(self, raw_decisions):
+        """Сглаживание решений: речь продлевается на hangover_frames кадров"""
+        n_frames = len(raw_decisions)
+        indices = np.arange(n_frames)
+
+        # Индекс последнего речевого кадра (с учетом предыдущего блока)
+        last_speech = np.where(raw_decisions, indices, -self._frames_since_speech)
+        last_speech = np.maximum.accumulate(last_speech)
+        decisions = (indices - last_speech) <= self.hangover_frames
+
+        self._frames_since_speech = int(n_frames - last_speech[-1])
+        return decisions
+
+    def detect_frames(self, audio_data, stream=True):
+        """Решения речь/не речь для каждого кадра блока аудио
+
+        В потоковом режиме неполный последний кадр и состояние hang-over
+        переносятся на следующий вызов.
+        """
+        audio = to_float32(audio_data)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+
+        if stream:
+            audio = np.concatenate((self._remainder, audio))
+        else:
+            self._frames_since_speech = self.hangover_frames + 1
+
+        n_frames = len(audio) // self.frame_length
+        used = n_frames * self.frame_length
+        if stream:
+            self._remainder = audio[used:].copy()
+
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = audio[:used].reshape(n_frames, self.frame_length)
+        features = self.compute_features(frames)
+
+        if self.noise_tracker is not None and self.noise_tracker.is_ready:
+            # Порог следует за текущим уровнем шума цеха
+            self.threshold = max(self.min_threshold,
+                                 self.noise_tracker.floor_rms * INT16_SCALE * self.noise_factor)
+
+        raw_decisions = (
+            (features['energy'] > self.threshold)
+            & (features['flatness'] < self.max_flatness)
+            & (features['zcr'] < self.max_zcr)
+            & (features['band_ratio'] > self.min_band_ratio)
+        )
+        return self._apply_hangover(raw_decisions)
+
     def detect_speech(self, audio_chunk):
         """Обнаружение речи в аудиочанке"""
         try:
-            energy = np.sqrt(np.mean(audio_chunk**2))
-            
-            # Порог
-            has_speech = energy > self.threshold
-            
+            decisions = self.detect_frames(audio_chunk)
+            if len(decisions) > 0:
+                has_speech = bool(decisions.any())
+            else:
+                has_speech = self.is_speaking  # чанк короче кадра
+
             if has_speech and not self.is_speaking:
                 self.is_speaking = True
                 return "start"
             elif not has_speech and self.is_speaking:
-                self.is_speaking = False  
+                self.is_speaking = False
                 return "end"
             elif has_speech and self.is_speaking:
                 return "continue"
             else:
                 return "silence"
-                
+
         except Exception as e:
             print(f"Ошибка VAD: {e}")
             return "silence"
-    
+
     def update_threshold(self, background_noise):
         """Адаптивное обновление порога на основе фонового шума"""
-        bg_energy = np.sqrt(np.mean(background_noise**2))
+        bg_energy = np.sqrt(np.mean(to_float32(background_noise) ** 2)) * INT16_SCALE
         self.threshold = bg_energy * 1.5  # Порог на 50% выше шума
-        print(f"Обновлен порог VAD: {self.threshold:.2f}")
\ No newline at end of file
+        print(f"Обновлен порог VAD: {self.threshold:.2f}")
+
+    def reset(self):
+        """Сброс потокового состояния"""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._frames_since_speech = self.hangover_frames + 1
+        self.is_speaking = False
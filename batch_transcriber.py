@@ -0,0 +1,231 @@
+"""
+Пакетное распознавание записанных смен для разбора инцидентов
+"""
+
+import os
+import sys
+import gzip
+import json
+import wave
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from config.audio_config import AUDIO_CONFIG
+from utils.logger import setup_logger
+from utils.helpers import ensure_dir
+
+AUDIO_EXTENSIONS = ('.wav', '.wav.gz', '.raw')
+
+# Модели рабочего процесса (одна загрузка на процесс)
+_worker_engine = None
+_worker_priority = None
+
+def _init_worker():
+    """Загрузка Whisper и анализатора критичности в рабочем процессе"""
+    global _worker_engine, _worker_priority
+    import torch
+    from speech_recognition.whisper_engine import WhisperEngine
+    from nlp.priority_calculator import PriorityCalculator
+
+    # Параллелизм дают процессы, внутри процесса один поток torch
+    torch.set_num_threads(1)
+    _worker_engine = WhisperEngine()
+    _worker_priority = PriorityCalculator()
+
+def _transcribe_segments(jobs):
+    """Распознавание и оценка критичности группы фрагментов
+
+    Речевые акты фраз группы определяются одним пакетом классификатора
+    (analyze_batch), а не отдельным проходом на каждую фразу.
+    """
+    texts = [_worker_engine.transcribe_audio(job['audio']) for job in jobs]
+    analyzed = [text for text in texts if text and len(text.strip()) > 3]
+    levels = {text: result.critical_level
+              for text, result in zip(analyzed, _worker_priority.analyze_batch(analyzed))}
+    return [{
+        'file': job['file'],
+        'segment': job['segment'],
+        'start': job['start'],
+        'end': job['end'],
+        'text': text,
+        'critical_level': levels.get(text)
+    } for job, text in zip(jobs, texts)]
+
+def find_audio_files(input_dir):
+    """Аудиофайлы каталога (рекурсивно) в стабильном порядке"""
+    paths = []
+    for root, _, names in os.walk(input_dir):
+        for name in names:
+            if name.endswith(AUDIO_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def read_audio_file(path):
+    """Чтение файла: (int16 массив, частота, число каналов)
+
+    RAW файлы - int16 с параметрами AUDIO_CONFIG['batch_raw_rate'] и
+    AUDIO_CONFIG['batch_raw_channels'].
+    """
+    if path.endswith('.raw'):
+        audio = np.fromfile(path, dtype=np.int16)
+        return audio, AUDIO_CONFIG['batch_raw_rate'], AUDIO_CONFIG['batch_raw_channels']
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f, wave.open(f, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"поддерживается только 16-bit WAV, получено {wav.getsampwidth() * 8}-bit")
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        return audio, wav.getframerate(), wav.getnchannels()
+
+def segment_file(path, key):
+    """Разбиение файла на фразы тем же конвейером, что и в живом режиме
+
+    Генератор заданий: аудио фразы и ее положение в файле (сек).
+    """
+    from speech_recognition.speech_to_text import SpeechToText
+
+    audio, rate, channels = read_audio_file(path)
+    front_end = SpeechToText(rate, channels, autoload=False)
+    chunk = AUDIO_CONFIG['chunk'] * channels
+    asr_rate = front_end.asr_rate
+    processed = 0   # Сэмплов на частоте asr_rate
+    segment = 0
+
+    for position in range(0, len(audio), chunk):
+        audio_chunk = audio[position:position + chunk]
+        processed += len(audio_chunk) // channels * asr_rate / rate
+        utterance = front_end.segment_audio_chunk(audio_chunk)
+        if utterance is None:
+            utterance = None if position + chunk < len(audio) else front_end.segmenter.flush()
+        if utterance is not None:
+            yield {
+                'file': key,
+                'segment': segment,
+                'start': round(max(0.0, processed - len(utterance)) / asr_rate, 2),
+                'end': round(processed / asr_rate, 2),
+                'audio': utterance
+            }
+            segment += 1
+
+def load_progress(output_path):
+    """Уже обработанные фрагменты и полностью завершенные файлы из JSONL"""
+    done_segments = set()
+    done_files = set()
+    if not os.path.exists(output_path):
+        return done_segments, done_files
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # оборванная последняя строка после прерывания
+            if record.get('file_done'):
+                done_files.add(record['file'])
+            elif 'segment' in record:
+                done_segments.add((record['file'], record['segment']))
+    return done_segments, done_files
+
+def run_batch(input_dir, output_path=None, workers=None):
+    """Пакетная обработка каталога с записью результатов в JSONL
+
+    Фрагменты распределяются по пулу процессов группами по мере нарезки.
+    Каждый результат дописывается в файл сразу, поэтому после прерывания
+    повторный запуск пропускает готовые фрагменты и файлы.
+    """
+    logger = setup_logger('batch')
+    output_path = output_path or os.path.join(input_dir, 'transcripts.jsonl')
+    workers = workers or AUDIO_CONFIG.get('batch_workers') or os.cpu_count() or 1
+    group_size = AUDIO_CONFIG.get('batch_group_size') or 1
+    max_in_flight = workers * 2     # Групп в памяти
+
+    paths = find_audio_files(input_dir)
+    done_segments, done_files = load_progress(output_path)
+    logger.info(f"Файлов: {len(paths)}, уже обработано: {len(done_files)}, процессов: {workers}")
+
+    pending = {}        # future -> (ключ файла, число фрагментов)
+    remaining = {}      # ключ файла -> незавершенных фрагментов
+    segmented = set()   # файлы, нарезка которых закончена
+    failed = set()      # файлы с ошибками: не отмечаются готовыми и повторятся
+    processed = 0
+
+    def finish_file(out, key):
+        out.write(json.dumps({'file': key, 'file_done': True}, ensure_ascii=False) + '\n')
+        out.flush()
+        logger.info(f"Файл обработан: {key}")
+
+    def collect(out, futures):
+        nonlocal processed
+        for future in futures:
+            key, count = pending.pop(future)
+            try:
+                for record in future.result():
+                    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                processed += count
+            except Exception as e:
+                logger.error(f"Ошибка распознавания фрагментов {key}: {e}")
+                failed.add(key)
+            remaining[key] -= count
+            if remaining[key] == 0 and key in segmented and key not in failed:
+                finish_file(out, key)
+
+    def submit(out, pool, key, group):
+        # Ограничение числа фрагментов в памяти
+        while len(pending) >= max_in_flight:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(out, finished)
+        pending[pool.submit(_transcribe_segments, group)] = (key, len(group))
+        remaining[key] += len(group)
+
+    context = multiprocessing.get_context('spawn')  # fork небезопасен с потоками torch
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        for path in paths:
+            key = os.path.relpath(path, input_dir)
+            if key in done_files:
+                continue
+
+            remaining[key] = 0
+            group = []
+            try:
+                for job in segment_file(path, key):
+                    if (key, job['segment']) in done_segments:
+                        continue
+                    group.append(job)
+                    if len(group) >= group_size:
+                        submit(out, pool, key, group)
+                        group = []
+                if group:
+                    submit(out, pool, key, group)
+            except Exception as e:
+                logger.error(f"Ошибка чтения {key}: {e}")
+                continue
+
+            segmented.add(key)
+            if remaining[key] == 0 and key not in failed:
+                finish_file(out, key)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(out, finished)
+
+    logger.info(f"Пакетная обработка завершена: {processed} фрагментов, результаты в {output_path}")
+    return output_path
+
+def main(argv=None):
+    """Разбор аргументов: <каталог> [результат.jsonl] [--workers N]"""
+    args = list(sys.argv[1:] if argv is None else argv)
+    workers = None
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print("Использование: python batch_transcriber.py <каталог> [результат.jsonl] [--workers N]")
+        return None
+    ensure_dir('logs')  # setup_logger пишет в logs/ текущего каталога
+    return run_batch(args[0], args[1] if len(args) > 1 else None, workers)
+
+if __name__ == '__main__':
+    main()
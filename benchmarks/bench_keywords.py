@@ -0,0 +1,79 @@
+"""
+Бенчмарк поиска ключевых фраз: автомат Ахо-Корасик против regex и поиска
+подстрок по каждому слову словаря при росте словаря
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_keywords
+"""
+
+import re
+import time
+import random
+from nlp.keyword_automaton import KeywordAutomaton, normalize_text
+
+TRANSCRIPTS = [
+    "Срочно всем покинуть цех номер три, утечка аммиака у компрессора",
+    "Насос на втором участке не работает, давление 12 атм",
+    "Проверка связи, как слышно",
+    "Мастер, подойдите к складу готовой продукции после обеда",
+    "Немедленно обесточить трансформатор, задымление в помещении щитовой",
+]
+
+BASE_VOCABULARY = ['пожар', 'взрыв', 'авария', 'утечка', 'обрушение', 'эвакуация', 'срочно',
+                   'немедленно', 'опасно', 'не работает', 'нет связи', 'станок', 'реактор',
+                   'насос', 'компрессор', 'трансформатор', 'цех', 'склад', 'участок', 'зона']
+
+def synth_vocabulary(size, seed=0):
+    """Словарь заданного размера: базовые термины и условные названия агрегатов"""
+    rng = random.Random(seed)
+    syllables = ['ка', 'ро', 'ту', 'ми', 'ле', 'на', 'зо', 'вер', 'гал', 'бун', 'пер', 'стан']
+    vocabulary = list(BASE_VOCABULARY)
+    while len(vocabulary) < size:
+        word = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        vocabulary.append(f"{word} {rng.randint(1, 99)}" if rng.random() < 0.3 else word)
+    return vocabulary[:size]
+
+def legacy_search(vocabulary, pattern, text):
+    """Прежний подход: regex-альтернация и поиск подстроки для каждого слова"""
+    matches = pattern.findall(text)
+    lower = text.lower()
+    for keyword in vocabulary:
+        if keyword in lower:
+            matches.append(keyword)
+    return matches
+
+def timed(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    repeats = 200
+    print(f"{'словарь':>8}{'regex+in, мкс':>16}{'автомат, мкс':>15}{'построение, с':>16}")
+    for size in (20, 200, 2000, 10000):
+        vocabulary = synth_vocabulary(size)
+
+        pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, vocabulary)) + r')\b', re.IGNORECASE)
+        legacy = timed(lambda: [legacy_search(vocabulary, pattern, text) for text in TRANSCRIPTS], repeats)
+
+        start = time.perf_counter()
+        automaton = KeywordAutomaton(inflect=size <= 200)  # словоформы только для реального словаря
+        for phrase in vocabulary:
+            automaton.add(phrase, 'bench', 'term')
+        automaton.build()
+        build_time = time.perf_counter() - start
+
+        fast = timed(lambda: [automaton.search(text) for text in TRANSCRIPTS], repeats)
+
+        per_text = len(TRANSCRIPTS)
+        print(f"{size:>8}{legacy / per_text * 1e6:>16.1f}{fast / per_text * 1e6:>15.1f}{build_time:>16.2f}")
+
+    automaton = KeywordAutomaton()
+    for phrase in BASE_VOCABULARY:
+        automaton.add(phrase, 'bench', 'term')
+    print("\nСловоформы: " + ', '.join(
+        match[5] for text in TRANSCRIPTS for match in automaton.search(normalize_text(text))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Бенчмарк пакетной классификации речевых актов: пропускная способность
+в зависимости от размера пакета и задержка одиночной фразы через
+динамический пакетировщик
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_speech_act_batch
+"""
+
+import time
+import threading
+from nlp.speech_act_classifier import SpeechActClassifier
+
+TRANSCRIPTS = [
+    "Срочно всем покинуть цех номер три, утечка аммиака у компрессора",
+    "Насос на втором участке не работает, давление 12 атм",
+    "Проверка связи, как слышно",
+    "Мастер, подойдите к складу готовой продукции после обеда",
+    "Немедленно обесточить трансформатор, задымление в помещении щитовой",
+    "Стоп насос",
+    "Отойди",
+    "Эвакуация",
+]
+
+def timed(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    classifier = SpeechActClassifier()
+    if classifier.model is None:
+        print("Модель классификатора не загружена")
+        return
+    classifier.warm_up()
+
+    texts = TRANSCRIPTS * 8
+    loop = timed(lambda: [classifier.classify_speech_act(text) for text in texts], 3)
+    print(f"{'пакет':>6}{'фраз/сек':>12}")
+    print(f"{'цикл':>6}{len(texts) / loop:>12.1f}")
+    for batch_size in (1, 4, 16, 32):
+        batched = timed(lambda: classifier.batch_classify(texts, batch_size=batch_size), 3)
+        print(f"{batch_size:>6}{len(texts) / batched:>12.1f}")
+
+    # Одиночная живая фраза: напрямую и через пакетировщик
+    direct = timed(lambda: classifier.classify_speech_act("Стоп насос"), 20)
+    via_batcher = timed(lambda: classifier.classify_batched("Стоп насос"), 20)
+    print(f"\nОдиночная фраза: напрямую {direct * 1000:.1f} мс, "
+          f"через пакетировщик {via_batcher * 1000:.1f} мс")
+
+    # Несколько источников одновременно
+    def producer():
+        for text in texts:
+            classifier.classify_batched(text)
+
+    threads = [threading.Thread(target=producer) for _ in range(4)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"4 источника: {len(texts) * 4 / elapsed:.1f} фраз/сек, "
+          f"пакеты {classifier.get_batcher().get_stats()}")
+    classifier.get_batcher().stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Бенчмарк классификатора речевых актов: пайплайн PyTorch против ONNX
+Runtime с int8 квантованием
+
+Сравниваются задержка одиночной фразы, время загрузки, память процесса
+(RSS) и совпадение меток. Каждый вариант загружается в отдельном
+процессе, чтобы память одного не учитывалась в другом.
+
+Запуск из корня проекта (после python -m nlp.onnx_export):
+    python -m benchmarks.bench_speech_act_onnx
+"""
+
+import time
+import multiprocessing
+import numpy as np
+
+TRANSCRIPTS = [
+    "Срочно всем покинуть цех номер три, утечка аммиака у компрессора",
+    "Насос на втором участке не работает, давление 12 атм",
+    "Проверка связи, как слышно",
+    "Мастер, подойдите к складу готовой продукции после обеда",
+    "Немедленно обесточить трансформатор, задымление в помещении щитовой",
+    "Стоп насос",
+    "Отойди",
+    "Эвакуация",
+    "Я проверю давление в реакторе к концу смены",
+    "Отлично, спасибо за помощь",
+]
+
+def rss_mb():
+    """Текущий RSS процесса (МБ)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def run_backend(backend, results):
+    """Загрузка и замеры в отдельном процессе"""
+    from config.model_config import MODEL_CONFIG
+    MODEL_CONFIG['speech_act_backend'] = backend
+    from nlp.speech_act_classifier import SpeechActClassifier
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    classifier = SpeechActClassifier()
+    load_time = time.perf_counter() - start
+    if classifier.backend != backend:
+        results.put({'backend': backend, 'error': f"загружен {classifier.backend}"})
+        return
+    classifier.warm_up()
+
+    latencies = []
+    labels = []
+    fallbacks = 0   # Запасной UNKNOWN без raw_label: ошибка модели или пустой текст
+    for _ in range(5):
+        for text in TRANSCRIPTS:
+            start = time.perf_counter()
+            result = classifier.classify_speech_act(text)
+            latencies.append(time.perf_counter() - start)
+            fallbacks += 'raw_label' not in result
+        labels = [result.get('raw_label') for result in classifier.batch_classify(TRANSCRIPTS)]
+
+    results.put({
+        'backend': backend,
+        'load': load_time,
+        'rss': rss_mb(),
+        'rss_model': rss_mb() - rss_before,
+        'median_ms': float(np.median(latencies)) * 1000,
+        'p95_ms': float(np.percentile(latencies, 95)) * 1000,
+        'labels': labels,
+        'fallbacks': fallbacks,
+        'batch_fallbacks': labels.count(None)
+    })
+
+def main():
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    reports = {}
+    for backend in ('torch', 'onnx'):
+        process = context.Process(target=run_backend, args=(backend, results))
+        process.start()
+        report = results.get()
+        process.join()
+        reports[backend] = report
+
+    for backend, report in reports.items():
+        if 'error' in report:
+            print(f"{backend}: недоступен ({report['error']})")
+            continue
+        print(f"{backend:>6}: загрузка {report['load']:.1f} сек, RSS {report['rss']:.0f} МБ "
+              f"(модель {report['rss_model']:.0f} МБ), медиана {report['median_ms']:.1f} мс, "
+              f"p95 {report['p95_ms']:.1f} мс")
+        if report['fallbacks'] or report['batch_fallbacks']:
+            print(f"{'':>6}  запасной результат: {report['fallbacks']} одиночных, "
+                  f"{report['batch_fallbacks']} в пакете")
+
+    if all('labels' in report for report in reports.values()):
+        # Сравниваются только фразы, классифицированные обоими вариантами
+        pairs = [(a, b) for a, b in zip(reports['torch']['labels'], reports['onnx']['labels'])
+                 if a is not None and b is not None]
+        if pairs:
+            agreement = sum(a == b for a, b in pairs) / len(pairs)
+            print(f"Совпадение меток: {agreement:.0%} ({len(pairs)} из {len(TRANSCRIPTS)} фраз)")
+        else:
+            print("Совпадение меток: нет фраз, классифицированных обоими вариантами")
+
+if __name__ == '__main__':
+    main()
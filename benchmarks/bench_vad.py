@@ -0,0 +1,71 @@
+"""
+Бенчмарк VAD: векторизованный многопризнаковый детектор против
+прежнего детектора по энергии чанка
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_vad
+"""
+
+import time
+import numpy as np
+from audio.vad import VoiceActivityDetector
+from benchmarks.synthetic_audio import synth_scene
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+def legacy_detect(audio, threshold=500, chunk=CHUNK):
+    """Прежний алгоритм: RMS чанка int16 против фиксированного порога"""
+    decisions = []
+    with np.errstate(over='ignore', invalid='ignore'):
+        for start in range(0, len(audio) - chunk + 1, chunk):
+            audio_chunk = audio[start:start + chunk]
+            energy = np.sqrt(np.mean(audio_chunk**2))
+            decisions.append(energy > threshold)
+    return np.repeat(np.array(decisions, dtype=bool), chunk)
+
+def score(decisions, labels):
+    """Доля верных решений, пропуски речи и ложные срабатывания"""
+    labels = labels[:len(decisions)]
+    decisions = decisions[:len(labels)]
+    accuracy = np.mean(decisions == labels)
+    miss = np.mean(~decisions[labels]) if labels.any() else 0.0
+    false_alarm = np.mean(decisions[~labels]) if (~labels).any() else 0.0
+    return accuracy, miss, false_alarm
+
+def timed(func, repeats=5):
+    """Лучшее время из нескольких запусков"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    audio, labels = synth_scene(duration=60.0, sample_rate=SAMPLE_RATE)
+    print(f"Сигнал: {len(audio) / SAMPLE_RATE:.0f} сек, речь {labels.mean() * 100:.0f}% времени")
+
+    legacy_time, legacy = timed(lambda: legacy_detect(audio))
+
+    vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+    batch_time, frame_decisions = timed(lambda: vad.detect_frames(audio, stream=False))
+    batch = np.repeat(frame_decisions, vad.frame_length)
+
+    def per_chunk():
+        vad.reset()
+        return [vad.detect_speech(audio[i:i + CHUNK]) for i in range(0, len(audio) - CHUNK + 1, CHUNK)]
+    stream_time, _ = timed(per_chunk, repeats=3)
+
+    print(f"{'детектор':<28}{'время, мс':>10}{'точность':>10}{'пропуски':>10}{'ложные':>10}")
+    for name, elapsed, decisions in (
+        ("прежний (RMS чанка)", legacy_time, legacy),
+        ("новый, пакетный", batch_time, batch),
+    ):
+        accuracy, miss, false_alarm = score(decisions, labels)
+        print(f"{name:<28}{elapsed * 1000:>10.1f}{accuracy:>10.3f}{miss:>10.3f}{false_alarm:>10.3f}")
+    print(f"{'новый, по чанкам':<28}{stream_time * 1000:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Бенчмарк Whisper на CPU: float32 модель против int8 динамического квантования
+
+Сравниваются скорость (real-time factor - время распознавания, деленное
+на длительность аудио) и совпадение расшифровок по словам.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_whisper_quant [модель] [файл.wav ...]
+
+Без файлов используются записи архива высказываний из data/audio_samples.
+"""
+
+import os
+import sys
+import gzip
+import time
+import wave
+import numpy as np
+import torch
+import whisper
+from config.model_config import MODEL_CONFIG
+from speech_recognition.whisper_engine import WhisperEngine
+from audio.resampler import resample_audio
+
+SAMPLE_RATE = 16000
+
+def load_wav(path):
+    """WAV 16-bit (в том числе .wav.gz архива) -> float32 моно 16 кГц"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f, wave.open(f, 'rb') as wav:
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    return resample_audio(audio, rate, SAMPLE_RATE, channels)
+
+def word_agreement(reference, hypothesis):
+    """1 - WER гипотезы относительно эталона (расстояние Левенштейна по словам)"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 1.0 if not hyp else 0.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return max(0.0, 1.0 - previous[-1] / len(ref))
+
+def transcribe(model, audio):
+    return model.transcribe(audio, language=MODEL_CONFIG['whisper_language'], fp16=False,
+                            temperature=0.0)["text"].strip()
+
+def timed_transcribe(model, samples):
+    """Расшифровки и суммарное время распознавания"""
+    texts = []
+    start = time.perf_counter()
+    for audio in samples:
+        texts.append(transcribe(model, audio))
+    return texts, time.perf_counter() - start
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else MODEL_CONFIG['whisper_model']
+    paths = sys.argv[2:]
+    if not paths:
+        sample_dir = 'data/audio_samples'
+        if os.path.isdir(sample_dir):
+            paths = [os.path.join(sample_dir, name) for name in sorted(os.listdir(sample_dir))
+                     if name.endswith(('.wav', '.wav.gz'))]
+    if not paths:
+        print("Нет WAV файлов с речью: укажите их аргументами")
+        return
+
+    samples = [load_wav(path) for path in paths]
+    total_audio = sum(len(audio) for audio in samples) / SAMPLE_RATE
+    print(f"Модель: {model_name}, потоков torch: {torch.get_num_threads()}, "
+          f"аудио: {len(samples)} файлов, {total_audio:.1f} сек")
+
+    start = time.perf_counter()
+    float_model = whisper.load_model(model_name, device='cpu')
+    float_load = time.perf_counter() - start
+
+    engine = WhisperEngine(autoload=False)
+    engine.config = dict(MODEL_CONFIG, whisper_model=model_name)
+    start = time.perf_counter()
+    int8_model = engine._load_quantized_model(model_name)
+    int8_load = time.perf_counter() - start
+    start = time.perf_counter()
+    engine._load_quantized_model(model_name)  # повторный запуск читает кэш
+    cached_load = time.perf_counter() - start
+
+    # Прогрев, чтобы не учитывать первый вызов
+    transcribe(float_model, samples[0][:SAMPLE_RATE])
+    transcribe(int8_model, samples[0][:SAMPLE_RATE])
+
+    float_texts, float_time = timed_transcribe(float_model, samples)
+    int8_texts, int8_time = timed_transcribe(int8_model, samples)
+    agreement = np.mean([word_agreement(ref, hyp) for ref, hyp in zip(float_texts, int8_texts)])
+
+    print(f"{'вариант':<12}{'загрузка, с':>14}{'RTF':>8}")
+    print(f"{'float32':<12}{float_load:>14.2f}{float_time / total_audio:>8.3f}")
+    print(f"{'int8':<12}{int8_load:>14.2f}{int8_time / total_audio:>8.3f}")
+    print(f"{'int8 (кэш)':<12}{cached_load:>14.2f}")
+    print(f"Ускорение: {float_time / int8_time:.2f}x, совпадение слов с float32: {agreement * 100:.1f}%")
+
+    for path, ref, hyp in zip(paths, float_texts, int8_texts):
+        if ref != hyp:
+            print(f"  {os.path.basename(path)}:\n    float32: {ref}\n    int8:    {hyp}")
+
+if __name__ == '__main__':
+    main()
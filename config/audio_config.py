@@ -10,6 +10,53 @@ AUDIO_CONFIG = {
     'record_seconds': 3,            # Длительность записи
     'silence_threshold': 500,       # Порог тишины для VAD
     'noise_reduction': True,        # Включить шумоподавление
+    'denoise_mode': 'streaming',    # 'streaming' (по чанкам) или 'utterance' (по всей фразе)
+    'denoise_frame': 512,           # Длина кадра потокового шумоподавления (сэмплов)
+    'denoise_noise_smoothing': 0.98, # Сглаживание спектра шума между кадрами
+    'denoise_over_subtraction': 1.5, # Коэффициент вычитания спектра шума
+    'denoise_gain_floor': 0.1,      # Минимальное усиление бина
+    'noise_tracker_smoothing': 0.85, # Сглаживание спектра мощности в трекере шума
+    'noise_tracker_subwindow_frames': 12, # Кадров в подокне минимальной статистики
+    'noise_tracker_subwindows': 8,  # Подокон в окне поиска минимума (~1.5 сек)
+    'noise_tracker_bias': 1.5,      # Компенсация смещения минимума
     'sample_width': 2,              # 16-bit audio
+    'asr_rate': 16000,              # Частота канонического формата распознавания (моно float32)
+    'resampler_taps': 24,           # Длина фильтра ресемплера (отводов на фазу при меньшей частоте)
+    'beamforming': True,            # Delay-and-sum для двухканального микрофона
+    'beam_max_delay_ms': 1.0,       # Макс. межканальная задержка (мс)
+    'beam_block': 1024,             # Блок FFT для GCC-PHAT (сэмплов)
+    'beam_smoothing': 0.9,          # Сглаживание взаимного спектра между блоками
+    'beam_switch_margin': 1.2,      # Во сколько раз новый пик должен превзойти текущий
+    'beam_min_rms': 0.003,          # Блоки тише не обновляют оценку задержки
+    'probe_cache_path': 'data/config.json',  # Кэш рабочего режима микрофона
+    'capture_mode': 'callback',     # Режим захвата: 'callback' (кольцевой буфер) или 'blocking'
+    'ring_buffer_seconds': 30,      # Емкость кольцевого буфера захвата (сек)
+    'read_timeout': 0.5,            # Таймаут ожидания чанка в режиме callback (сек)
+    'ring_file_path': '/tmp/audio_stream.ring',  # Кольцевой файл внешнего захвата
+    'ring_file_seconds': 60,        # Емкость кольцевого файла (сек)
+    'vad_min_threshold': 150,       # Нижняя граница адаптивного порога VAD (int16)
+    'vad_noise_factor': 2.0,        # Порог VAD относительно уровня шума
+    'vad_frame_ms': 20,             # Длина кадра VAD (мс)
+    'vad_hangover_frames': 8,       # Кадров речи после последнего речевого кадра
+    'vad_max_flatness': 0.45,       # Макс. спектральная плоскостность речи (шум ближе к 1)
+    'vad_max_zcr': 0.35,            # Макс. доля переходов через ноль
+    'vad_min_band_ratio': 0.5,      # Мин. доля энергии в речевой полосе
+    'vad_speech_band': (300, 3400), # Речевая полоса (Hz)
+    'archive_enabled': True,        # Сохранять высказывания в архив
+    'archive_dir': 'data/audio_samples',  # Каталог архива высказываний
+    'archive_quota_mb': 500,        # Квота архива на диске (МБ)
+    'archive_evict_to': 0.9,        # При превышении квоты архив очищается до этой доли квоты
+    'archive_queue_size': 64,       # Очередь на запись (высказываний)
+    'archive_batch_size': 8,        # Высказываний в одной пачке записи
+    'archive_flush_interval': 2.0,  # Период проверки очереди (сек)
+    'batch_workers': None,          # Процессов пакетного распознавания (None - по числу ядер)
+    'batch_group_size': 8,          # Фраз в одном задании процесса (речевые акты - одним пакетом)
+    'batch_raw_rate': 16000,        # Частота RAW файлов (int16) в пакетном режиме
+    'batch_raw_channels': 1,        # Каналов в RAW файлах
+    'segmentation_mode': 'vad',     # Запуск распознавания: 'vad' (по концу фразы), 'streaming' (по ходу фразы) или 'timer'
+    'vad_pre_roll': 0.3,            # Аудио до начала речи, добавляемое к фразе (сек)
+    'vad_hangover': 0.5,            # Тишина, после которой фраза считается законченной (сек)
+    'min_utterance': 0.2,           # Минимальная длительность речи во фразе (сек)
+    'max_utterance': 15,            # Максимальная длительность фразы (сек)
 }
 
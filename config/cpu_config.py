@@ -0,0 +1,19 @@
+"""
+Распределение ядер процессора между стадиями конвейера
+"""
+
+CPU_CONFIG = {
+    'enabled': True,                # Закрепление стадий за ядрами (только Linux)
+    'report_interval': 60,          # Период вывода статистики по стадиям в лог (сек)
+
+    # Ядра и число потоков torch для каждой стадии (Raspberry Pi, 4 ядра)
+    'stages': {
+        'capture': {'cores': [0], 'torch_threads': None},     # callback PyAudio, VAD, шумоподавление
+        'asr': {'cores': [1, 2], 'torch_threads': 2},         # Whisper
+        # Классификатор и Natasha: два потока пула анализа на одном ядре. Natasha
+        # перекрывается с классификатором, но их вычисления делят ядро 3; второе
+        # ядро ускорило бы анализ ценой ядра ASR
+        'nlp': {'cores': [3], 'torch_threads': 1},
+        'output': {'cores': [0], 'torch_threads': None},      # дисплей, вибромотор
+    },
+}
@@ -5,17 +5,76 @@
 MODEL_CONFIG = {
     'whisper_model': 'tiny',        # Модель Whisper (tiny, base, small)
     'whisper_language': 'ru',       # Язык распознавания
+    'whisper_quantize': False,      # int8 динамическое квантование линейных слоев (только CPU)
+    'model_cache_dir': 'data/models',  # Кэш квантованных весов
+    'decoding_profile': 'latency',  # Профиль декодирования из DECODING_PROFILES
+    'asr_cache_size': 64,           # Результатов распознавания в LRU кэше по отпечатку аудио
+    'asr_worker': True,             # Распознавание фраз в отдельном процессе (режим 'vad')
+    'asr_worker_slots': 4,          # Слотов общей памяти под фразы в очереди
+    'asr_worker_restart_delay': 5.0,  # Минимальный интервал перезапуска упавшего процесса (сек)
+
+    # Потоковое распознавание
+    'stream_hop': 1.0,              # Повторное декодирование каждые N сек нового аудио
+    'stream_window': 10.0,          # Максимальная длина окна декодирования (сек)
+    'stream_prompt_words': 20,      # Зафиксированных слов в подсказке для следующего окна
     
     'bert_model': 'cointegrated/rubert-tiny2',  # Модель для классификации
+    'speech_act_backend': 'auto',   # 'auto' - ONNX Runtime при наличии экспорта, 'onnx', 'torch'
     'natasha_model': 'news',        # Модель для извлечения сущностей
+    'speech_act_batch_size': 16,    # Максимум текстов в одном проходе классификатора
+    'speech_act_batch_wait': 0.005, # Ожидание попутных запросов при нагрузке (сек)
+    'speech_act_batching': False,   # Живой анализ через общий пакетировщик (только при нескольких источниках)
     
     'critical_threshold': 0.7,      # Порог критичности
+    
+    # Каскад оценки критичности: модели вызываются, только если могут изменить результат
+    'cascade_enabled': True,
+    'cascade_exit': 'band',         # 'level' - выход при однозначном уровне, 'band' - при однозначной градации
+    # Заведомо некритичные служебные фразы: уровень 'информация' без моделей
+    'cascade_trivial_phrases': ('проверка связи', 'как слышно', 'слышу', 'слышу хорошо', 'слышу тебя',
+                                'понял', 'понятно', 'принято', 'спасибо', 'хорошо'),
+    'nlp_parallel': True,           # Классификатор и Natasha в параллельных потоках
+    'nlp_deadline': 2.0,            # Максимальное ожидание моделей на сообщение (сек)
+    'analysis_cache_size': 256,     # Результатов анализа в LRU кэше по нормализованному тексту (0 - без кэша)
     'max_text_length': 512,         # Максимальная длина текста
 }
 
+# Профили декодирования Whisper
+DECODING_PROFILES = {
+    # Минимальная задержка на CPU: жадный поиск без повторов, отсечение шума до декодирования
+    'latency': {
+        'beam_size': None,                  # None - жадный поиск
+        'temperatures': (0.0,),             # Температуры повторов при неудачном декодировании
+        'condition_on_previous_text': False,
+        'max_tokens': 96,                   # Максимум токенов текста на фрагмент
+        'no_speech_threshold': 0.6,         # Вероятность "нет речи", выше которой фрагмент пропускается
+        'logprob_threshold': -1.0,          # Ниже - декодирование считается неудачным
+        'compression_ratio_threshold': 2.4, # Выше - зацикленный текст, декодирование неудачное
+        'early_exit': True                  # Проверка "нет речи" до декодирования текста
+    },
+    # Настройки библиотеки по умолчанию: точнее, но медленнее
+    'accuracy': {
+        'beam_size': 5,
+        'temperatures': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        'condition_on_previous_text': True,
+        'max_tokens': 224,
+        'no_speech_threshold': 0.6,
+        'logprob_threshold': -1.0,
+        'compression_ratio_threshold': 2.4,
+        'early_exit': False
+    }
+}
+
 # Маркеры
 CRITICAL_MARKERS = {
     'emergency_terms': ['пожар', 'взрыв', 'авария', 'утечка', 'обрушение', 'эвакуация'],
     'urgency_terms': ['срочно', 'немедленно', 'быстро', 'опасно', 'осторожно'],
     'safety_denials': ['не работает', 'отказал', 'нет связи', 'аварийная'],
+}
+
+# Промышленный словарь (оборудование, зоны, опасности); словоформы добавляются автоматически
+INDUSTRIAL_VOCABULARY = {
+    'оборудование': ['станок', 'реактор', 'насос', 'компрессор', 'трансформатор'],
+    'зоны': ['цех', 'склад', 'участок', 'зона', 'помещение'],
+    'опасности': ['пожар', 'взрыв', 'утечка', 'задымление', 'обрушение']
 }
\ No newline at end of file
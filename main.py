@@ -7,10 +7,14 @@ from datetime import datetime
 
 # Импорт модулей
 from audio import AudioCapture
-from speech_recognition import SpeechToText
+from audio.ring_file import RingFileReader
+from audio.utterance_archive import UtteranceArchive
+from speech_recognition import SpeechToText, ASRWorker
 from nlp import PriorityCalculator
 from output import TactileEngine, DisplayEngine
-from utils import setup_logger, ensure_dir, CRITICAL_LEVELS
+from utils import setup_logger, ensure_dir, CRITICAL_LEVELS, StartupOrchestrator, get_cpu_budget
+from config.audio_config import AUDIO_CONFIG
+from config.model_config import MODEL_CONFIG
 
 class NosiomyKomplex:
     def __init__(self):
@@ -18,6 +22,10 @@ class NosiomyKomplex:
         self.logger = setup_logger('main')
         self.is_running = False
         self.message_count = 0
+        self.ring_reader = None
+        self.status_refresh_at = None
+        self.pending_status = None
+        self.cpu_budget = get_cpu_budget()
         
         # Создание необходимых директорий
         ensure_dir('logs')
@@ -25,12 +33,38 @@ class NosiomyKomplex:
         
         self.logger.info("Инициализация носимого комплекса...")
         
-        # Инициализация компонентов
+        # Инициализация компонентов (тяжелые модели загружаются в фоне)
+        self.display_engine = DisplayEngine()
         self.audio_capture = AudioCapture()
-        self.speech_recognizer = SpeechToText()
-        self.priority_calculator = PriorityCalculator()
+        audio_params = self.audio_capture.get_audio_params()
+        self.speech_recognizer = SpeechToText(audio_params['rate'], audio_params['channels'], autoload=False)
+        self.priority_calculator = PriorityCalculator(autoload=False)
         self.tactile_engine = TactileEngine()
-        self.display_engine = DisplayEngine()
+        
+        # Параллельная загрузка и прогрев моделей
+        whisper_engine = self.speech_recognizer.whisper_engine
+        speech_act_classifier = self.priority_calculator.speech_act_classifier
+        entity_extractor = self.priority_calculator.entity_extractor
+        self.startup = StartupOrchestrator()
+        
+        # В режиме 'vad' фразы распознаются в отдельном процессе со своей моделью
+        self.asr_worker = None
+        self.pending_utterances = {}
+        if MODEL_CONFIG['asr_worker'] and AUDIO_CONFIG.get('segmentation_mode') == 'vad':
+            self.asr_worker = ASRWorker(self.speech_recognizer.asr_rate)
+        else:
+            self.startup.register('whisper', whisper_engine.load_model, whisper_engine.warm_up,
+                                  lambda: whisper_engine.model is not None and whisper_engine.tokenizer is not None)
+        self.startup.register('speech_act', speech_act_classifier.load_model, speech_act_classifier.warm_up,
+                              lambda: speech_act_classifier.backend is not None)
+        self.startup.register('natasha', entity_extractor.load_model, entity_extractor.warm_up,
+                              lambda: entity_extractor.is_loaded)
+        self.startup_reported = False
+        
+        # Архив высказываний пишется в фоновом потоке
+        self.archive = None
+        if AUDIO_CONFIG['archive_enabled']:
+            self.archive = UtteranceArchive(sample_rate=self.speech_recognizer.asr_rate)
         
         # Настройка обработчиков сигналов
         signal.signal(signal.SIGINT, self.signal_handler)
@@ -43,63 +77,66 @@ class NosiomyKomplex:
         self.logger.info(f"Получен сигнал {signum}, завершение работы...")
         self.stop()
     
+    def open_ring_file(self):
+        """Однократное отображение кольцевого аудиофайла в память"""
+        if self.ring_reader is not None:
+            return self.ring_reader
+        
+        file_path = AUDIO_CONFIG['ring_file_path']
+        if not os.path.exists(file_path):
+            print(f"ОШИБКА: Файл {file_path} не существует")
+            return None
+        
+        try:
+            self.ring_reader = RingFileReader(file_path)
+            print(f"ФАЙЛ: {file_path} ({self.ring_reader.capacity} сэмплов, {self.ring_reader.sample_rate} Hz)")
+        except Exception as e:
+            print(f"ОШИБКА открытия кольцевого файла: {e}")
+            self.ring_reader = None
+        
+        return self.ring_reader
+    
     def read_audio_from_file(self, duration=3):
-        """Чтение аудио из файла /tmp/audio_stream.raw"""
+        """Чтение последних duration секунд из кольцевого файла
+        
+        Многоканальная запись возвращается как [сэмплы, каналы].
+        """
+        sample_rate = 16000
+        
         try:
-            file_path = "/tmp/audio_stream.raw"
-            sample_rate = 16000
-            bytes_per_sample = 2  # 16-bit = 2 байта
-            
-            # Вычисляем сколько нужно прочитать
-            bytes_needed = int(sample_rate * duration * bytes_per_sample)
-            
-            # Проверяем существует ли файл
-            if not os.path.exists(file_path):
-                print(f"ОШИБКА: Файл {file_path} не существует")
+            reader = self.open_ring_file()
+            if reader is None:
                 return np.zeros(sample_rate * duration, dtype=np.int16)
             
-            file_size = os.path.getsize(file_path)
-            print(f"ФАЙЛ: {file_path} ({file_size} байт)")
+            sample_rate = reader.sample_rate
+            target_samples = int(sample_rate * duration) * reader.channels
             
-            with open(file_path, 'rb') as f:
-                # Если файл меньше нужного размера, читаем с начала
-                if file_size < bytes_needed:
-                    print(f"ВНИМАНИЕ: Файл мал: {file_size}/{bytes_needed} байт")
-                    f.seek(0)
-                else:
-                    # Читаем с конца файла
-                    f.seek(-bytes_needed, 2)
-                
-                data = f.read(bytes_needed)
-            
-            if len(data) == 0:
-                print("ОШИБКА: Файл аудио пустой")
-                return np.zeros(sample_rate * duration, dtype=np.int16)
+            # View на данные в отображенном файле, без копирования
+            audio = reader.get_latest(target_samples)
             
-            print(f"УСПЕХ: Прочитано {len(data)} байт из файла")
+            if len(audio) == 0:
+                print("ОШИБКА: Кольцевой файл пока пустой")
+                return np.zeros(target_samples, dtype=np.int16)
             
-            # Конвертируем байты в аудио
-            audio = np.frombuffer(data, dtype=np.int16)
-            
-            # Обрезаем или дополняем до нужной длины
-            target_samples = sample_rate * duration
-            if len(audio) > target_samples:
-                audio = audio[:target_samples]
-            elif len(audio) < target_samples:
-                audio = np.pad(audio, (0, target_samples - len(audio)), mode='constant')
+            # Дополняем до нужной длины, если писатель еще не накопил окно
+            if len(audio) < target_samples:
+                print(f"ВНИМАНИЕ: В файле мало данных: {len(audio)}/{target_samples} сэмплов")
+                audio = np.pad(audio, (target_samples - len(audio), 0), mode='constant')
             
             # Проверяем уровень сигнала
-            if len(audio) > 0:
-                level = np.sqrt(np.mean(audio.astype(float)**2))
-                print(f"ЗВУК: Загружено {len(audio)} сэмплов (уровень: {level:.0f})")
+            level = np.sqrt(np.mean(audio.astype(float)**2))
+            print(f"ЗВУК: Загружено {len(audio)} сэмплов (уровень: {level:.0f})")
             
+            # Чередующиеся каналы -> [сэмплы, каналы], как у AudioCapture
+            if reader.channels > 1:
+                return audio.reshape(-1, reader.channels)
             return audio
             
         except Exception as e:
             print(f"ОШИБКА чтения аудиофайла: {e}")
             import traceback
             traceback.print_exc()
-            return np.zeros(16000 * duration, dtype=np.int16)
+            return np.zeros(sample_rate * duration, dtype=np.int16)
     
     def analyze_audio_level(self, audio_chunk):
         """Анализ уровня аудио для детектирования речи"""
@@ -115,7 +152,91 @@ class NosiomyKomplex:
             return 0
     
     
+    def handle_recognized_text(self, text, status):
+        """Семантический анализ и вывод распознанного сообщения"""
+        self.message_count += 1
+        print(f"\nУСПЕХ: РАСПОЗНАНО #{self.message_count}:")
+        print(f"   '{text}'")
+        
+        # 6. Семантический анализ
+        with self.cpu_budget.stage('nlp'):
+            critical_level = self.priority_calculator.calculate_critical_level(text)
+        
+        # 7. Мультимодальный вывод
+        with self.cpu_budget.stage('output'):
+            self.tactile_engine.vibrate(critical_level)
+            self.display_engine.show_text(text, critical_level)
+        
+        # Обновление статуса с ВЫВОДОМ СООБЩЕНИЯ
+        status["Сообщений"] = str(self.message_count)
+        status["Режим"] = f"Обработка (ур. {critical_level})"
+        status["Последнее сообщение"] = text[:30] + "..." if len(text) > 30 else text
+        
+        # Пауза для восприятия: статус выводится позже, цикл захвата не ждет
+        self.pending_status = status
+        self.status_refresh_at = time.time() + 2
+        
+        return critical_level
+    
+    def refresh_display(self):
+        """Вывод статуса после паузы для восприятия сообщения"""
+        if self.status_refresh_at is not None and time.time() >= self.status_refresh_at:
+            self.status_refresh_at = None
+            self.display_engine.show_system_status(self.pending_status)
+    
+    def poll_asr_worker(self, status):
+        """Обработка фраз, распознанных в отдельном процессе"""
+        if self.asr_worker is None:
+            return
+        
+        for result in self.asr_worker.poll():
+            utterance = self.pending_utterances.pop(result['request_id'], None)
+            text = result['text']
+            critical_level = None
+            if text and len(text.strip()) > 3:
+                critical_level = self.handle_recognized_text(text, status)
+            if self.archive is not None and utterance is not None:
+                self.archive.submit(utterance, text, critical_level)
+        
+        # Отмененные запросы и запросы упавшего процесса
+        for request_id in list(self.pending_utterances):
+            if request_id not in self.asr_worker.in_flight:
+                del self.pending_utterances[request_id]
                 
+    def log_startup_report(self):
+        """Однократный вывод времени загрузки моделей после ее завершения"""
+        if not self.startup_reported and self.startup.all_done():
+            self.startup_reported = True
+            self.logger.info("Загрузка моделей завершена:")
+            self.startup.log_report()
+    
+    def capture_stream(self):
+        """Поток чанков микрофона, пока система работает"""
+        while self.is_running:
+            self.log_startup_report()
+            self.refresh_display()
+            self.cpu_budget.maybe_log_report()
+            audio_chunk = self.audio_capture.record_chunk()
+            if audio_chunk is not None:
+                yield audio_chunk
+            elif self.audio_capture.ring_buffer is None:
+                time.sleep(0.05)
+    
+    def run_streaming(self, status):
+        """Потоковое распознавание: текст выводится, пока фраза произносится"""
+        for result in self.speech_recognizer.real_time_transcription(self.capture_stream()):
+            if result['type'] == 'partial':
+                # Уровень критичности считается по итоговому тексту фразы
+                self.display_engine.show_text(result['text'])
+                continue
+            
+            text = result['text']
+            critical_level = None
+            if text and len(text.strip()) > 3:
+                critical_level = self.handle_recognized_text(text, status)
+            if self.archive is not None:
+                self.archive.submit(result['audio'], text, critical_level)
+    
     def run(self):
         if self.is_running:
             self.logger.warning("ПРЕДУПРЕЖДЕНИЕ: Система уже запущена")
@@ -123,12 +244,26 @@ class NosiomyKomplex:
         
         self.is_running = True
         self.logger.info("Запуск основного цикла...")
+        # Захват начинается сразу, пока модели загружаются
+        self.startup.start()
+        if self.asr_worker is not None:
+            self.asr_worker.start()
+        
+        # Основной поток ведет захват и DSP; torch в этом процессе нужен NLP
+        # (и Whisper, если распознавание не вынесено в отдельный процесс)
+        self.cpu_budget.pin_thread('capture')
+        self.cpu_budget.set_torch_threads('nlp' if self.asr_worker is not None else 'asr')
+        if self.archive is not None:
+            self.archive.start()
         
         # Инициализация статуса системы
         status = {
             "Статус": "Активен",
             "Сообщений": "0",
-            "Режим": "Анализ аудиопотока",
+            "Режим": {
+                'vad': "Анализ по фразам (VAD)",
+                'streaming': "Потоковое распознавание"
+            }.get(AUDIO_CONFIG.get('segmentation_mode'), "Анализ аудиопотока"),
             "Последнее сообщение": "Нет"
         }
         self.display_engine.show_system_status(status)
@@ -136,9 +271,18 @@ class NosiomyKomplex:
         # Настройки детектирования речи
         speech_threshold = 200
         last_recognition = time.time()
+        segmentation_mode = AUDIO_CONFIG.get('segmentation_mode', 'timer')
         
         try:
+            if segmentation_mode == 'streaming':
+                self.run_streaming(status)
+            
             while self.is_running:
+                self.log_startup_report()
+                self.refresh_display()
+                self.poll_asr_worker(status)
+                self.cpu_budget.maybe_log_report()
+                
                 # 1. Чтение аудиочанка
                 audio_chunk = self.audio_capture.record_chunk()
                 
@@ -153,6 +297,25 @@ class NosiomyKomplex:
                         print(f"УРОВЕНЬ [{bar_display:20}] {audio_level:5.0f}", end='\r')
                     
                     # 3. Детектирование речи
+                    if segmentation_mode == 'vad':
+                        # Распознавание запускается сразу по концу фразы
+                        with self.cpu_budget.stage('capture'):
+                            utterance = self.speech_recognizer.segment_audio_chunk(audio_chunk)
+                        if utterance is not None and self.asr_worker is not None:
+                            clean_audio = self.speech_recognizer.clean_utterance(utterance)
+                            request_id = self.asr_worker.submit(clean_audio)
+                            if request_id is not None:
+                                self.pending_utterances[request_id] = utterance
+                        elif utterance is not None:
+                            with self.cpu_budget.stage('asr'):
+                                text = self.speech_recognizer.transcribe(utterance)
+                            critical_level = None
+                            if text and len(text.strip()) > 3:
+                                critical_level = self.handle_recognized_text(text, status)
+                            if self.archive is not None:
+                                self.archive.submit(utterance, text, critical_level)
+                        continue
+                    
                     current_time = time.time()
                     
                     # Автоматический анализ каждые 30 секунд
@@ -166,13 +329,14 @@ class NosiomyKomplex:
                         
                         # 5. Распознавание речи через Whisper
                         print("ИИ: Запуск распознавания...")
-                        audio_params = self.audio_capture.get_audio_params()
+                        file_rate = self.ring_reader.sample_rate if self.ring_reader else 16000
                         
                         try:
-                            text = self.speech_recognizer.whisper_engine.transcribe_audio(
-                                audio_for_analysis, 
-                                sample_rate=audio_params['rate']
-                            )
+                            with self.cpu_budget.stage('asr'):
+                                text = self.speech_recognizer.whisper_engine.transcribe_audio(
+                                    audio_for_analysis, 
+                                    sample_rate=file_rate
+                                )
                         except Exception as e:
                             print(f"ОШИБКА Whisper: {e}")
                             # Демо-режим если Whisper не работает
@@ -187,33 +351,20 @@ class NosiomyKomplex:
                             text = random.choice(demo_commands)
                             print(f"ДЕМО РЕЖИМ: Распознано '{text}'")
                         
-                        if text and len(text.strip()) > 3:
-                            self.message_count += 1
-                            print(f"\nУСПЕХ: РАСПОЗНАНО #{self.message_count}:")
-                            print(f"   '{text}'")
-                            
-                            # 6. Семантический анализ
-                            critical_level = self.priority_calculator.calculate_critical_level(text)
-                            
-                            # 7. Мультимодальный вывод
-                            self.tactile_engine.vibrate(critical_level)
-                            self.display_engine.show_text(text, critical_level)
-                            
-                            # Обновление статуса с ВЫВОДОМ СООБЩЕНИЯ
-                            status["Сообщений"] = str(self.message_count)
-                            status["Режим"] = f"Обработка (ур. {critical_level})"
-                            status["Последнее сообщение"] = text[:30] + "..." if len(text) > 30 else text
-                            self.display_engine.show_system_status(status)
-                            
-                            # Пауза для восприятия
-                            time.sleep(2)
+                        if self.speech_recognizer.whisper_engine.last_from_cache:
+                            # То же окно, что и в прошлый раз (писатель файла остановился)
+                            print("ПОВТОР: Окно уже обработано, анализ пропущен")
+                        elif text and len(text.strip()) > 3:
+                            self.handle_recognized_text(text, status)
                         
                         # Также проверяем если уровень звука высокий
                         elif audio_level > speech_threshold:
                             print(f"\nОБНАРУЖЕН ЗВУК! Уровень: {audio_level:.0f}")
                 
                 # Небольшая пауза для снижения нагрузки
-                time.sleep(0.05)
+                # (в режиме callback record_chunk сам ждет новые данные)
+                if self.audio_capture.ring_buffer is None:
+                    time.sleep(0.05)
                 
         except KeyboardInterrupt:
             self.logger.info("Прерывание пользователем")
@@ -266,8 +417,29 @@ class NosiomyKomplex:
         # Очистка ресурсов
         self.tactile_engine.cleanup()
         self.display_engine.cleanup()
+        capture_stats = self.audio_capture.get_capture_stats()
+        if capture_stats.get('mode') == 'callback':
+            self.logger.info(f"Захват аудио: переполнений буфера {capture_stats['overruns']}, "
+                             f"потеряно сэмплов {capture_stats['lost_samples']}, "
+                             f"переполнений драйвера {capture_stats['input_overflows']}")
         self.audio_capture.cleanup()
+        if self.ring_reader is not None:
+            self.ring_reader.close()
+        if self.asr_worker is not None:
+            self.asr_worker.stop()
+            self.logger.info(f"Процесс распознавания: {self.asr_worker.get_stats()}")
+        else:
+            self.logger.info(f"Распознавание: {self.speech_recognizer.whisper_engine.stats}")
+        if self.archive is not None:
+            self.archive.stop()
+            self.logger.info(f"Архив высказываний: {self.archive.get_stats()}")
         
+        self.logger.info(f"Каскад оценки критичности: {self.priority_calculator.get_cascade_stats()}")
+        self.logger.info(f"Параллельный анализ: {self.priority_calculator.get_overlap_stats()}")
+        self.logger.info(f"Кэш анализа: {self.priority_calculator.get_cache_stats()}")
+        self.priority_calculator.close()
+        self.logger.info("Нагрузка по стадиям:")
+        self.cpu_budget.log_report()
         self.logger.info(f"Итоги работы: обработано {self.message_count} сообщений")
         self.logger.info(" Носимый комплекс завершил работу")
 
@@ -277,6 +449,12 @@ def main():
     print("   НОСИМЫЙ КОМПЛЕКС С ИИ ДЛЯ СЛАБОСЛЫШАЩИХ")
     print("=" * 50)
     
+    # Пакетный режим не требует микрофона и дисплея
+    if len(sys.argv) > 2 and sys.argv[1] == '--batch':
+        from batch_transcriber import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+    
     app = NosiomyKomplex()
     
     # Проверка аргументов командной строки
@@ -288,6 +466,8 @@ def main():
             print("Использование:")
             print("  python main.py          - запуск системы")
             print("  python main.py --test   - тестирование компонентов")
+            print("  python main.py --batch <каталог> [результат.jsonl] [--workers N]")
+            print("                          - пакетное распознавание записей")
             print("  python main.py --help   - справка")
             return
     
@@ -298,5 +478,5 @@ def main():
         print(f"Критическая ошибка: {e}")
         sys.exit(1)
 
-if name == "__main__":
+if __name__ == "__main__":
     main()
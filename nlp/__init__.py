@@ -4,12 +4,19 @@
 
 from .entity_extractor import EntityExtractor
 from .speech_act_classifier import SpeechActClassifier
+from .dynamic_batcher import DynamicBatcher
 from .critical_markers import CriticalMarkersDetector
+from .keyword_automaton import KeywordAutomaton, get_keyword_automaton
+from .analysis_result import AnalysisResult
 from .priority_calculator import PriorityCalculator
 
 __all__ = [
     'EntityExtractor',
     'SpeechActClassifier',
+    'DynamicBatcher',
     'CriticalMarkersDetector', 
+    'KeywordAutomaton',
+    'get_keyword_automaton',
+    'AnalysisResult',
     'PriorityCalculator'
 ]
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Результат семантического анализа сообщения
+"""
+
+import copy
+
+class AnalysisResult:
+    """Результат одного прохода анализа: компоненты, баллы и итоговый уровень
+
+    Поля компонентов, не понадобившихся каскаду, остаются None
+    (например, speech_act при уровне, решенном по маркерам).
+    """
+
+    __slots__ = ('text', 'speech_act', 'markers', 'entities', 'marker_score',
+                 'base_level', 'entity_bonus', 'critical_level', 'exact_level', 'tier', 'elapsed')
+
+    def __init__(self, text, critical_level=1):
+        self.text = text
+        self.speech_act = None      # {'act', 'confidence', ...}
+        self.markers = None         # Маркеры по категориям
+        self.entities = None        # Сущности Natasha и промышленные
+        self.marker_score = 0
+        self.base_level = None      # Вес речевого акта
+        self.entity_bonus = None
+        self.critical_level = critical_level
+        self.exact_level = None     # Уровень по всем компонентам (детальный анализ)
+        self.tier = None            # Ступень каскада, на которой решен уровень
+        self.elapsed = 0.0          # Время анализа (сек)
+
+    def copy(self, text=None):
+        """Копия результата (например, из кэша): компоненты копируются глубоко,
+        чтобы правка копии не меняла закэшированный результат"""
+        result = AnalysisResult.__new__(AnalysisResult)
+        for name in self.__slots__:
+            setattr(result, name, copy.deepcopy(getattr(self, name)))
+        if text is not None:
+            result.text = text
+        return result
+
+    def to_dict(self):
+        """Представление в виде словаря (для логов и детального анализа)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"AnalysisResult(level={self.critical_level}, tier={self.tier}, text={self.text!r})"
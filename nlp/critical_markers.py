@@ -4,24 +4,38 @@
 
 import re
 from config.model_config import CRITICAL_MARKERS
+from .keyword_automaton import get_keyword_automaton
 
 class CriticalMarkersDetector:
-    def __init__(self):
+    def __init__(self, automaton=None):
         self.markers = CRITICAL_MARKERS
+        self.automaton = automaton or get_keyword_automaton()
+        self.version = 0
         self.setup_patterns()
     
     def setup_patterns(self):
-        """Компиляция regex паттернов"""
+        """Компиляция regex паттернов (словарные маркеры ищет автомат)"""
         self.patterns = {
-            'emergency': re.compile(r'\b(?:' + '|'.join(self.markers['emergency_terms']) + r')\b', re.IGNORECASE),
-            'urgency': re.compile(r'\b(?:' + '|'.join(self.markers['urgency_terms']) + r')\b', re.IGNORECASE),
-            'safety_denial': re.compile(r'\b(?:' + '|'.join(self.markers['safety_denials']) + r')\b', re.IGNORECASE),
-            'numbers': re.compile(r'\b(\d+)\s*(°C|атм|бар|МПа|%)', re.IGNORECASE),
-            'equipment': re.compile(r'\b(?:станок|реактор|насос|компрессор|трансформатор)\b', re.IGNORECASE)
+            'numbers': re.compile(r'\b(\d+)\s*(°C|атм|бар|МПа|%)', re.IGNORECASE)
         }
+        self.version += 1
     
-    def detect_markers(self, text):
-        """Обнаружение критических маркеров"""
+    def get_version(self):
+        """Версия настроек детектора (паттерны и словарь автомата) для кэшей"""
+        if not self.automaton.is_built:
+            self.automaton.build()
+        return (self.version, id(self.automaton), self.automaton.version)
+    
+    def find_keywords(self, text):
+        """Все словарные совпадения с позициями за один проход"""
+        return self.automaton.search(text)
+    
+    def detect_markers(self, text, keyword_matches=None):
+        """Обнаружение критических маркеров
+        
+        keyword_matches - уже найденные совпадения автомата для этого текста
+        (например, общие с извлечением сущностей).
+        """
         markers_found = {
             'emergency_terms': [],
             'urgency_terms': [],
@@ -31,25 +45,18 @@ class CriticalMarkersDetector:
         }
         
         try:
-            # Поиск аварийных терминов
-            emergency_matches = self.patterns['emergency'].findall(text)
-            markers_found['emergency_terms'] = emergency_matches
+            if keyword_matches is None:
+                keyword_matches = self.find_keywords(text)
             
-            # Поиск маркеров срочности
-            urgency_matches = self.patterns['urgency'].findall(text)
-            markers_found['urgency_terms'] = urgency_matches
-            
-            # Поиск отрицаний безопасности
-            safety_matches = self.patterns['safety_denial'].findall(text)
-            markers_found['safety_denials'] = safety_matches
+            # Аварийные термины, срочность, отрицания безопасности, оборудование
+            for start, end, group, category, phrase, matched in keyword_matches:
+                if group == 'marker':
+                    markers_found[category].append(matched)
+                elif category == 'оборудование':
+                    markers_found['equipment_mentioned'].append(matched)
             
             # Поиск числовых значений
-            number_matches = self.patterns['numbers'].findall(text)
-            markers_found['numeric_values'] = number_matches
-            
-            # Поиск упоминаний оборудования
-            equipment_matches = self.patterns['equipment'].findall(text)
-            markers_found['equipment_mentioned'] = equipment_matches
+            markers_found['numeric_values'] = self.patterns['numbers'].findall(text)
             
             return markers_found
             
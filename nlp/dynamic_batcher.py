@@ -0,0 +1,115 @@
+"""
+Динамическое пакетирование запросов к модели от нескольких источников
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from utils.logger import setup_logger
+
+class DynamicBatcher:
+    """Сбор запросов в пакеты для одного прохода модели
+
+    batch_fn(items) -> results обрабатывает список целиком. Если в очереди
+    только один запрос, он выполняется сразу (живая фраза не ждет). Когда
+    запросы поступают одновременно (несколько потоков, пакетная обработка),
+    пакет набирается до max_batch_size или max_wait от первого запроса.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait=0.02, name='batcher'):
+        self.logger = setup_logger(name)
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.is_running = True
+
+        # Статистика
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        """Запрос в очередь; результат - через Future"""
+        future = Future()
+        if not self.is_running:
+            future.set_exception(RuntimeError("Пакетировщик остановлен"))
+            return future
+        self.requests.put((item, future))
+        return future
+
+    def _collect(self, first):
+        """Пакет из первого запроса и попутных"""
+        batch = [first]
+        # Без конкурирующих запросов пакет из одного элемента выполняется сразу
+        while len(batch) < self.max_batch_size:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)
+                return batch
+            batch.append(request)
+
+        if len(batch) == 1:
+            return batch
+
+        # Есть нагрузка: дождаться еще запросов до срока
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self.requests.get()
+            if first is None:
+                break
+
+            batch = [request for request in self._collect(first) if request[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                self.logger.error(f"Ошибка обработки пакета: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen = max(self.max_seen, len(batch))
+
+    def get_stats(self):
+        """Число пакетов, запросов и средний размер пакета"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch': self.items / self.batches if self.batches else 0.0,
+            'max_batch': self.max_seen
+        }
+
+    def stop(self, timeout=2.0):
+        """Остановка после обработки уже поставленных запросов"""
+        self.is_running = False
+        self.requests.put(None)
+        self.thread.join(timeout=timeout)
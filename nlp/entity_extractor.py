@@ -11,25 +11,53 @@ from natasha import (
     NewsNERTagger,
     Doc
 )
+from .keyword_automaton import get_keyword_automaton
 
 class EntityExtractor:
-    def __init__(self):
-        self.segmenter = Segmenter()
-        self.morph_vocab = MorphVocab()
-        self.emb = NewsEmbedding()
-        self.morph_tagger = NewsMorphTagger(self.emb)
-        self.syntax_parser = NewsSyntaxParser(self.emb)
-        self.ner_tagger = NewsNERTagger(self.emb)
+    def __init__(self, autoload=True, automaton=None):
+        self.is_loaded = False
+        # Доменно-специфичные сущности ищет общий с детектором маркеров автомат
+        self.automaton = automaton or get_keyword_automaton()
+        if autoload:
+            self.load_model()
+    
+    def load_model(self):
+        """Загрузка эмбеддингов и теггеров Natasha"""
+        try:
+            print("Загрузка моделей Natasha...")
+            self.segmenter = Segmenter()
+            self.morph_vocab = MorphVocab()
+            self.emb = NewsEmbedding()
+            self.morph_tagger = NewsMorphTagger(self.emb)
+            self.syntax_parser = NewsSyntaxParser(self.emb)
+            self.ner_tagger = NewsNERTagger(self.emb)
+            self.is_loaded = True
+            print("Модели Natasha загружены")
+        except Exception as e:
+            print(f"Ошибка загрузки моделей Natasha: {e}")
+    
+    def warm_up(self):
+        """Пробное извлечение сущностей для прогрева теггеров"""
+        if self.is_loaded:
+            self.extract_entities("Утечка в цехе номер три, мастер Иванов")
+    
+    def extract_entities(self, text, keyword_matches=None):
+        """Извлечение сущностей из текста
         
-        # Доменно-специфичные сущности
-        self.industrial_entities = {
-            'оборудование': ['станок', 'реактор', 'насос', 'компрессор', 'трансформатор'],
-            'зоны': ['цех', 'склад', 'участок', 'зона', 'помещение'],
-            'опасности': ['пожар', 'взрыв', 'утечка', 'задымление', 'обрушение']
-        }
+        keyword_matches - уже найденные совпадения словарного автомата.
+        """
+        return self.extract_entities_checked(text, keyword_matches)[0]
     
-    def extract_entities(self, text):
-        """Извлечение сущностей из текста"""
+    def extract_entities_checked(self, text, keyword_matches=None):
+        """Извлечение сущностей -> (сущности, полный ли результат)
+        
+        Результат неполный, если Natasha еще не загружена или завершилась
+        с ошибкой; такой результат нельзя кэшировать.
+        """
+        if not self.is_loaded:
+            # Пока Natasha загружается, доступны только доменные сущности
+            return self._extract_industrial_entities(text, keyword_matches), False
+        
         try:
             doc = Doc(text)
             doc.segment(self.segmenter)
@@ -49,28 +77,30 @@ class EntityExtractor:
                 })
             
             # Доменно-специфичные сущности
-            industrial_entities = self._extract_industrial_entities(text)
+            industrial_entities = self._extract_industrial_entities(text, keyword_matches)
             entities.extend(industrial_entities)
             
-            return entities
+            return entities, True
             
         except Exception as e:
             print(f"Ошибка извлечения сущностей: {e}")
-            return []
+            return [], False
     
-    def _extract_industrial_entities(self, text):
-        """Извлечение промышленных сущностей"""
-        entities = []
-        text_lower = text.lower()
+    def _extract_industrial_entities(self, text, keyword_matches=None):
+        """Извлечение промышленных сущностей (все вхождения, любые словоформы)"""
+        if keyword_matches is None:
+            keyword_matches = self.automaton.search(text)
         
-        for entity_type, keywords in self.industrial_entities.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    entities.append({
-                        'text': keyword,
-                        'type': f'INDUSTRIAL_{entity_type.upper()}',
-                        'start': text_lower.find(keyword),
-                        'stop': text_lower.find(keyword) + len(keyword)
-                    })
+        entities = []
+        for start, end, group, category, phrase, matched in keyword_matches:
+            if group != 'industrial':
+                continue
+            entities.append({
+                'text': matched,
+                'type': f'INDUSTRIAL_{category.upper()}',
+                'start': start,
+                'stop': end,
+                'normalized': phrase
+            })
         
         return entities
\ No newline at end of file
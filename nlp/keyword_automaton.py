@@ -0,0 +1,170 @@
+"""
+Поиск словаря ключевых фраз за один проход (автомат Ахо-Корасик)
+"""
+
+from collections import deque
+from itertools import product
+from config.model_config import CRITICAL_MARKERS, INDUSTRIAL_VOCABULARY
+
+try:
+    import pymorphy3 as pymorphy
+except ImportError:
+    try:
+        import pymorphy2 as pymorphy
+    except ImportError:
+        pymorphy = None
+
+# Категории маркеров, ищущиеся по словарю (числовые значения ищет regex)
+MARKER_CATEGORIES = ('emergency_terms', 'urgency_terms', 'safety_denials')
+
+def normalize_text(text):
+    """Нижний регистр и ё -> е; длина строки сохраняется"""
+    return text.lower().replace('ё', 'е')
+
+class KeywordAutomaton:
+    """Автомат Ахо-Корасик по словарю фраз с категориями
+
+    Все фразы словаря ищутся за один линейный проход по тексту: время
+    поиска зависит от длины текста и числа совпадений, но не от размера
+    словаря. Совпадение засчитывается только на границах слов, как \\b в regex.
+    Словоформы добавляются при построении (pymorphy), поэтому поиск
+    по формам не требует морфологического анализа текста.
+    """
+
+    MAX_PHRASE_FORMS = 200  # Ограничение комбинаций форм для фраз из нескольких слов
+
+    def __init__(self, inflect=True):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]      # узел -> [(длина фразы, индекс данных)]
+        self.payloads = []      # (группа, категория, каноническая фраза)
+        self._payload_index = {}
+        self.morph = pymorphy.MorphAnalyzer() if inflect and pymorphy is not None else None
+        self._forms_cache = {}
+        self.is_built = False
+        self.version = 0        # Номер построения: меняется при каждом изменении словаря
+
+    def word_forms(self, word):
+        """Все словоформы слова (само слово, если морфология недоступна)"""
+        word = normalize_text(word)
+        if self.morph is None or not word.isalpha():
+            return {word}
+        forms = self._forms_cache.get(word)
+        if forms is None:
+            forms = {word}
+            parses = self.morph.parse(word)
+            best = parses[0].score if parses else 0
+            for parse in parses:
+                if parse.score >= best / 2:
+                    forms.update(normalize_text(form.word) for form in parse.lexeme)
+            self._forms_cache[word] = forms
+        return forms
+
+    def phrase_forms(self, phrase):
+        """Формы фразы: сочетания форм ее слов"""
+        words = normalize_text(phrase).split()
+        if len(words) == 1:
+            return self.word_forms(words[0])
+        variants = [sorted(self.word_forms(word)) for word in words]
+        forms = set()
+        for combination in product(*variants):
+            forms.add(' '.join(combination))
+            if len(forms) >= self.MAX_PHRASE_FORMS:
+                break
+        forms.add(' '.join(words))
+        return forms
+
+    def add(self, phrase, group, category, inflect=True):
+        """Добавление фразы словаря (со словоформами)"""
+        key = (group, category, normalize_text(phrase))
+        payload = self._payload_index.get(key)
+        if payload is None:
+            payload = len(self.payloads)
+            self.payloads.append(key)
+            self._payload_index[key] = payload
+
+        forms = self.phrase_forms(phrase) if inflect else {normalize_text(phrase)}
+        for form in forms:
+            node = 0
+            for char in form:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = next_node
+            entry = (len(form), payload)
+            if entry not in self.output[node]:
+                self.output[node].append(entry)
+        self.is_built = False
+
+    def build(self):
+        """Построение ссылок неудач обходом в ширину"""
+        queue = deque()
+        for node in self.goto[0].values():
+            self.fail[node] = 0
+            queue.append(node)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+        self.is_built = True
+        self.version += 1
+        return self
+
+    def search(self, text):
+        """Все вхождения словаря: [(начало, конец, группа, категория, фраза, текст)]"""
+        if not self.is_built:
+            self.build()
+
+        normalized = normalize_text(text)
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        length = len(normalized)
+        matches = []
+        node = 0
+
+        for position, char in enumerate(normalized):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            if output[node]:
+                end = position + 1
+                if end < length and (normalized[end].isalnum() or normalized[end] == '_'):
+                    continue
+                for phrase_length, payload in output[node]:
+                    start = end - phrase_length
+                    if start > 0 and (normalized[start - 1].isalnum() or normalized[start - 1] == '_'):
+                        continue
+                    group, category, phrase = self.payloads[payload]
+                    matches.append((start, end, group, category, phrase, text[start:end]))
+
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        return matches
+
+_keyword_automaton = None
+
+def get_keyword_automaton():
+    """Общий автомат по маркерам критичности и промышленному словарю"""
+    global _keyword_automaton
+    if _keyword_automaton is None:
+        automaton = KeywordAutomaton()
+        for category in MARKER_CATEGORIES:
+            for phrase in CRITICAL_MARKERS[category]:
+                automaton.add(phrase, 'marker', category)
+        for entity_type, phrases in INDUSTRIAL_VOCABULARY.items():
+            for phrase in phrases:
+                automaton.add(phrase, 'industrial', entity_type)
+        _keyword_automaton = automaton.build()
+    return _keyword_automaton
@@ -0,0 +1,93 @@
+"""
+Экспорт классификатора речевых актов в ONNX с int8 квантованием
+
+Запуск из корня проекта:
+    python -m nlp.onnx_export [--model имя] [--no-quantize]
+
+Модель, токенизатор и конфигурация (метки LABEL_i) сохраняются в кэш
+моделей; SpeechActClassifier использует их через ONNX Runtime, если
+экспорт существует.
+"""
+
+import os
+import sys
+import json
+import time
+from config.model_config import MODEL_CONFIG
+
+ONNX_FILE = 'model.onnx'
+META_FILE = 'export.json'
+
+def onnx_model_dir(model_name=None):
+    """Каталог экспортированной модели в кэше"""
+    model_name = model_name or MODEL_CONFIG['bert_model']
+    return os.path.join(MODEL_CONFIG['model_cache_dir'], f"{model_name.strip('/').replace('/', '--')}-onnx")
+
+def export_speech_act_model(model_name=None, output_dir=None, quantize=True):
+    """Экспорт модели в ONNX (динамические пакет и длина) и квантование весов в int8
+
+    Возвращает путь к файлу модели.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    model_name = model_name or MODEL_CONFIG['bert_model']
+    output_dir = output_dir or onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Экспорт {model_name} в {output_dir}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["Проверка связи", "Срочно всем покинуть цех"], padding=True, return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    fp32_path = os.path.join(output_dir, 'model-fp32.onnx')
+    model_path = os.path.join(output_dir, ONNX_FILE)
+    start = time.time()
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            dynamo=False
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    else:
+        os.replace(fp32_path, model_path)
+
+    # Токенизатор и конфигурация с метками - рядом с моделью
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'source_model': model_name,
+            'quantized': quantize,
+            'inputs': input_names,
+            'torch_version': torch.__version__
+        }, f, ensure_ascii=False, indent=2)
+
+    size = os.path.getsize(model_path) / 1024 / 1024
+    print(f"Модель сохранена: {model_path} ({size:.1f} МБ, {time.time() - start:.1f} сек)")
+    return model_path
+
+def main():
+    args = sys.argv[1:]
+    model_name = None
+    if '--model' in args:
+        model_name = args[args.index('--model') + 1]
+    export_speech_act_model(model_name, quantize='--no-quantize' not in args)
+
+if __name__ == '__main__':
+    main()
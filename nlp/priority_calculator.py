@@ -2,17 +2,30 @@
 Расчет уровня критичности сообщений
 """
 
+import re
+import time
+import bisect
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError
 from .entity_extractor import EntityExtractor
 from .speech_act_classifier import SpeechActClassifier
 from .critical_markers import CriticalMarkersDetector
-from utils.constants import SPEECH_ACTS
+from .analysis_result import AnalysisResult
+from .keyword_automaton import normalize_text
+from config.model_config import MODEL_CONFIG
+from utils.constants import SPEECH_ACTS, CRITICAL_LEVELS
 from utils.logger import setup_logger
+from utils.cpu_budget import get_cpu_budget
+
+NON_WORD = re.compile(r'[^\w°%]+')
+WORD = re.compile(r'[\w°%]+')
 
 class PriorityCalculator:
-    def __init__(self):
+    def __init__(self, autoload=True):
         self.logger = setup_logger('priority_calculator')
-        self.entity_extractor = EntityExtractor()
-        self.speech_act_classifier = SpeechActClassifier()
+        self.entity_extractor = EntityExtractor(autoload=autoload)
+        self.speech_act_classifier = SpeechActClassifier(autoload=autoload)
         self.markers_detector = CriticalMarkersDetector()
         
         # Базовые веса для типов речевых актов
@@ -24,66 +37,453 @@ class PriorityCalculator:
             'DECLARATIVE': 7,    # изменения статуса - высокий
             'UNKNOWN': 3         # по умолчанию
         }
+        
+        # Каскад: модели вызываются, только если могут изменить уровень
+        self.cascade_enabled = MODEL_CONFIG.get('cascade_enabled', True)
+        self.cascade_exit = MODEL_CONFIG.get('cascade_exit', 'band')
+        self.trivial_phrases = frozenset(self.cache_key(phrase)
+                                         for phrase in MODEL_CONFIG.get('cascade_trivial_phrases', ()))
+        self.last_tier = None
+        self.tier_counts = {'cache': 0, 'trivial': 0, 'markers': 0, 'speech_act': 0, 'entities': 0}
+        self.detailed_runs = 0      # Детальные анализы учитываются отдельно от ступеней
+        
+        # LRU кэш результатов по нормализованному тексту
+        self.cache_size = MODEL_CONFIG.get('analysis_cache_size', 256)
+        self.cache = OrderedDict()
+        self.cache_version = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.Lock()
+        
+        # Постоянный пул для запуска моделей (torch и Natasha отпускают GIL): по потоку
+        # на компонент, классификатор и Natasha. Потоки создаются при первой задаче
+        # и наследуют ядра вызывающей стадии. Без пула Natasha не запускается заранее
+        self.nlp_deadline = MODEL_CONFIG.get('nlp_deadline', 2.0)
+        self.speech_act_batching = MODEL_CONFIG.get('speech_act_batching', False)
+        self.cpu_budget = get_cpu_budget()
+        self.executor = None
+        self.workers = 1
+        if MODEL_CONFIG.get('nlp_parallel', True):
+            self.workers = 2
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='nlp')
+        self._overlap_lock = threading.Lock()
+        self.overlap_stats = {'messages': 0, 'component_time': 0.0, 'wall_time': 0.0,
+                              'pool_cpu': 0.0, 'timeouts': 0, 'cancelled': 0}
     
-    def calculate_critical_level(self, text):
-        """Расчет уровня критичности для текста"""
+    def _level(self, score):
+        """Итоговый уровень по сумме баллов (ограничение 1-15)"""
+        return max(1, min(15, round(score)))
+    
+    def _is_decided(self, low, high):
+        """Уточнение моделями не изменит уровень (или его градацию)"""
+        if low == high:
+            return True
+        return self.cascade_exit == 'band' and CRITICAL_LEVELS[low] == CRITICAL_LEVELS[high]
+    
+    @staticmethod
+    def cache_key(text):
+        """Нормализованный текст: регистр, ё, пунктуация и пробелы свернуты
+        
+        Пунктуация заменяется пробелом, а не удаляется, чтобы не склеивать
+        числа; единицы ° и % сохраняются для пороговых маркеров.
+        """
+        return ' '.join(NON_WORD.sub(' ', normalize_text(text)).split())
+    
+    def _cache_version(self):
+        """Версия настроек и моделей, от которых зависит результат анализа
+        
+        Загрузка классификатора или Natasha (например, в фоне при старте)
+        сбрасывает кэш результатов, полученных без них.
+        """
+        return (self.markers_detector.get_version(), tuple(sorted(self.speech_act_weights.items())),
+                self.cascade_enabled, self.cascade_exit, self.trivial_phrases,
+                self.speech_act_classifier.backend, self.entity_extractor.is_loaded)
+    
+    def _cache_get(self, key):
+        if self.cache_size <= 0:
+            return None
+        version = self._cache_version()
+        with self._cache_lock:
+            if version != self.cache_version:
+                if self.cache:
+                    self.logger.info("Настройки маркеров изменились, кэш анализа сброшен")
+                self.cache.clear()
+                self.cache_version = version
+            result = self.cache.get(key)
+            if result is None:
+                self.cache_misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return result
+    
+    def _cache_put(self, key, result):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self.cache[key] = result
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+    
+    def invalidate_cache(self):
+        """Сброс кэша анализа (например, после правки словаря)"""
+        with self._cache_lock:
+            self.cache.clear()
+    
+    def get_cache_stats(self):
+        """Попадания, промахи и доля попаданий кэша анализа"""
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                'size': len(self.cache),
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': self.cache_hits / total if total else 0.0
+            }
+    
+    def _respell(self, cached, text):
+        """Результат из кэша для другого написания того же текста
+        
+        Маркеры ищутся заново (сохраняют написание), позиции сущностей
+        переносятся по словам: у текстов с одним ключом кэша слова совпадают
+        с точностью до регистра и ё. None, если слова сопоставить не удалось.
+        """
+        result = cached.copy(text)
+        if text == cached.text:
+            return result
+        
+        old_words = [match.span() for match in WORD.finditer(cached.text)]
+        new_words = [match.span() for match in WORD.finditer(text)]
+        if len(old_words) != len(new_words):
+            return None
+        old_starts = [start for start, _ in old_words]
+        
+        def move(offset):
+            index = bisect.bisect_right(old_starts, offset) - 1
+            if index < 0:
+                return offset
+            return offset - old_words[index][0] + new_words[index][0]
+        
+        if result.markers is not None:
+            result.markers = self.markers_detector.detect_markers(text)
+        for entity in result.entities or ():
+            entity['start'] = move(entity['start'])
+            entity['stop'] = move(entity['stop'] - 1) + 1
+            entity['text'] = text[entity['start']:entity['stop']]
+        return result
+    
+    def _is_trivial(self, text, keyword_matches, marker_score):
+        """Служебная фраза из списка некритичных, без маркеров и терминов
+        
+        Короткие фразы вообще не считаются тривиальными: "Стоп!" или
+        "Отойди!" - директивы, уровень которых определяет классификатор.
+        """
+        return (marker_score == 0 and not keyword_matches
+                and self.cache_key(text) in self.trivial_phrases)
+    
+    def _submit(self, func, *args):
+        """Запуск анализа в пуле (или сразу, если пул отключен) с замером времени
+        
+        Процессорное время потока пула учитывается в стадии 'nlp': stage()
+        в вызывающем потоке видит только ожидание.
+        """
+        if self.executor is None:
+            future = Future()
+            started = time.perf_counter()
+            try:
+                future.set_result((func(*args), time.perf_counter() - started))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        
+        def timed():
+            started = time.perf_counter()
+            cpu_started = time.thread_time()
+            try:
+                return func(*args), time.perf_counter() - started
+            finally:
+                cpu = time.thread_time() - cpu_started
+                self.cpu_budget.record('nlp', cpu, 0.0, calls=0)
+                with self._overlap_lock:
+                    self.overlap_stats['pool_cpu'] += cpu
+        
+        return self.executor.submit(timed)
+    
+    def _classify(self, text, deadline):
+        """Речевой акт: напрямую или через общий пакетировщик (несколько источников)"""
+        if self.speech_act_batching:
+            return self.speech_act_classifier.classify_batched(
+                text, timeout=max(0.0, deadline - time.perf_counter()))
+        return self.speech_act_classifier.classify_speech_act(text)
+    
+    def _abandon(self, future):
+        """Отмена задачи, результат которой больше не нужен (если она еще в очереди)"""
+        if future is not None and future.cancel():
+            with self._overlap_lock:
+                self.overlap_stats['cancelled'] += 1
+    
+    def _join(self, future, deadline, name):
+        """Результат анализа и время его работы; None, если срок истек"""
+        try:
+            return future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except TimeoutError:
+            self._abandon(future)
+            with self._overlap_lock:
+                self.overlap_stats['timeouts'] += 1
+            self.logger.warning(f"{name}: истек срок ожидания, уровень оценен по верхней границе")
+            return None, 0.0
+    
+    def _join_entities(self, future, deadline):
+        """Сущности, полнота результата и время; (None, False), если срок истек"""
+        result, elapsed = self._join(future, deadline, 'Natasha')
+        return result or (None, False), elapsed
+    
+    def _record_overlap(self, component_time, wall_time):
+        with self._overlap_lock:
+            self.overlap_stats['messages'] += 1
+            self.overlap_stats['component_time'] += component_time
+            self.overlap_stats['wall_time'] += wall_time
+    
+    def _marker_bounds(self, keyword_matches, marker_score):
+        """Диапазон уровня до моделей -> (минимальный бонус за сущности, нижняя, верхняя граница)
+        
+        Промышленные сущности известны сразу, Natasha может добавить бонус до максимума.
+        """
+        industrial_count = sum(1 for match in keyword_matches if match[2] == 'industrial')
+        bonus_low = min(industrial_count * 0.5, 2)
+        weights = self.speech_act_weights.values()
+        return (bonus_low,
+                self._level(min(weights) + marker_score + bonus_low),
+                self._level(max(weights) + marker_score + 2))
+    
+    def _needs_classifier(self, text):
+        """Каскад не решит уровень фразы без классификатора"""
+        if not self.cascade_enabled:
+            return True
+        keyword_matches = self.markers_detector.find_keywords(text)
+        markers = self.markers_detector.detect_markers(text, keyword_matches)
+        marker_score = self.markers_detector.calculate_marker_score(markers)
+        if self._is_trivial(text, keyword_matches, marker_score):
+            return False
+        _, low, high = self._marker_bounds(keyword_matches, marker_score)
+        return not self._is_decided(low, high)
+    
+    def analyze_batch(self, texts):
+        """Анализ набора фраз (пакетная обработка записей) -> [AnalysisResult]
+        
+        Речевые акты фраз, которым нужен классификатор, определяются одним
+        вызовом batch_classify; дальше каждая фраза проходит обычный каскад.
+        """
+        needed = list(dict.fromkeys(text for text in texts if text and self._needs_classifier(text)))
+        speech_acts = dict(zip(needed, self.speech_act_classifier.batch_classify(needed)))
+        return [self.analyze(text, speech_act=speech_acts.get(text)) for text in texts]
+    
+    def analyze(self, text, full=False, speech_act=None):
+        """Анализ сообщения за один проход -> AnalysisResult
+        
+        Каскад: сначала словарные маркеры (микросекунды), затем классификатор
+        речевых актов и Natasha - только если они еще могут изменить уровень.
+        Диапазон уровня оценивается по крайним весам речевых актов и
+        максимальному бонусу за сущности; при выходе по градации
+        возвращается верхняя граница диапазона. Ступень, на которой решен
+        уровень, сохраняется в last_tier и учитывается в tier_counts.
+        
+        Классификатор и Natasha выполняются параллельно в пуле и ожидаются
+        не дольше nlp_deadline; если
+        результат не успел, уровень берется по верхней границе. Natasha,
+        ставшая ненужной после классификации, отменяется. Повторяющиеся фразы
+        берутся из LRU кэша по нормализованному тексту (ступень 'cache').
+        
+        full=True (детальный анализ): уровень считается тем же каскадом, затем
+        недостающие компоненты дозаполняются без изменения critical_level;
+        уровень по всем компонентам сохраняется в exact_level. Такие анализы
+        кэшируются отдельно и не учитываются в tier_counts.
+        
+        speech_act - уже известный речевой акт (например, из пакетной
+        классификации); классификатор тогда не вызывается.
+        """
         if not text:
-            return 1  # Минимальный уровень для пустого текста
+            return AnalysisResult(text)  # Минимальный уровень для пустого текста
         
+        key = (self.cache_key(text), full)
+        cached = self._cache_get(key)
+        if cached is not None:
+            cached = self._respell(cached, text)
+        if cached is not None:
+            if full:
+                self.detailed_runs += 1
+            else:
+                self.last_tier = 'cache'
+                self.tier_counts['cache'] += 1
+            self.logger.info(f"Итоговый уровень критичности: {cached.critical_level} (из кэша)")
+            return cached
+        
+        result, cacheable = self._analyze_uncached(text, full, speech_act)
+        if full:
+            self.detailed_runs += 1
+        elif result.tier is not None:
+            self.last_tier = result.tier
+            self.tier_counts[result.tier] += 1
+        if cacheable:
+            self._cache_put(key, result)
+        return result.copy()
+    
+    def _analyze_uncached(self, text, full, speech_act=None):
+        """Один проход каскада -> (результат, можно ли его кэшировать)"""
+        result = AnalysisResult(text)
+        cacheable = True    # Результат не зависит от сроков ожидания, ошибок и загрузки моделей
+        cascade = self.cascade_enabled
+        started = time.perf_counter()
         try:
             self.logger.info(f"Анализ текста: {text}")
             
-            # 1. Классификация речевого акта
-            speech_act = self.speech_act_classifier.classify_speech_act(text)
-            base_level = self.speech_act_weights.get(speech_act['act'], 3)
-            self.logger.info(f"🎯 Речевой акт: {speech_act['act']} (уровень: {base_level})")
-            
-            # 2. Поиск критических маркеров
-            markers = self.markers_detector.detect_markers(text)
-            marker_score = self.markers_detector.calculate_marker_score(markers)
+            # 1. Словарные маркеры и промышленные сущности - один проход автомата
+            keyword_matches = self.markers_detector.find_keywords(text)
+            result.markers = self.markers_detector.detect_markers(text, keyword_matches)
+            result.marker_score = marker_score = self.markers_detector.calculate_marker_score(result.markers)
             self.logger.info(f"🔍 Найдено маркеров: {marker_score} баллов")
             
-            # 3. Извлечение сущностей
-            entities = self.entity_extractor.extract_entities(text)
-            entity_bonus = min(len(entities) * 0.5, 2)  # Бонус за сущности
-            self.logger.info(f"🏷️ Извлечено сущностей: {len(entities)}")
+            # Бонус за сущности: промышленные известны сразу, Natasha может добавить до максимума
+            bonus_low, low, high = self._marker_bounds(keyword_matches, marker_score)
+            bonus_high = 2
             
-            # 4. Расчет итогового уровня
-            critical_level = base_level + marker_score + entity_bonus
-            critical_level = max(1, min(15, round(critical_level)))  # Ограничение 1-15
+            weights = self.speech_act_weights
+            if cascade and self._is_trivial(text, keyword_matches, marker_score):
+                tier = 'trivial'
+                critical_level = self._level(weights['REPRESENTATIVE'])
+            else:
+                tier = 'markers'
+                
+                # 2-3. Классификатор и Natasha параллельно, с общим сроком ожидания
+                if not (cascade and self._is_decided(low, high)):
+                    # Natasha запускается, только если при каком-то речевом акте она нужна
+                    need_entities = not cascade or any(
+                        not self._is_decided(self._level(base + marker_score + bonus_low),
+                                             self._level(base + marker_score + bonus_high))
+                        for base in set(weights.values())
+                    )
+                    joined_at = time.perf_counter()
+                    deadline = joined_at + self.nlp_deadline
+                    if speech_act is None:
+                        speech_future = self._submit(self._classify, text, deadline)
+                    else:
+                        speech_future = Future()
+                        speech_future.set_result((speech_act, 0.0))
+                    entities_future = None
+                    if need_entities and self.workers > 1:
+                        # Заранее, параллельно с классификатором
+                        entities_future = self._submit(self.entity_extractor.extract_entities_checked,
+                                                       text, keyword_matches)
+                    component_time = 0.0
+                    
+                    tier = 'speech_act'
+                    speech_act, elapsed = self._join(speech_future, deadline, 'классификатор')
+                    component_time += elapsed
+                    # Запасной UNKNOWN (модель не загружена или ошиблась) - без raw_label
+                    cacheable = cacheable and speech_act is not None and 'raw_label' in speech_act
+                    if speech_act is not None:
+                        result.speech_act = speech_act
+                        result.base_level = base_level = weights.get(speech_act['act'], 3)
+                        self.logger.info(f"🎯 Речевой акт: {speech_act['act']} (уровень: {base_level})")
+                        low = self._level(base_level + marker_score + bonus_low)
+                        high = self._level(base_level + marker_score + bonus_high)
+                    
+                    if need_entities and not (cascade and self._is_decided(low, high)):
+                        tier = 'entities'
+                        if entities_future is None:
+                            entities_future = self._submit(self.entity_extractor.extract_entities_checked,
+                                                           text, keyword_matches)
+                        (entities, complete), elapsed = self._join_entities(entities_future, deadline)
+                        component_time += elapsed
+                        cacheable = cacheable and complete
+                        if entities is not None:
+                            result.entities = entities
+                            result.entity_bonus = entity_bonus = min(len(entities) * 0.5, 2)  # Бонус за сущности
+                            self.logger.info(f"🏷️ Извлечено сущностей: {len(entities)}")
+                            if speech_act is not None:
+                                low = high = self._level(base_level + marker_score + entity_bonus)
+                    
+                    else:
+                        self._abandon(entities_future)
+                    
+                    self._record_overlap(component_time, time.perf_counter() - joined_at)
+                
+                # 4. Итоговый уровень
+                critical_level = high
             
-            self.logger.info(f"Итоговый уровень критичности: {critical_level}")
+            result.critical_level = critical_level
+            result.tier = tier
             
-            return critical_level
+            if full:
+                cacheable = self._complete(result, keyword_matches) and cacheable
             
         except Exception as e:
             self.logger.error(f"Ошибка расчета критичности: {e}")
-            return 3  # Уровень по умолчанию при ошибке
+            result.critical_level = 3  # Уровень по умолчанию при ошибке
+            cacheable = False
+        
+        result.elapsed = time.perf_counter() - started
+        self.logger.info(f"Итоговый уровень критичности: {result.critical_level} "
+                         f"(ступень {result.tier}, {result.elapsed * 1e6:.0f} мкс)")
+        return result, cacheable
     
-    def get_detailed_analysis(self, text):
-        """Детальный анализ с разбивкой по компонентам"""
-        analysis = {
-            'text': text,
-            'speech_act': None,
-            'markers': None,
-            'entities': None,
-            'critical_level': 1
-        }
+    def _complete(self, result, keyword_matches):
+        """Дозаполнение компонентов, пропущенных каскадом, и точный уровень
         
-        try:
-            # Речевой акт
-            analysis['speech_act'] = self.speech_act_classifier.classify_speech_act(text)
-            
-            # Критические маркеры
-            analysis['markers'] = self.markers_detector.detect_markers(text)
-            
-            # Сущности
-            analysis['entities'] = self.entity_extractor.extract_entities(text)
-            
-            # Итоговый уровень
-            analysis['critical_level'] = self.calculate_critical_level(text)
-            
-        except Exception as e:
-            self.logger.error(f"Ошибка детального анализа: {e}")
+        critical_level не меняется. Возвращает False, если результат модели
+        неполный (не успела, не загружена или ошиблась).
+        """
+        text = result.text
+        deadline = time.perf_counter() + self.nlp_deadline
+        speech_future = entities_future = None
+        if result.speech_act is None:
+            speech_future = self._submit(self.speech_act_classifier.classify_speech_act, text)
+        if result.entities is None:
+            entities_future = self._submit(self.entity_extractor.extract_entities_checked,
+                                           text, keyword_matches)
         
-        return analysis
\ No newline at end of file
+        complete = True
+        if speech_future is not None:
+            speech_act, _ = self._join(speech_future, deadline, 'классификатор')
+            complete = speech_act is not None and 'raw_label' in speech_act
+            if speech_act is not None:
+                result.speech_act = speech_act
+                result.base_level = self.speech_act_weights.get(speech_act['act'], 3)
+        if entities_future is not None:
+            (entities, entities_complete), _ = self._join_entities(entities_future, deadline)
+            complete = complete and entities_complete
+            if entities is not None:
+                result.entities = entities
+                result.entity_bonus = min(len(entities) * 0.5, 2)
+        
+        if result.base_level is not None and result.entity_bonus is not None:
+            result.exact_level = self._level(result.base_level + result.marker_score + result.entity_bonus)
+        return complete
+    
+    def calculate_critical_level(self, text):
+        """Расчет уровня критичности для текста"""
+        return self.analyze(text).critical_level
+    
+    def get_cascade_stats(self):
+        """Число сообщений, уровень которых решен на каждой ступени каскада"""
+        return dict(self.tier_counts)
+    
+    def get_overlap_stats(self):
+        """Перекрытие моделей: сумма их времени к времени ожидания (1.0 - последовательно)"""
+        with self._overlap_lock:
+            stats = dict(self.overlap_stats)
+        stats['speedup'] = stats['component_time'] / stats['wall_time'] if stats['wall_time'] > 0 else 1.0
+        return stats
+    
+    def close(self):
+        """Остановка пула анализа (незавершенные задачи не ожидаются)"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.speech_act_classifier.batcher is not None:
+            self.speech_act_classifier.batcher.stop()
+    
+    def get_detailed_analysis(self, text):
+        """Детальный анализ с разбивкой по компонентам (уровень - как в analyze)"""
+        return self.analyze(text, full=True).to_dict()
@@ -2,17 +2,34 @@
 Классификация речевых актов по теории Сёрла
 """
 
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import os
+import threading
+import numpy as np
+from concurrent.futures import TimeoutError
+from transformers import AutoTokenizer, AutoConfig
 from config.model_config import MODEL_CONFIG
+from config.cpu_config import CPU_CONFIG
+from .dynamic_batcher import DynamicBatcher
+from .onnx_export import onnx_model_dir, ONNX_FILE
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
 
 class SpeechActClassifier:
-    def __init__(self):
+    def __init__(self, autoload=True):
         self.config = MODEL_CONFIG
         self.classifier = None
         self.tokenizer = None
         self.model = None
-        self.load_model()
+        self.session = None     # Сессия ONNX Runtime
+        self.id2label = None
+        self.backend = None     # 'onnx' или 'torch'
+        self.batcher = None
+        self._batcher_lock = threading.Lock()
+        if autoload:
+            self.load_model()
         
         # Маппинг категорий
         self.speech_act_map = {
@@ -24,25 +41,89 @@ class SpeechActClassifier:
         }
     
     def load_model(self):
-        """Загрузка модели для классификации"""
+        """Загрузка модели для классификации
+        
+        При наличии экспорта (python -m nlp.onnx_export) используется ONNX
+        Runtime с быстрым токенизатором, иначе пайплайн transformers на PyTorch.
+        """
+        backend = self.config.get('speech_act_backend', 'auto')
+        if backend != 'torch' and self._load_onnx():
+            return
+        if backend == 'onnx':
+            print("Экспорт ONNX недоступен, используется PyTorch")
+        
         try:
             print("Загрузка модели для классификации речевых актов...")
+            from transformers import pipeline
             
             self.classifier = pipeline(
                 "text-classification",
                 model=self.config['bert_model'],
                 tokenizer=self.config['bert_model']
             )
+            # Модель и токенизатор пайплайна нужны для пакетного вывода
+            self.model = self.classifier.model
+            self.tokenizer = self.classifier.tokenizer
+            self.id2label = self.model.config.id2label
+            self.model.eval()
+            self.backend = 'torch'
             
             print("Модель для классификации загружена")
             
         except Exception as e:
             print(f"Ошибка загрузки модели классификации: {e}")
     
+    def _load_onnx(self):
+        """Загрузка экспортированной модели в ONNX Runtime; False, если экспорта нет"""
+        model_dir = onnx_model_dir(self.config['bert_model'])
+        model_path = os.path.join(model_dir, ONNX_FILE)
+        if onnxruntime is None or not os.path.exists(model_path):
+            return False
+        
+        try:
+            print(f"Загрузка модели для классификации речевых актов (ONNX): {model_path}")
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = CPU_CONFIG['stages']['nlp'].get('torch_threads') or 0
+            self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+            self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+            self.tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+            self.id2label = AutoConfig.from_pretrained(model_dir).id2label
+            self.backend = 'onnx'
+            print("Модель для классификации загружена (ONNX Runtime)")
+            return True
+        except Exception as e:
+            print(f"Ошибка загрузки модели ONNX: {e}")
+            self.session = None
+            return False
+    
+    def _probabilities(self, texts):
+        """Вероятности классов для пакета текстов (numpy, [пакет, классы])"""
+        if self.backend == 'onnx':
+            inputs = self.tokenizer(texts, padding=True, truncation=True,
+                                    max_length=self.config['max_text_length'], return_tensors='np')
+            logits = self.session.run(None, {name: inputs[name].astype(np.int64) for name in self.input_names})[0]
+        else:
+            import torch
+            inputs = self.tokenizer(texts, padding=True, truncation=True,
+                                    max_length=self.config['max_text_length'], return_tensors='pt')
+            with torch.inference_mode():
+                logits = self.model(**inputs).logits.float().numpy()
+        
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+    
+    def warm_up(self):
+        """Пробная классификация для прогрева модели"""
+        if self.backend is not None:
+            self.classify_speech_act("Проверка связи")
+    
     def classify_speech_act(self, text):
         """Классификация речевого акта"""
-        if not text or self.classifier is None:
+        if not text or self.backend is None:
             return {'act': 'UNKNOWN', 'confidence': 0.0}
+        if self.backend == 'onnx':
+            return self.batch_classify([text[:512]])[0]
         
         try:
             result = self.classifier(text[:512])  # Обрезаем длинный текст
@@ -62,9 +143,65 @@ class SpeechActClassifier:
             print(f"Ошибка классификации речевого акта: {e}")
             return {'act': 'UNKNOWN', 'confidence': 0.0}
     
-    def batch_classify(self, texts):
-        """Пакетная классификация"""
-        results = []
-        for text in texts:
-            results.append(self.classify_speech_act(text))
-        return results
\ No newline at end of file
+    def batch_classify(self, texts, batch_size=None):
+        """Пакетная классификация одним проходом модели на пакет
+        
+        Тексты сортируются по длине и делятся на пакеты, поэтому каждый
+        пакет дополняется только до своей наибольшей длины. Результаты
+        возвращаются в исходном порядке.
+        """
+        results = [{'act': 'UNKNOWN', 'confidence': 0.0} for _ in texts]
+        if self.backend is None:
+            return results
+        
+        batch_size = batch_size or self.config['speech_act_batch_size']
+        order = sorted((i for i, text in enumerate(texts) if text), key=lambda i: len(texts[i]))
+        
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            try:
+                probabilities = self._probabilities([texts[i] for i in indices])
+                scores = probabilities.max(axis=-1)
+                labels = probabilities.argmax(axis=-1)
+                
+                for i, score, label in zip(indices, scores.tolist(), labels.tolist()):
+                    predicted_label = self.id2label[label]
+                    results[i] = {
+                        'act': self.speech_act_map.get(predicted_label, 'UNKNOWN'),
+                        'confidence': score,
+                        'raw_label': predicted_label
+                    }
+                    
+            except Exception as e:
+                print(f"Ошибка пакетной классификации речевых актов: {e}")
+        
+        return results
+    
+    def get_batcher(self):
+        """Общий для всех источников динамический пакетировщик запросов"""
+        with self._batcher_lock:
+            if self.batcher is None:
+                self.batcher = DynamicBatcher(
+                    self.batch_classify,
+                    max_batch_size=self.config['speech_act_batch_size'],
+                    max_wait=self.config['speech_act_batch_wait'],
+                    name='speech-act-batcher'
+                )
+            return self.batcher
+    
+    def classify_batched(self, text, timeout=None):
+        """Классификация через динамический пакетировщик (для нескольких потоков-источников)
+        
+        Одиночный запрос выполняется сразу; при конкурирующих запросах
+        они объединяются в один проход модели. Живую фразу без конкурентов
+        выгоднее классифицировать напрямую (classify_speech_act). По истечении
+        timeout запрос снимается с очереди и выбрасывается TimeoutError.
+        """
+        if not text or self.backend is None:
+            return self.classify_speech_act(text)
+        future = self.get_batcher().submit(text)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
@@ -61,10 +61,8 @@ class DisplayEngine:
             self.screen.blit(title, title_rect)
             self.screen.blit(subtitle, subtitle_rect)
             
+            # Заставка остается на экране до первого вывода статуса
             pygame.display.flip()
-            time.sleep(2) 
-            
-            self.clear_screen()
             
         except Exception as e:
             self.logger.error(f"Ошибка отображения заставки: {e}")
@@ -4,8 +4,12 @@
 
 from .whisper_engine import WhisperEngine
 from .speech_to_text import SpeechToText
+from .streaming import StreamingTranscriber
+from .asr_worker import ASRWorker
 
 __all__ = [
     'WhisperEngine',
-    'SpeechToText'
+    'SpeechToText',
+    'StreamingTranscriber',
+    'ASRWorker'
 ]
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+Распознавание речи в отдельном процессе с передачей аудио через общую память
+"""
+
+import time
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from config.audio_config import AUDIO_CONFIG
+from config.model_config import MODEL_CONFIG
+from utils.logger import setup_logger
+from utils.cpu_budget import get_cpu_budget
+from audio.audio_format import to_float32
+
+def _worker_main(slot_names, slot_samples, sample_rate, requests, results, cancel_flags, engine_factory=None):
+    """Цикл рабочего процесса: фрагмент из слота общей памяти -> текст"""
+    # Ядра и потоки torch задаются до загрузки модели: пул потоков наследует их
+    get_cpu_budget().apply_process('asr')
+    if engine_factory is None:
+        from speech_recognition.whisper_engine import WhisperEngine
+        engine_factory = WhisperEngine
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    views = [np.ndarray((slot_samples,), dtype=np.float32, buffer=slot.buf) for slot in slots]
+
+    engine = engine_factory()
+    engine.warm_up()
+    results.put({'type': 'ready'})
+
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+
+            request_id, slot, length = request
+            if cancel_flags[slot]:
+                results.put({'type': 'result', 'request_id': request_id, 'slot': slot, 'cancelled': True})
+                continue
+
+            results.put({'type': 'started', 'request_id': request_id})
+            cpu_start = time.process_time()  # все потоки процесса, включая пул torch
+            wall_start = time.perf_counter()
+            text = engine.transcribe_audio(views[slot][:length], sample_rate)
+            results.put({'type': 'result', 'request_id': request_id, 'slot': slot,
+                         'text': text, 'cancelled': bool(cancel_flags[slot]),
+                         'cpu': time.process_time() - cpu_start,
+                         'wall': time.perf_counter() - wall_start})
+    finally:
+        del views
+        for slot in slots:
+            slot.close()
+
+class ASRWorker:
+    """Процесс распознавания, не блокирующий цикл захвата
+
+    Фраза копируется в свободный слот общей памяти, в очередь уходят только
+    номер слота и длина. Результаты забираются без ожидания через poll().
+    Ожидающий запрос отменяется флагом слота, выполняющийся - перезапуском
+    процесса. Упавший процесс перезапускается автоматически.
+
+    engine_factory - функция уровня модуля, создающая движок с методами
+    warm_up() и transcribe_audio(audio, sample_rate) (по умолчанию WhisperEngine).
+    """
+
+    def __init__(self, sample_rate=None, n_slots=None, max_seconds=None, engine_factory=None):
+        self.logger = setup_logger('asr_worker')
+        self.sample_rate = sample_rate or AUDIO_CONFIG['asr_rate']
+        self.n_slots = n_slots or MODEL_CONFIG['asr_worker_slots']
+        max_seconds = max_seconds or (AUDIO_CONFIG['max_utterance'] + AUDIO_CONFIG['vad_pre_roll'] + 1)
+        self.slot_samples = int(max_seconds * self.sample_rate)
+
+        self.context = multiprocessing.get_context('spawn')
+        self.slots = [shared_memory.SharedMemory(create=True, size=self.slot_samples * 4)
+                      for _ in range(self.n_slots)]
+        self.views = [np.ndarray((self.slot_samples,), dtype=np.float32, buffer=slot.buf) for slot in self.slots]
+        self.cancel_flags = self.context.Array('b', self.n_slots, lock=False)
+
+        self.process = None
+        self.requests = None
+        self.results = None
+        self.free_slots = list(range(self.n_slots))
+        self.in_flight = {}     # request_id -> слот
+        self.current = None     # Запрос, который сейчас распознается
+        self.next_id = 0
+        self.is_ready = False
+        self.stopping = False
+        self.started_at = 0.0
+        self.restart_delay = MODEL_CONFIG['asr_worker_restart_delay']
+        self.engine_factory = engine_factory
+
+        # Статистика
+        self.submitted = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.restarts = 0
+
+    def start(self):
+        """Запуск рабочего процесса (модель загружается в нем)"""
+        self.requests = self.context.Queue()
+        self.results = self.context.Queue()
+        self.is_ready = False
+        self.current = None
+        self.started_at = time.monotonic()
+        self.process = self.context.Process(
+            target=_worker_main,
+            args=([slot.name for slot in self.slots], self.slot_samples, self.sample_rate,
+                  self.requests, self.results, self.cancel_flags, self.engine_factory),
+            name='asr-worker',
+            daemon=True
+        )
+        self.process.start()
+        self.logger.info(f"Процесс распознавания запущен (pid {self.process.pid})")
+
+    def submit(self, audio):
+        """Передача фразы (моно, sample_rate) на распознавание без ожидания
+
+        Возвращает номер запроса или None, если все слоты заняты.
+        """
+        if not self.free_slots:
+            self.dropped += 1
+            self.logger.warning("Все слоты распознавания заняты, фраза пропущена")
+            return None
+
+        length = min(len(audio), self.slot_samples)
+        if length < len(audio):
+            self.logger.warning(f"Фраза длиннее слота, обрезана до {self.slot_samples / self.sample_rate:.1f} сек")
+
+        slot = self.free_slots.pop()
+        self.views[slot][:length] = to_float32(audio[:length])
+        self.cancel_flags[slot] = 0
+
+        self.next_id += 1
+        request_id = self.next_id
+        self.in_flight[request_id] = slot
+        self.requests.put((request_id, slot, length))
+        self.submitted += 1
+        return request_id
+
+    def cancel(self, request_id=None):
+        """Отмена запроса (None - всех незавершенных)"""
+        targets = list(self.in_flight) if request_id is None else [request_id]
+        restart = False
+        for target in targets:
+            slot = self.in_flight.get(target)
+            if slot is None:
+                continue
+            self.cancel_flags[slot] = 1
+            if target == self.current:
+                restart = True  # распознавание уже идет: прервать можно только процесс
+        if restart:
+            self.restart()
+
+    def restart(self):
+        """Перезапуск процесса; незавершенные запросы считаются отмененными"""
+        self.restarts += 1
+        self._terminate()
+        self.cancelled += len(self.in_flight)
+        self.in_flight.clear()
+        self.free_slots = list(range(self.n_slots))
+        self.start()
+
+    def _terminate(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2.0)
+        self.process = None
+
+    def poll(self):
+        """Готовые результаты без ожидания: [{'request_id', 'text'}]"""
+        finished = []
+        if self.process is None:
+            return finished
+
+        while True:
+            try:
+                message = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if message['type'] == 'ready':
+                self.is_ready = True
+                self.logger.info("Модель в процессе распознавания загружена")
+            elif message['type'] == 'started':
+                self.current = message['request_id']
+            elif message['type'] == 'result':
+                self.current = None
+                slot = self.in_flight.pop(message['request_id'], None)
+                if slot is not None:
+                    self.free_slots.append(slot)
+                if 'cpu' in message:
+                    get_cpu_budget().record('asr', message['cpu'], message['wall'])
+                if message['cancelled']:
+                    self.cancelled += 1
+                else:
+                    finished.append({'request_id': message['request_id'], 'text': message['text']})
+
+        # Перезапуск не чаще restart_delay, чтобы не зациклиться на ошибке загрузки
+        if (not self.process.is_alive() and not self.stopping
+                and time.monotonic() - self.started_at >= self.restart_delay):
+            self.logger.error(f"Процесс распознавания завершился (код {self.process.exitcode}), перезапуск")
+            self.restart()
+
+        return finished
+
+    def get_stats(self):
+        """Статистика очереди распознавания"""
+        return {
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'cancelled': self.cancelled,
+            'restarts': self.restarts,
+            'in_flight': len(self.in_flight)
+        }
+
+    def stop(self, timeout=5.0):
+        """Остановка процесса и освобождение общей памяти"""
+        self.stopping = True
+        if self.process is not None:
+            for slot in self.in_flight.values():
+                self.cancel_flags[slot] = 1
+            self.requests.put(None)
+            self.process.join(timeout=timeout)
+            self._terminate()
+
+        del self.views
+        for slot in self.slots:
+            slot.close()
+            slot.unlink()
+        self.slots = []
@@ -2,63 +2,112 @@
 Основной интерфейс распознавания речи
 """
 
+import numpy as np
 from .whisper_engine import WhisperEngine
+from .streaming import StreamingTranscriber
 from audio.noise_reduction import NoiseReduction
+from audio.noise_tracker import NoiseFloorTracker
 from audio.vad import VoiceActivityDetector
+from audio.segmenter import UtteranceSegmenter
+from audio.resampler import StreamingResampler
+from audio.beamformer import DelayAndSumBeamformer
 from utils.logger import setup_logger
+from config.audio_config import AUDIO_CONFIG
 
 class SpeechToText:
-    def __init__(self):
+    def __init__(self, sample_rate=16000, channels=1, autoload=True):
         self.logger = setup_logger('speech_to_text')
-        self.whisper_engine = WhisperEngine()
-        self.noise_reducer = NoiseReduction()
-        self.vad = VoiceActivityDetector()
-        self.speech_buffer = []
+        self.whisper_engine = WhisperEngine(autoload=autoload)
+        self.sample_rate = sample_rate      # Формат микрофона
+        self.channels = channels
+        self.asr_rate = AUDIO_CONFIG['asr_rate']
+        
+        # Чанки микрофона приводятся к одному формату: float32, моно, asr_rate.
+        # Два канала складываются формирователем луча вместо простого усреднения
+        self.beamformer = None
+        if channels == 2 and AUDIO_CONFIG['beamforming']:
+            self.beamformer = DelayAndSumBeamformer(self.asr_rate)
+        self.resampler = StreamingResampler(sample_rate, self.asr_rate, channels,
+                                            downmix=self.beamformer is None)
+        
+        # Одна оценка фонового шума на VAD и шумоподавитель
+        self.noise_tracker = NoiseFloorTracker()
+        self.noise_reducer = NoiseReduction(noise_tracker=self.noise_tracker)
+        self.vad = VoiceActivityDetector(sample_rate=self.asr_rate, noise_tracker=self.noise_tracker)
+        self.segmenter = UtteranceSegmenter(self.vad, self.asr_rate, 1)
         self.is_listening = False
+        
+        # Потоковое шумоподавление: фраза очищена к моменту ее окончания
+        self.streaming_denoise = (AUDIO_CONFIG['noise_reduction']
+                                  and AUDIO_CONFIG.get('denoise_mode') == 'streaming')
+    
+    def segment_audio_chunk(self, audio_chunk):
+        """Сегментация потока: возвращает аудио фразы сразу после ее окончания"""
+        try:
+            audio_chunk = self.resampler.process(audio_chunk)
+            if len(audio_chunk) == 0:
+                return None
+            if self.beamformer is not None:
+                audio_chunk = self.beamformer.process(audio_chunk)
+            
+            is_speech = self.segmenter.is_speech(audio_chunk)
+            
+            if self.streaming_denoise:
+                # Спектр шума обновляется только по чанкам без речи
+                audio_chunk = self.noise_reducer.process_chunk(audio_chunk, update_noise=not is_speech)
+            elif not is_speech:
+                self.noise_tracker.update_audio(audio_chunk)
+            
+            utterance = self.segmenter.process_chunk(audio_chunk, is_speech)
+            
+            if self.segmenter.in_speech and not self.is_listening:
+                self.logger.info("🎤 Начало речи обнаружено")
+            self.is_listening = self.segmenter.in_speech
+            
+            return utterance
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка сегментации аудио: {e}")
+            return None
     
     def process_audio_chunk(self, audio_chunk):
-        """Обработка аудиочанка"""
+        """Обработка аудиочанка: распознавание запускается концом фразы"""
         try:
-            # Детекция речи
-            speech_state = self.vad.detect_speech(audio_chunk)
-            
-            if speech_state in ["start", "continue"]:
-                if not self.is_listening:
-                    self.is_listening = True
-                    self.speech_buffer = []
-                    self.logger.info("🎤 Начало речи обнаружено")
-                
-                # Подавление шума
-                clean_audio = self.noise_reducer.reduce_noise_simple(audio_chunk)
-                self.speech_buffer.append(clean_audio)
-                
-            elif speech_state == "end" and self.is_listening:
-                self.is_listening = False
-                if self.speech_buffer:
-                    # Объединение буфера в один массив
-                    full_audio = np.concatenate(self.speech_buffer)
-                    text = self.transcribe(full_audio)
-                    self.speech_buffer = []
-                    return text
+            utterance = self.segment_audio_chunk(audio_chunk)
+            if utterance is None:
+                return ""
             
-            return ""
+            self.logger.info(f"Конец речи: фраза {len(utterance) / self.asr_rate:.1f} сек")
+            return self.transcribe(utterance)
             
         except Exception as e:
             self.logger.error(f"Ошибка обработки аудио: {e}")
             return ""
     
+    def clean_utterance(self, audio_data):
+        """Шумоподавление фразы перед распознаванием"""
+        if self.streaming_denoise or not AUDIO_CONFIG['noise_reduction']:
+            # Аудио уже очищено по чанкам при сегментации (или шумоподавление выключено)
+            return audio_data
+        
+        # Калибровка шума по фону между фразами, а не по началу речи
+        if self.noise_tracker.is_ready:
+            # Средний модуль отсчета шума в единицах аудио, как в calibrate_noise
+            self.noise_reducer.noise_profile = self.noise_tracker.floor_rms * np.sqrt(2 / np.pi)
+            self.noise_reducer.is_calibrated = True
+        elif not self.noise_reducer.is_calibrated:
+            self.noise_reducer.calibrate_noise(audio_data)
+        
+        # Подавление шума
+        return self.noise_reducer.spectral_gating(audio_data)
+    
     def transcribe(self, audio_data):
         """Транскрибация аудио в текст"""
         try:
             if len(audio_data) == 0:
                 return ""
             
-            # Калибровка шума 
-            if not self.noise_reducer.is_calibrated:
-                self.noise_reducer.calibrate_noise(audio_data)
-            
-            # Подавление шума
-            clean_audio = self.noise_reducer.spectral_gating(audio_data)
+            clean_audio = self.clean_utterance(audio_data)
             
             # Распознавание речи
             text = self.whisper_engine.transcribe_audio(clean_audio)
@@ -69,5 +118,56 @@ class SpeechToText:
             return ""
     
     def real_time_transcription(self, audio_stream):
-        """Режим реального времени"""
-        pass
\ No newline at end of file
+        """Режим реального времени: генератор промежуточных и итоговых результатов
+
+        audio_stream - итерируемый поток чанков микрофона. Пока фраза
+        произносится, выдаются словари {'type': 'partial', 'text', 'committed',
+        'pending'}; по концу фразы - {'type': 'final', 'text', 'audio'}.
+        """
+        streamer = StreamingTranscriber(self.whisper_engine, self.asr_rate)
+        fed_chunks = 0   # Сколько чанков текущей фразы передано распознавателю
+        fed_samples = 0
+        
+        for audio_chunk in audio_stream:
+            if audio_chunk is None:
+                continue
+            
+            was_in_speech = self.segmenter.in_speech
+            utterance = self.segment_audio_chunk(audio_chunk)
+            
+            if utterance is not None:
+                # Конец фразы: остаток аудио и окончательная гипотеза
+                streamer.insert_audio(utterance[fed_samples:])
+                text = streamer.finish()
+                streamer.reset()
+                fed_chunks = fed_samples = 0
+                if text:
+                    yield {'type': 'final', 'text': text, 'audio': utterance}
+                continue
+            
+            if not self.segmenter.in_speech:
+                if was_in_speech:
+                    # Фраза отброшена сегментатором как слишком короткая
+                    streamer.reset()
+                    fed_chunks = fed_samples = 0
+                continue
+            
+            # Фраза продолжается: новые чанки сегментатора (с pre-roll в начале)
+            for chunk in self.segmenter.speech_chunks[fed_chunks:]:
+                streamer.insert_audio(chunk)
+                fed_samples += len(chunk)
+            fed_chunks = len(self.segmenter.speech_chunks)
+            
+            update = streamer.process_iter()
+            if update is None:
+                continue
+            newly_committed, pending = update
+            if newly_committed or pending:
+                committed = streamer.committed_text()
+                pending_text = streamer.pending_text()
+                yield {
+                    'type': 'partial',
+                    'text': f"{committed} {pending_text}".strip(),
+                    'committed': committed,
+                    'pending': pending_text
+                }
\ No newline at end of file
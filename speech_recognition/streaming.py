@@ -0,0 +1,126 @@
+"""
+Потоковое распознавание: скользящее окно и подтверждение устойчивых слов
+"""
+
+import re
+import numpy as np
+from config.model_config import MODEL_CONFIG
+from config.audio_config import AUDIO_CONFIG
+
+def _normalize_word(word):
+    """Слово для сравнения гипотез: без регистра и пунктуации"""
+    return re.sub(r'[^\w]', '', word.lower())
+
+class StreamingTranscriber:
+    """Повторное декодирование растущего окна с фиксацией устойчивого префикса
+
+    Каждые hop секунд нового аудио окно заново распознается Whisper с
+    временными метками слов. Слово фиксируется, когда две подряд идущие
+    гипотезы совпадают на нем (общий префикс, LocalAgreement-2):
+    зафиксированные слова больше не меняются, остаток гипотезы показывается
+    как предварительный. Когда окно длиннее window секунд, аудио до конца
+    последнего зафиксированного слова отбрасывается, поэтому стоимость
+    декодирования не растет с длиной фразы.
+    """
+
+    def __init__(self, whisper_engine, sample_rate=None, hop=None, window=None, prompt_words=None):
+        self.whisper_engine = whisper_engine
+        self.sample_rate = sample_rate or AUDIO_CONFIG['asr_rate']
+        self.hop_samples = int((hop or MODEL_CONFIG['stream_hop']) * self.sample_rate)
+        self.window_samples = int((window or MODEL_CONFIG['stream_window']) * self.sample_rate)
+        self.prompt_words = prompt_words or MODEL_CONFIG['stream_prompt_words']
+        self.reset()
+
+    def reset(self):
+        """Сброс перед новой фразой"""
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0    # Время начала буфера от начала фразы (сек)
+        self.committed = []         # Зафиксированные слова: (слово, начало, конец)
+        self.hypothesis = []        # Незафиксированный хвост предыдущей гипотезы
+        self.new_samples = 0
+
+    def insert_audio(self, audio):
+        """Добавление аудио float32 моно с частотой sample_rate"""
+        self.buffer = np.concatenate((self.buffer, audio.astype(np.float32, copy=False)))
+        self.new_samples += len(audio)
+
+    def _committed_end(self):
+        return self.committed[-1][2] if self.committed else 0.0
+
+    def _decode(self):
+        """Гипотеза по текущему окну: слова после зафиксированной части"""
+        prompt = ' '.join(word for word, _, _ in self.committed[-self.prompt_words:])
+        words = self.whisper_engine.transcribe_words(self.buffer, prompt=prompt or None)
+        words = [(word, start + self.buffer_offset, end + self.buffer_offset) for word, start, end in words]
+
+        # Слова, начавшиеся до конца зафиксированной части, уже учтены
+        committed_end = self._committed_end()
+        words = [item for item in words if item[1] > committed_end - 0.1]
+
+        # Повтор последних зафиксированных слов на стыке (до 5 слов)
+        if self.committed and words:
+            tail = [_normalize_word(word) for word, _, _ in self.committed[-5:]]
+            head = [_normalize_word(word) for word, _, _ in words[:5]]
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    words = words[size:]
+                    break
+        return words
+
+    def _trim(self):
+        """Отбрасывание аудио до конца последнего зафиксированного слова"""
+        if len(self.buffer) <= self.window_samples:
+            return
+        cut_time = self._committed_end()
+        if cut_time <= self.buffer_offset:
+            # Нечего фиксировать: окно сдвигается принудительно, слова до
+            # точки среза фиксируются по последней гипотезе
+            cut_time = self.buffer_offset + (len(self.buffer) - self.window_samples // 2) / self.sample_rate
+            forced = [item for item in self.hypothesis if item[2] <= cut_time]
+            self.committed.extend(forced)
+            self.hypothesis = self.hypothesis[len(forced):]
+            # Незафиксированное слово не разрезается: срез - до его начала
+            if self.hypothesis and self.hypothesis[0][1] > self.buffer_offset:
+                cut_time = min(cut_time, self.hypothesis[0][1])
+
+        cut = int((cut_time - self.buffer_offset) * self.sample_rate)
+        cut = max(0, min(cut, len(self.buffer)))
+        self.buffer = self.buffer[cut:]
+        self.buffer_offset += cut / self.sample_rate
+
+    def process_iter(self):
+        """Декодирование, если накопился hop нового аудио
+
+        Возвращает (новые зафиксированные слова, предварительный хвост)
+        или None, если декодировать еще рано.
+        """
+        if self.new_samples < self.hop_samples:
+            return None
+        self.new_samples = 0
+
+        words = self._decode()
+
+        # Общий префикс предыдущей и текущей гипотез
+        agreed = 0
+        while (agreed < len(words) and agreed < len(self.hypothesis)
+               and _normalize_word(words[agreed][0]) == _normalize_word(self.hypothesis[agreed][0])):
+            agreed += 1
+
+        newly_committed = words[:agreed]
+        self.committed.extend(newly_committed)
+        self.hypothesis = words[agreed:]
+        self._trim()
+        return newly_committed, self.hypothesis
+
+    def finish(self):
+        """Конец фразы: последняя гипотеза фиксируется целиком"""
+        if len(self.buffer) > 0:
+            self.committed.extend(self._decode())
+        self.hypothesis = []
+        return self.committed_text()
+
+    def committed_text(self):
+        return ' '.join(word for word, _, _ in self.committed).strip()
+
+    def pending_text(self):
+        return ' '.join(word for word, _, _ in self.hypothesis).strip()
@@ -2,46 +2,260 @@
 Движок распознавания речи на основе Whisper
 """
 
+import os
+import hashlib
+import platform
+import threading
+from collections import OrderedDict
 import whisper
 import numpy as np
 import torch
-from config.model_config import MODEL_CONFIG
+from config.model_config import MODEL_CONFIG, DECODING_PROFILES
+from audio.resampler import resample_audio
+from utils.helpers import ensure_dir
 
 class WhisperEngine:
-    def __init__(self):
+    def __init__(self, autoload=True):
         self.model = None
+        self.tokenizer = None
         self.config = MODEL_CONFIG
-        self.load_model()
+        self.profile = DECODING_PROFILES[self.config.get('decoding_profile', 'latency')]
+        self.stats = {'decoded': 0, 'no_speech_exits': 0, 'fallbacks': 0,
+                      'cache_hits': 0, 'cache_misses': 0, 'silent_windows': 0}
+        
+        # Кэш результатов по отпечатку аудио: повторно прочитанное окно не распознается заново
+        self.cache = OrderedDict()
+        self.cache_size = self.config.get('asr_cache_size', 64)
+        self.cache_lock = threading.Lock()
+        self.last_from_cache = False
+        if autoload:
+            self.load_model()
     
     def load_model(self):
         """Загрузка модели Whisper"""
         try:
             print("Загрузка модели Whisper")
-            self.model = whisper.load_model(self.config['whisper_model'])
-            print(f"Модель Whisper '{self.config['whisper_model']}' загружена")
+            if self.config.get('whisper_quantize') and not torch.cuda.is_available():
+                model = self._load_quantized_model(self.config['whisper_model'])
+                print(f"Модель Whisper '{self.config['whisper_model']}' загружена (int8)")
+            else:
+                model = whisper.load_model(self.config['whisper_model'])
+                print(f"Модель Whisper '{self.config['whisper_model']}' загружена")
+            
+            tokenizer_args = {'num_languages': model.num_languages} if hasattr(model, 'num_languages') else {}
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual,
+                language=self.config['whisper_language'],
+                task='transcribe',
+                **tokenizer_args
+            )
+            
+            # Модель считается загруженной (self.model) только вместе с токенизатором
+            self.tokenizer = tokenizer
+            self.model = model
         except Exception as e:
             print(f"Ошибка загрузки модели Whisper: {e}")
     
-    def transcribe_audio(self, audio_data, sample_rate=16000):
-        """Транскрибация аудио в текст"""
+    @staticmethod
+    def _quantize(model):
+        """Динамическое int8 квантование линейных слоев модели
+
+        Слои Whisper - подкласс nn.Linear, а quantize_dynamic заменяет только
+        точный тип nn.Linear, поэтому сначала они заменяются обычными.
+        """
+        for module in list(model.modules()):
+            for name, child in module.named_children():
+                if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                    linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                    linear.load_state_dict(child.state_dict())
+                    setattr(module, name, linear)
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def _load_quantized_model(self, model_name):
+        """int8 модель для CPU: из кэша на диске или квантованием float модели"""
+        if platform.machine().startswith(('arm', 'aarch64')) and 'qnnpack' in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = 'qnnpack'
+
+        cache_dir = self.config.get('model_cache_dir', 'data/models')
+        cache_path = os.path.join(cache_dir, f"whisper-{model_name}-int8.pt")
+
+        if os.path.exists(cache_path):
+            try:
+                checkpoint = torch.load(cache_path, map_location='cpu', weights_only=False)
+                if checkpoint.get('torch_version') == torch.__version__:
+                    # Каркас модели квантуется без весов, затем загружаются int8 веса
+                    model = whisper.model.Whisper(whisper.model.ModelDimensions(**checkpoint['dims']))
+                    model = self._quantize(model)
+                    model.load_state_dict(checkpoint['state_dict'])
+                    if model_name in whisper._ALIGNMENT_HEADS:
+                        model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_name])
+                    return model.eval()
+                print("Кэш квантованной модели создан другой версией torch, повторное квантование")
+            except Exception as e:
+                print(f"Ошибка чтения кэша квантованной модели: {e}")
+
+        model = whisper.load_model(model_name, device='cpu')
+        model = self._quantize(model).eval()
+
+        try:
+            ensure_dir(cache_dir)
+            torch.save({
+                'dims': vars(model.dims),
+                'state_dict': model.state_dict(),
+                'torch_version': torch.__version__
+            }, cache_path)
+            print(f"Квантованная модель сохранена: {cache_path}")
+        except Exception as e:
+            print(f"Ошибка сохранения квантованной модели: {e}")
+
+        return model
+
+    def warm_up(self):
+        """Пробное распознавание: первый реальный запрос не платит за инициализацию"""
+        if self.model is None:
+            return
+        # Тихий шум вместо нулей, чтобы пройти весь путь декодирования
+        audio = np.random.default_rng(0).normal(0, 0.003, 16000).astype(np.float32)
+        self._decode_segment(audio, early_exit=False)
+    
+    def _transcribe_options(self):
+        """Параметры model.transcribe из профиля декодирования"""
+        profile = self.profile
+        return {
+            'language': self.config['whisper_language'],
+            'fp16': torch.cuda.is_available(),  # Использовать FP16 если есть GPU
+            'beam_size': profile['beam_size'],
+            'temperature': profile['temperatures'],
+            'condition_on_previous_text': profile['condition_on_previous_text'],
+            'sample_len': profile['max_tokens'],
+            'no_speech_threshold': profile['no_speech_threshold'],
+            'logprob_threshold': profile['logprob_threshold'],
+            'compression_ratio_threshold': profile['compression_ratio_threshold']
+        }
+    
+    def _decode_segment(self, audio_float, early_exit=None):
+        """Распознавание фрагмента до 30 сек по профилю декодирования
+
+        Энкодер запускается один раз. Вероятность "нет речи" берется из
+        первого шага декодера, и при шуме оборудования текст не декодируется.
+        Признаки энкодера переиспользуются при повторах с другой температурой.
+        """
+        profile = self.profile
+        early_exit = profile['early_exit'] if early_exit is None else early_exit
+        fp16 = torch.cuda.is_available()
+        model = self.model
+        
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio_float), n_mels=model.dims.n_mels)
+        mel = mel.to(model.device)
+        if fp16:
+            mel = mel.half()
+        
+        with torch.no_grad():
+            audio_features = model.embed_audio(mel.unsqueeze(0))
+            
+            if early_exit and self.tokenizer.no_speech is not None:
+                tokens = torch.tensor([list(self.tokenizer.sot_sequence)], device=model.device)
+                logits = model.logits(tokens, audio_features)
+                no_speech_prob = logits[:, 0].float().softmax(dim=-1)[0, self.tokenizer.no_speech].item()
+                if no_speech_prob > profile['no_speech_threshold']:
+                    self.stats['no_speech_exits'] += 1
+                    return ""
+            
+            result = None
+            for temperature in profile['temperatures']:
+                options = whisper.DecodingOptions(
+                    task='transcribe',
+                    language=self.config['whisper_language'],
+                    temperature=temperature,
+                    sample_len=profile['max_tokens'],
+                    beam_size=profile['beam_size'] if temperature == 0 else None,
+                    best_of=5 if temperature > 0 else None,
+                    without_timestamps=True,
+                    fp16=fp16
+                )
+                result = whisper.decode(model, audio_features, options)[0]
+                self.stats['decoded'] += 1
+                
+                if (result.no_speech_prob > profile['no_speech_threshold']
+                        and result.avg_logprob < profile['logprob_threshold']):
+                    return ""  # тишина по правилу самой библиотеки
+                if (result.compression_ratio <= profile['compression_ratio_threshold']
+                        and result.avg_logprob >= profile['logprob_threshold']):
+                    break
+                self.stats['fallbacks'] += 1
+        
+        return result.text.strip() if result is not None else ""
+    
+    @staticmethod
+    def audio_fingerprint(audio_data, sample_rate):
+        """Быстрый отпечаток буфера аудио (blake2b по сырым байтам)"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{audio_data.dtype.str}:{audio_data.shape[1:]}:{sample_rate}:".encode())
+        digest.update(np.ascontiguousarray(audio_data).data)
+        return digest.digest()
+    
+    def transcribe_audio(self, audio_data, sample_rate=16000, use_cache=True):
+        """Транскрибация аудио в текст
+        
+        Тишина из нулей (в том числе заглушка при ошибке чтения) и уже
+        распознанные окна возвращаются без запуска модели; признак
+        last_from_cache позволяет не выдавать повторное оповещение.
+        Многоканальное аудио - массив [сэмплы, каналы], сводится в моно.
+        """
+        self.last_from_cache = False
         if self.model is None:
             return ""
         
+        if not np.any(audio_data):
+            self.stats['silent_windows'] += 1
+            self.last_from_cache = True
+            return ""
+        
+        key = None
+        if use_cache and self.cache_size > 0:
+            key = self.audio_fingerprint(audio_data, sample_rate)
+            with self.cache_lock:
+                text = self.cache.get(key)
+                if text is not None:
+                    self.cache.move_to_end(key)
+                    self.stats['cache_hits'] += 1
+                    self.last_from_cache = True
+                    return text
+                self.stats['cache_misses'] += 1
+        
+        text = self._transcribe_uncached(audio_data, sample_rate)
+        if text is None:
+            return ""  # ошибка не кэшируется
+        
+        if key is not None:
+            with self.cache_lock:
+                self.cache[key] = text
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return text
+    
+    def _transcribe_uncached(self, audio_data, sample_rate):
+        """Распознавание без кэша"""
         try:
             # Конвертация в float32 для Whisper
             if audio_data.dtype == np.int16:
                 audio_float = audio_data.astype(np.float32) / 32768.0
             else:
                 audio_float = audio_data.astype(np.float32)
+            # Многоканальная запись [сэмплы, каналы] - в моно
+            if audio_float.ndim > 1:
+                audio_float = audio_float.mean(axis=1)
             
-            # Транскрибация
-            result = self.model.transcribe(
-                audio_float,
-                language=self.config['whisper_language'],
-                fp16=torch.cuda.is_available()  # Использовать FP16 если есть GPU
-            )
+            # Whisper работает только на 16 кГц
+            if sample_rate != 16000:
+                audio_float = resample_audio(audio_float, sample_rate, 16000)
+            
+            # Транскрибация: фраза до 30 сек декодируется одним окном
+            if len(audio_float) <= whisper.audio.N_SAMPLES:
+                text = self._decode_segment(audio_float)
+            else:
+                text = self.model.transcribe(audio_float, **self._transcribe_options())["text"].strip()
             
-            text = result["text"].strip()
             if text:
                 print(f"Распознано: {text}")
             
@@ -49,8 +263,39 @@ class WhisperEngine:
             
         except Exception as e:
             print(f"Ошибка транскрибации: {e}")
-            return ""
+            return None
     
+    def transcribe_words(self, audio_float, prompt=None):
+        """Слова с временными метками для потокового распознавания
+
+        Возвращает список (слово, начало, конец) в секундах от начала
+        audio_float (float32, 16 кГц).
+        """
+        if self.model is None or len(audio_float) == 0:
+            return []
+
+        try:
+            options = self._transcribe_options()
+            options.update(
+                word_timestamps=True,
+                initial_prompt=prompt,
+                condition_on_previous_text=False,
+                temperature=0.0  # без повторных попыток: окно все равно будет перераспознано
+            )
+            result = self.model.transcribe(audio_float, **options)
+
+            words = []
+            for segment in result.get("segments", []):
+                for word in segment.get("words", []):
+                    text = word["word"].strip()
+                    if text:
+                        words.append((text, float(word["start"]), float(word["end"])))
+            return words
+
+        except Exception as e:
+            print(f"Ошибка потоковой транскрибации: {e}")
+            return []
+
     def get_transcription_with_timestamps(self, audio_data):
         """Транскрибация с временными метками"""
         try:
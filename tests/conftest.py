@@ -0,0 +1,15 @@
+"""
+Общие настройки тестов
+"""
+
+import os
+import tempfile
+
+def pytest_configure(config):
+    """Рабочий каталог с logs/: логгер пишет файлы относительно текущего каталога
+
+    Каталог наследуют и процессы, запускаемые тестами (spawn).
+    """
+    work_dir = tempfile.mkdtemp(prefix='nosiomy_tests_')
+    os.makedirs(os.path.join(work_dir, 'logs'))
+    os.chdir(work_dir)
@@ -0,0 +1,440 @@
+"""
+Тесты аудиоконвейера на синтетических сигналах
+"""
+
+import numpy as np
+import pytest
+from config.audio_config import AUDIO_CONFIG
+from audio.resampler import StreamingResampler, resample_audio
+
+def rms(audio):
+    return float(np.sqrt(np.mean(np.asarray(audio, dtype=np.float64) ** 2)))
+
+@pytest.mark.parametrize('in_rate, channels', [(48000, 1), (44100, 2), (16000, 2)])
+def test_resampler_streaming_equals_whole_buffer(in_rate, channels):
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(in_rate * channels) * 8000).astype(np.int16)
+
+    whole = StreamingResampler(in_rate, 16000, channels).process(audio)
+
+    streaming = StreamingResampler(in_rate, 16000, channels)
+    chunk = 1021 * channels  # размер чанка не кратен коэффициенту передискретизации
+    parts = [streaming.process(audio[i:i + chunk]) for i in range(0, len(audio), chunk)]
+
+    np.testing.assert_allclose(np.concatenate(parts), whole, atol=1e-5)
+    assert whole.dtype == np.float32
+
+@pytest.mark.parametrize('in_rate', [48000, 44100, 22050])
+def test_resample_audio_keeps_tone_and_removes_aliases(in_rate):
+    t = np.arange(in_rate) / in_rate
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    out = resample_audio(tone, in_rate, 16000)
+
+    assert out.dtype == np.float32
+    assert abs(len(out) - 16000) <= 1
+    spectrum = np.abs(np.fft.rfft(out[:16000] * np.hanning(16000)))
+    assert np.argmax(spectrum) == pytest.approx(440, abs=2)  # 1 Гц на отсчет
+    assert rms(out[1000:-1000]) == pytest.approx(0.5 / np.sqrt(2), rel=0.05)
+
+    # Выше новой частоты Найквиста (8 кГц) сигнал подавляется, а не заворачивается
+    alias = (0.5 * np.sin(2 * np.pi * 10000 * t)).astype(np.float32)
+    assert rms(resample_audio(alias, in_rate, 16000)[1000:-1000]) < 0.05 * rms(alias)
+
+def test_clean_utterance_keeps_tone(monkeypatch):
+    monkeypatch.setitem(AUDIO_CONFIG, 'noise_reduction', True)
+    monkeypatch.setitem(AUDIO_CONFIG, 'denoise_mode', 'utterance')
+    from speech_recognition.speech_to_text import SpeechToText
+
+    stt = SpeechToText(16000, 1, autoload=False)
+    rng = np.random.default_rng(1)
+    noise = (rng.standard_normal(16000) * 0.01).astype(np.float32)
+    stt.noise_tracker.update_audio(noise)
+    assert stt.noise_tracker.is_ready
+
+    t = np.arange(16000) / 16000
+    utterance = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32) + noise
+    clean = stt.clean_utterance(utterance)
+
+    assert clean.dtype == np.float32
+    assert rms(clean) > 0.8 * rms(utterance)
+
+def test_whisper_downmixes_stereo_before_resampling():
+    from speech_recognition.whisper_engine import WhisperEngine
+
+    engine = WhisperEngine(autoload=False)
+    engine.model = object()
+    decoded = []
+    engine._decode_segment = lambda audio: decoded.append(audio) or "текст"
+
+    # 1 сек стерео 48 кГц: тон в левом канале, тишина в правом
+    t = np.arange(48000) / 48000
+    left = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+    stereo = np.stack((left, np.zeros_like(left)), axis=1)
+
+    assert engine.transcribe_audio(stereo, sample_rate=48000) == "текст"
+    audio = decoded[0]
+    assert audio.ndim == 1
+    assert abs(len(audio) - 16000) <= 1
+    assert rms(audio[1000:-1000]) == pytest.approx(0.25 / np.sqrt(2), rel=0.05)
+
+def test_whisper_not_loaded_without_tokenizer(monkeypatch):
+    import whisper
+    from config.model_config import MODEL_CONFIG
+    from speech_recognition.whisper_engine import WhisperEngine
+
+    class Model:
+        is_multilingual = True
+
+    def broken_tokenizer(*args, **kwargs):
+        raise OSError("нет файла словаря")
+
+    monkeypatch.setitem(MODEL_CONFIG, 'whisper_quantize', False)
+    monkeypatch.setattr(whisper, 'load_model', lambda name: Model())
+    monkeypatch.setattr(whisper.tokenizer, 'get_tokenizer', broken_tokenizer)
+
+    engine = WhisperEngine()
+    assert engine.model is None
+    assert engine.tokenizer is None
+    assert engine.transcribe_audio(np.ones(16000, dtype=np.int16)) == ""
+
+def delayed_pair(delay, n_samples=32000, noise=0.05, seed=2):
+    """Два канала одного источника: второй отстает на delay сэмплов"""
+    rng = np.random.default_rng(seed)
+    source = rng.standard_normal(n_samples + 64).astype(np.float32) * 0.2
+    first = source[32:32 + n_samples]
+    second = source[32 - delay:32 - delay + n_samples]
+    pair = np.stack((first, second), axis=1)
+    pair += rng.standard_normal(pair.shape).astype(np.float32) * noise
+    return pair, first
+
+@pytest.mark.parametrize('delay', [-6, -1, 0, 3, 7])
+def test_gcc_phat_recovers_delay(delay):
+    from audio.beamformer import DelayAndSumBeamformer
+
+    beamformer = DelayAndSumBeamformer(16000)
+    assert abs(delay) <= beamformer.max_lag
+    pair, _ = delayed_pair(delay)
+    for i in range(0, len(pair), 512):
+        beamformer.process(pair[i:i + 512])
+    assert beamformer.delay == delay
+
+def test_beamformer_output_is_coherent_sum():
+    from audio.beamformer import DelayAndSumBeamformer
+
+    delay = 5
+    beamformer = DelayAndSumBeamformer(16000)
+    pair, first = delayed_pair(delay)
+    output = np.concatenate([beamformer.process(pair[i:i + 512]) for i in range(0, len(pair), 512)])
+
+    # После выравнивания выход - источник, задержанный на delay (первый канал ждет второй)
+    tail = slice(len(output) // 2, None)
+    aligned = np.roll(first, delay)[tail]
+    correlation = np.corrcoef(output[tail], aligned)[0, 1]
+    assert correlation > 0.95
+    # Независимый шум каналов усредняется: выход чище любого канала
+    assert rms(output[tail] - aligned) < rms(pair[tail, 0] - first[tail])
+
+CHUNK = 1600    # 0.1 сек при 16 кГц
+
+def numbered_chunk(number):
+    """Чанк, все отсчеты которого равны его номеру (видно, какие чанки попали во фразу)"""
+    return np.full(CHUNK, number, dtype=np.int16)
+
+def run_segmenter(segmenter, pattern):
+    """pattern - решения VAD по чанкам; -> [(номер чанка, на котором фраза закончилась, номера чанков фразы)]"""
+    utterances = []
+    for number, speech in enumerate(pattern, start=1):
+        utterance = segmenter.process_chunk(numbered_chunk(number), is_speech=speech)
+        if utterance is not None:
+            utterances.append((number, sorted(set(utterance[::CHUNK].tolist()))))
+    return utterances
+
+def make_segmenter(**kwargs):
+    from audio.segmenter import UtteranceSegmenter
+    options = dict(pre_roll=0.3, hangover=0.5, min_duration=0.2, max_duration=15)
+    options.update(kwargs)
+    return UtteranceSegmenter(vad=None, sample_rate=16000, **options)
+
+def test_segmenter_pre_roll_and_hangover():
+    # 5 чанков тишины, 5 речи, 5 тишины
+    pattern = [False] * 5 + [True] * 5 + [False] * 6
+    utterances = run_segmenter(make_segmenter(), pattern)
+
+    # Фраза с 0.3 сек pre-roll (чанки 3-5) закрывается на 5-м чанке тишины (0.5 сек hang-over)
+    assert utterances == [(15, list(range(3, 16)))]
+
+def test_segmenter_short_pause_does_not_split():
+    pattern = [True] * 4 + [False] * 3 + [True] * 4 + [False] * 5
+    utterances = run_segmenter(make_segmenter(), pattern)
+    assert utterances == [(16, list(range(1, 17)))]
+
+def test_segmenter_splits_at_max_duration():
+    segmenter = make_segmenter(max_duration=1.0)
+    utterances = run_segmenter(segmenter, [True] * 25)
+
+    assert utterances == [(10, list(range(1, 11))), (20, list(range(11, 21)))]
+    rest = segmenter.flush()
+    assert sorted(set(rest[::CHUNK].tolist())) == list(range(21, 26))
+
+def test_segmenter_drops_clicks_shorter_than_min_duration():
+    pattern = [False] * 3 + [True] + [False] * 6
+    assert run_segmenter(make_segmenter(), pattern) == []
+
+def test_noise_reduction_stream_reconstructs_without_profile():
+    from audio.noise_reduction import NoiseReduction
+
+    reducer = NoiseReduction(frame_size=512)
+    rng = np.random.default_rng(3)
+    audio = (rng.standard_normal(16000) * 0.2).astype(np.float32)
+    output = np.concatenate([reducer.process_chunk(audio[i:i + 700]) for i in range(0, len(audio), 700)])
+
+    # Без спектра шума overlap-add восстанавливает вход с задержкой в полкадра
+    delay = reducer.frame_size - reducer.hop
+    assert len(audio) - len(output) < reducer.frame_size
+    np.testing.assert_allclose(output[delay:], audio[:len(output) - delay], atol=1e-5)
+
+def test_noise_reduction_suppresses_learned_noise_keeps_tone():
+    from audio.noise_reduction import NoiseReduction
+
+    reducer = NoiseReduction(frame_size=512)
+    rng = np.random.default_rng(4)
+    noise = (rng.standard_normal(64000) * 0.02).astype(np.float32)
+    stream = lambda audio, **kwargs: np.concatenate(
+        [reducer.process_chunk(audio[i:i + 1600], **kwargs) for i in range(0, len(audio), 1600)])
+
+    stream(noise[:16000], update_noise=True)
+    # Дальше тот же шум подавляется
+    suppressed = stream(noise[16000:32000])
+    assert rms(suppressed[1600:]) < 0.5 * rms(noise[16000:32000])
+
+    # Тон поверх шума сохраняется
+    t = np.arange(32000) / 16000
+    tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    output = stream(tone + noise[32000:])
+    steady = output[3200:]
+    assert rms(steady) == pytest.approx(rms(tone), rel=0.1)
+    spectrum = np.abs(np.fft.rfft(steady[:16000] * np.hanning(16000)))
+    assert np.argmax(spectrum) == pytest.approx(440, abs=2)
+
+def test_noise_tracker_converges_and_follows_level_changes():
+    from audio.noise_tracker import NoiseFloorTracker
+
+    tracker = NoiseFloorTracker(frame_size=512)
+    rng = np.random.default_rng(6)
+
+    def feed(level, seconds):
+        for _ in range(int(seconds * 10)):
+            tracker.update_audio((rng.standard_normal(1600) * level).astype(np.float32))
+
+    feed(0.01, 4)
+    assert tracker.is_ready
+    assert tracker.floor_rms == pytest.approx(0.01, rel=0.25)
+
+    # Короткий громкий всплеск (речь, удар) не поднимает оценку шума
+    feed(0.2, 0.3)
+    assert tracker.floor_rms == pytest.approx(0.01, rel=0.25)
+
+    # За окно поиска минимума оценка следует за новым уровнем шума вверх и вниз
+    feed(0.03, 6)
+    assert tracker.floor_rms == pytest.approx(0.03, rel=0.25)
+    feed(0.003, 6)
+    assert tracker.floor_rms == pytest.approx(0.003, rel=0.25)
+
+PHRASE = [("Стоп", 0.2, 0.5), ("насос", 0.6, 1.0), ("на", 1.1, 1.2), ("втором", 1.3, 1.7), ("участке", 1.8, 2.3)]
+
+class ScriptedWordsEngine:
+    """Whisper-заглушка: слова фразы, уже целиком попавшие в окно
+
+    Слово, закончившееся меньше чем за 0.3 сек до конца окна, распознается
+    неуверенно: с искажением, разным при каждом декодировании, как обрезанное
+    слово у настоящей модели.
+    """
+
+    def __init__(self):
+        self.transcriber = None
+        self.prompts = []
+
+    def transcribe_words(self, audio, prompt=None):
+        self.prompts.append(prompt)
+        offset = self.transcriber.buffer_offset
+        window_end = offset + len(audio) / 16000
+        words = []
+        for word, start, end in PHRASE:
+            if start < offset - 0.05 or end > window_end:
+                continue
+            if window_end - end < 0.3:
+                word = word[:-1] + str(len(self.prompts))
+            words.append((word, start - offset, end - offset))
+        return words
+
+def run_streaming(window):
+    from speech_recognition.streaming import StreamingTranscriber
+
+    engine = ScriptedWordsEngine()
+    transcriber = StreamingTranscriber(engine, sample_rate=16000, hop=0.25, window=window)
+    engine.transcriber = transcriber
+
+    history = []
+    for _ in range(12):     # 3 сек аудио чанками по 0.25 сек
+        transcriber.insert_audio(np.zeros(4000, dtype=np.float32))
+        newly, pending = transcriber.process_iter()
+        history.append(([word for word, _, _ in transcriber.committed], newly, pending))
+        assert len(transcriber.buffer) <= transcriber.window_samples + transcriber.hop_samples
+    return transcriber, engine, history
+
+@pytest.mark.parametrize('window', [10.0, 1.0])
+def test_streaming_commits_only_agreed_words(window):
+    transcriber, engine, history = run_streaming(window)
+
+    # Зафиксированное не меняется, только дописывается
+    for (before, _, _), (after, _, _) in zip(history, history[1:]):
+        assert after[:len(before)] == before
+    # Неуверенные варианты слов никогда не фиксируются
+    assert not any(char.isdigit() for committed, _, _ in history for word in committed for char in word)
+    # Первое слово фиксируется не раньше, чем две гипотезы совпали на нем
+    first_commit = next(i for i, (committed, _, _) in enumerate(history) if committed)
+    assert first_commit >= 2
+    assert history[first_commit][1][0][0] == "Стоп"
+
+    assert transcriber.finish() == "Стоп насос на втором участке"
+    # Подсказка для следующего окна - зафиксированные слова
+    assert engine.prompts[-1].startswith("Стоп")
+
+def tiny_whisper():
+    """Whisper со случайными весами и крошечными размерами"""
+    import torch
+    import whisper
+    torch.manual_seed(0)
+    dims = whisper.model.ModelDimensions(n_mels=80, n_audio_ctx=50, n_audio_state=64, n_audio_head=2,
+                                         n_audio_layer=2, n_vocab=200, n_text_ctx=16, n_text_state=64,
+                                         n_text_head=2, n_text_layer=2)
+    model = whisper.model.Whisper(dims)
+    with torch.no_grad():
+        model.decoder.positional_embedding.normal_(0, 0.02)   # создается неинициализированным
+    return model.eval()
+
+def test_whisper_int8_quantization_and_disk_cache(tmp_path, monkeypatch):
+    import copy
+    import torch
+    import whisper
+    from config.model_config import MODEL_CONFIG
+    from speech_recognition.whisper_engine import WhisperEngine
+
+    reference = tiny_whisper()
+    loads = []
+    monkeypatch.setattr(whisper, 'load_model', lambda name, device=None: loads.append(name) or copy.deepcopy(reference))
+    monkeypatch.setitem(MODEL_CONFIG, 'model_cache_dir', str(tmp_path))
+    engine = WhisperEngine(autoload=False)
+
+    mel = torch.randn(1, 80, 100)
+    tokens = torch.tensor([[1, 2, 3, 4]])
+    with torch.inference_mode():
+        expected = reference(mel, tokens)
+
+    quantized = engine._load_quantized_model('synthetic')
+    assert loads == ['synthetic']
+    assert (tmp_path / 'whisper-synthetic-int8.pt').exists()
+    # Все линейные слои заменены динамически квантованными int8
+    assert not any(type(module) is torch.nn.Linear or isinstance(module, whisper.model.Linear)
+                   for module in quantized.modules())
+    assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in quantized.modules())
+
+    with torch.inference_mode():
+        logits = quantized(mel, tokens)
+    assert torch.allclose(logits, expected, atol=0.1 * float(expected.abs().max()))
+
+    # Повторная загрузка - из кэша на диске, без float модели
+    cached = engine._load_quantized_model('synthetic')
+    assert loads == ['synthetic']
+    with torch.inference_mode():
+        assert torch.equal(cached(mel, tokens), logits)
+
+class NoSpeechModel:
+    """Модель-заглушка: на первом шаге декодера задана вероятность "нет речи" """
+    dims = type('Dims', (), {'n_mels': 80})
+    device = 'cpu'
+    NO_SPEECH = 5
+
+    def __init__(self, no_speech_prob):
+        self.no_speech_prob = no_speech_prob
+        self.encoded = 0
+
+    def embed_audio(self, mel):
+        self.encoded += 1
+        return mel
+
+    def logits(self, tokens, audio_features):
+        import torch
+        probs = torch.full((1, tokens.shape[1], 10), (1 - self.no_speech_prob) / 9)
+        probs[:, :, self.NO_SPEECH] = self.no_speech_prob
+        return probs.log()
+
+@pytest.mark.parametrize('no_speech_prob, early_exit, expected', [
+    (0.9, True, ""),                # шум: выход до декодирования текста
+    (0.1, True, "насос"),           # речь: текст декодируется
+    (0.9, False, "насос"),          # профиль без раннего выхода
+])
+def test_whisper_no_speech_early_exit(monkeypatch, no_speech_prob, early_exit, expected):
+    import types
+    import whisper
+    from speech_recognition.whisper_engine import WhisperEngine
+
+    decoded = []
+    result = types.SimpleNamespace(text=" насос", no_speech_prob=0.0, avg_logprob=-0.1, compression_ratio=1.0)
+    monkeypatch.setattr(whisper, 'decode', lambda model, features, options: decoded.append(options) or [result])
+
+    engine = WhisperEngine(autoload=False)
+    engine.profile = dict(engine.profile, early_exit=early_exit)
+    engine.model = NoSpeechModel(no_speech_prob)
+    engine.tokenizer = types.SimpleNamespace(sot_sequence=(1, 2, 3), no_speech=NoSpeechModel.NO_SPEECH)
+
+    rng = np.random.default_rng(0)
+    audio = (rng.normal(0, 0.01, 16000) * 32767).astype(np.int16)
+    assert engine.transcribe_audio(audio) == expected
+    assert engine.model.encoded == 1         # энкодер запускается один раз
+    assert engine.stats['no_speech_exits'] == int(expected == "")
+    assert len(decoded) == engine.stats['decoded'] == int(expected != "")
+
+def test_whisper_fingerprint_cache():
+    from speech_recognition.whisper_engine import WhisperEngine
+
+    engine = WhisperEngine(autoload=False)
+    engine.model = object()
+    engine.cache_size = 2
+    calls = []
+    replies = iter(["раз", None, "два", "три", "четыре", "пять"])
+    engine._transcribe_uncached = lambda audio, rate: calls.append(rate) or next(replies)
+
+    rng = np.random.default_rng(0)
+    first, second, third = ((rng.normal(0, 0.1, 16000) * 32767).astype(np.int16) for _ in range(3))
+
+    assert engine.transcribe_audio(first) == "раз"
+    assert not engine.last_from_cache
+    # То же окно (копия буфера) - из кэша, модель не запускается
+    assert engine.transcribe_audio(first.copy()) == "раз"
+    assert engine.last_from_cache
+    assert len(calls) == 1
+
+    # Ошибка распознавания не кэшируется: следующий вызов идет в модель
+    assert engine.transcribe_audio(second) == ""
+    assert engine.transcribe_audio(second) == "два"
+    assert not engine.last_from_cache
+    # Те же байты с другой частотой - другое окно
+    assert engine.transcribe_audio(first, sample_rate=48000) == "три"
+    assert calls == [16000, 16000, 16000, 48000]
+    assert engine.stats['cache_hits'] == 1
+    assert engine.stats['cache_misses'] == 4
+
+    # LRU на cache_size окон: самое старое вытеснено
+    assert engine.transcribe_audio(third) == "четыре"
+    assert len(engine.cache) == 2
+    assert engine.transcribe_audio(first, sample_rate=48000) == "три"
+    assert engine.last_from_cache
+    assert engine.transcribe_audio(second) == "пять"
+    assert not engine.last_from_cache
+
+    # Тишина из нулей - без модели и без записи в кэш
+    assert engine.transcribe_audio(np.zeros(16000, dtype=np.int16)) == ""
+    assert engine.last_from_cache
+    assert engine.stats['silent_windows'] == 1
+    assert len(calls) == 6
@@ -0,0 +1,146 @@
+"""
+Интеграционные тесты: процессы и общая память
+"""
+
+import os
+import time
+import numpy as np
+import pytest
+from speech_recognition.asr_worker import ASRWorker
+
+SAMPLE_RATE = 16000
+
+class EchoEngine:
+    """Движок-заглушка рабочего процесса: описание полученного аудио"""
+
+    def warm_up(self):
+        pass
+
+    def transcribe_audio(self, audio, sample_rate=None):
+        return f"{len(audio)} {float(np.abs(audio).max()):.2f} {sample_rate}"
+
+def make_echo_engine():
+    return EchoEngine()
+
+def wait_results(worker, count, timeout=60.0):
+    """Результаты рабочего процесса с ожиданием"""
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        results.extend(worker.poll())
+        time.sleep(0.01)
+    return results
+
+def test_asr_worker_transcribes_shared_memory_slot():
+    worker = ASRWorker(SAMPLE_RATE, n_slots=2, max_seconds=2, engine_factory=make_echo_engine)
+    worker.start()
+    try:
+        # int16 на входе: в слот пишется float32 [-1, 1]
+        audio = (np.sin(np.arange(SAMPLE_RATE) * 0.05) * 16384).astype(np.int16)
+        request_id = worker.submit(audio)
+        assert request_id is not None
+
+        results = wait_results(worker, 1)
+        assert results == [{'request_id': request_id, 'text': f"{SAMPLE_RATE} 0.50 {SAMPLE_RATE}"}]
+        assert worker.is_ready
+        assert worker.get_stats()['in_flight'] == 0
+        assert len(worker.free_slots) == 2
+    finally:
+        worker.stop()
+
+def test_asr_worker_restarts_dead_process():
+    worker = ASRWorker(SAMPLE_RATE, n_slots=1, max_seconds=1, engine_factory=make_echo_engine)
+    worker.restart_delay = 0.0
+    worker.start()
+    try:
+        assert wait_results(worker, 0) == []
+        worker.process.kill()
+        worker.process.join()
+        worker.poll()
+        assert worker.restarts == 1
+
+        request_id = worker.submit(np.ones(100, dtype=np.float32) * 0.25)
+        assert wait_results(worker, 1) == [{'request_id': request_id, 'text': f"100 0.25 {SAMPLE_RATE}"}]
+    finally:
+        worker.stop()
+
+WHISPER_WEIGHTS = os.path.expanduser('~/.cache/whisper/tiny.pt')
+
+@pytest.mark.skipif(not os.path.exists(WHISPER_WEIGHTS), reason="нет весов Whisper tiny")
+def test_asr_worker_with_whisper():
+    worker = ASRWorker(SAMPLE_RATE, n_slots=1, max_seconds=2)
+    worker.start()
+    try:
+        request_id = worker.submit(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        results = wait_results(worker, 1, timeout=300.0)
+        assert [result['request_id'] for result in results] == [request_id]
+        assert results[0]['text'] == ""  # тишина не распознается
+    finally:
+        worker.stop()
+
+def test_startup_reports_swallowed_load_errors():
+    from utils.startup import StartupOrchestrator
+
+    class Model:
+        loaded = False
+        warmed = False
+
+        def load_model(self):
+            try:
+                raise OSError("файл модели не найден")
+            except Exception as e:
+                print(f"Ошибка загрузки: {e}")  # как в load_model моделей проекта
+
+        def warm_up(self):
+            self.warmed = True
+
+    broken, healthy = Model(), Model()
+    healthy.load_model = lambda: setattr(healthy, 'loaded', True)
+
+    startup = StartupOrchestrator()
+    startup.register('broken', broken.load_model, broken.warm_up, lambda: broken.loaded)
+    startup.register('healthy', healthy.load_model, healthy.warm_up, lambda: healthy.loaded)
+    startup.start()
+    startup.wait(timeout=5)
+
+    assert not startup.is_ready('broken')
+    assert startup.get_report()['broken']['error']
+    assert not broken.warmed
+    assert startup.is_ready('healthy')
+    assert healthy.warmed
+
+def test_batch_cli_runs_from_fresh_directory(tmp_path, monkeypatch):
+    from batch_transcriber import main
+
+    recordings = tmp_path / 'recordings'
+    recordings.mkdir()
+    workdir = tmp_path / 'work'
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    output = main([str(recordings), '--workers', '1'])
+    assert output == os.path.join(str(recordings), 'transcripts.jsonl')
+    assert os.path.isdir(workdir / 'logs')
+
+def test_archive_evicts_in_chunks(tmp_path):
+    import json
+    from datetime import datetime
+    from audio.utterance_archive import UtteranceArchive
+
+    archive = UtteranceArchive(str(tmp_path), quota_mb=100 / 1024, sample_rate=SAMPLE_RATE, evict_to=0.7)
+    rng = np.random.default_rng(5)
+    for sequence in range(60):
+        audio = (rng.standard_normal(1600) * 0.3).astype(np.float32)
+        archive._write_batch([{'audio': audio, 'text': f'фраза {sequence}', 'critical_level': 1,
+                               'timestamp': datetime(2024, 1, 1, 0, 0, sequence), 'sequence': sequence}])
+
+    stats = archive.get_stats()
+    assert archive.total_bytes <= archive.quota_bytes
+    assert stats['evicted'] > 0
+    # Каждое очищение освобождает 30% квоты (несколько файлов), а не один файл
+    assert stats['index_rewrites'] * 4 <= stats['evicted']
+
+    with open(archive.index_path, encoding='utf-8') as f:
+        indexed = [json.loads(line)['file'] for line in f]
+    on_disk = sorted(name for name in os.listdir(tmp_path) if name.endswith('.wav.gz'))
+    assert indexed == on_disk == [name for name, _ in archive.files]
@@ -0,0 +1,307 @@
+"""
+Тесты семантического анализа без загрузки нейросетевых моделей
+"""
+
+import pytest
+from nlp import keyword_automaton
+from nlp.keyword_automaton import KeywordAutomaton, get_keyword_automaton
+
+needs_morph = pytest.mark.skipif(keyword_automaton.pymorphy is None, reason="нет pymorphy")
+
+def found(text, automaton=None):
+    """Канонические фразы и совпавший текст"""
+    automaton = automaton or get_keyword_automaton()
+    return [(match[4], match[5]) for match in automaton.search(text)]
+
+@needs_morph
+@pytest.mark.parametrize('text, phrase, matched', [
+    ("Тушим очаг, борьба с пожаром", 'пожар', 'пожаром'),
+    ("Аварийного отключения не было", 'аварийная', 'Аварийного'),
+    ("Утечку на складе устранили", 'утечка', 'Утечку'),
+    ("Возле насосов никого", 'насос', 'насосов'),
+    ("Связи с цехами нет", 'цех', 'цехами'),
+])
+def test_automaton_matches_inflected_forms(text, phrase, matched):
+    assert (phrase, matched) in found(text)
+
+@pytest.mark.parametrize('text', [
+    "Взрывчатка на складе",       # взрыв внутри другого слова
+    "Зашли в техцех",             # цех в конце другого слова
+    "Пожарный_выход",             # подчеркивание - часть слова, как в \b
+])
+def test_automaton_respects_word_boundaries(text):
+    phrases = [phrase for phrase, _ in found(text)]
+    assert 'взрыв' not in phrases
+    assert 'цех' not in phrases
+    assert 'пожар' not in phrases
+
+def test_automaton_positions_and_multiword_phrases():
+    text = "Насос НЕ РАБОТАЕТ, нет связи с цехом"
+    matches = get_keyword_automaton().search(text)
+    for start, end, group, category, phrase, matched in matches:
+        assert text[start:end] == matched
+    categories = {(match[3], match[4]) for match in matches}
+    assert ('safety_denials', 'не работает') in categories
+    assert ('safety_denials', 'нет связи') in categories
+    assert ('оборудование', 'насос') in categories
+
+def test_automaton_without_inflection_matches_exact_phrases():
+    automaton = KeywordAutomaton(inflect=False)
+    automaton.add('насос', 'test', 'term')
+    automaton.add('ёмкость', 'test', 'term')
+    assert found("Насос и емкость", automaton) == [('насос', 'Насос'), ('емкость', 'емкость')]
+    assert found("Насосы", automaton) == []
+
+# Корпус с маркерами разной силы: от служебных фраз до многократных аварийных терминов
+MARKER_CORPUS = [
+    "Проверка связи",
+    "Стоп!",
+    "Отойди!",
+    "Мастер, подойдите к складу после обеда",
+    "Давление в реакторе растет",
+    "Насос на участке не работает",
+    "Температура 85 °C, давление 12 атм",
+    "Срочно, утечка у компрессора",
+    "Пожар в цехе, срочно эвакуация, немедленно",
+    "Взрыв и обрушение в зоне склада, опасно, нет связи, срочно",
+]
+
+SPEECH_ACT_NAMES = ['DIRECTIVE', 'REPRESENTATIVE', 'COMMISSIVE', 'EXPRESSIVE', 'DECLARATIVE']
+
+@pytest.fixture
+def calculator():
+    """Анализатор без моделей: классификатор и Natasha подменяются в тестах"""
+    from nlp.priority_calculator import PriorityCalculator
+    calculator = PriorityCalculator(autoload=False)
+    yield calculator
+    calculator.close()
+
+def fake_models(calculator, act, extra_entities):
+    """Речевой акт act и extra_entities сущностей Natasha сверх промышленных"""
+    def classify(text, *args, **kwargs):
+        return {'act': act, 'confidence': 0.9, 'raw_label': f'LABEL_{SPEECH_ACT_NAMES.index(act)}'}
+
+    def extract(text, keyword_matches=None):
+        entities = calculator.entity_extractor._extract_industrial_entities(text, keyword_matches)
+        person = {'text': 'Иванов', 'type': 'PER', 'start': 0, 'stop': 6, 'normalized': 'Иванов'}
+        return entities + [dict(person) for _ in range(extra_entities)], True
+
+    calculator.speech_act_classifier.classify_speech_act = classify
+    calculator.speech_act_classifier.classify_batched = classify
+    calculator.entity_extractor.extract_entities_checked = extract
+
+def reference_level(calculator, text):
+    """Уровень без каскада (все модели)"""
+    calculator.cascade_enabled = False
+    try:
+        return calculator.analyze(text).critical_level
+    finally:
+        calculator.cascade_enabled = True
+
+@pytest.mark.parametrize('act', SPEECH_ACT_NAMES)
+@pytest.mark.parametrize('extra_entities', [0, 1, 4])
+def test_cascade_matches_full_analysis(calculator, act, extra_entities):
+    from utils.constants import CRITICAL_LEVELS
+    calculator.cache_size = 0
+    fake_models(calculator, act, extra_entities)
+
+    for text in MARKER_CORPUS:
+        expected = reference_level(calculator, text)
+        if calculator.cache_key(text) in calculator.trivial_phrases:
+            continue  # служебные фразы намеренно оцениваются без классификатора
+
+        calculator.cascade_exit = 'level'
+        assert calculator.analyze(text).critical_level == expected, text
+
+        # Выход по градации: та же градация, уровень не ниже точного
+        calculator.cascade_exit = 'band'
+        level = calculator.analyze(text).critical_level
+        assert CRITICAL_LEVELS[level] == CRITICAL_LEVELS[expected], text
+        assert level >= expected, text
+
+def test_short_commands_are_classified(calculator):
+    fake_models(calculator, 'DIRECTIVE', 0)
+    for text in ("Стоп!", "Отойди!"):
+        result = calculator.analyze(text)
+        assert result.tier != 'trivial'
+        assert result.critical_level == 8
+
+def test_trivial_phrase_skips_models(calculator):
+    def fail(*args, **kwargs):
+        raise AssertionError("модель не должна вызываться")
+    calculator.speech_act_classifier.classify_speech_act = fail
+    calculator.entity_extractor.extract_entities_checked = fail
+
+    result = calculator.analyze("Проверка связи!")
+    assert result.tier == 'trivial'
+    assert result.critical_level == 3
+
+def test_capped_markers_decided_without_models(calculator):
+    def fail(*args, **kwargs):
+        raise AssertionError("модель не должна вызываться")
+    calculator.speech_act_classifier.classify_speech_act = fail
+    calculator.speech_act_classifier.classify_batched = fail
+    calculator.entity_extractor.extract_entities_checked = fail
+
+    result = calculator.analyze("Пожар в цехе, взрыв, срочно эвакуация")
+    assert result.tier == 'markers'
+    assert result.critical_level == 15
+
+def test_models_overlap_with_default_config(calculator):
+    import time
+    fake_models(calculator, 'REPRESENTATIVE', 1)
+    classify = calculator.speech_act_classifier.classify_speech_act
+    extract = calculator.entity_extractor.extract_entities_checked
+
+    def slow(func):
+        def call(*args, **kwargs):
+            time.sleep(0.05)
+            return func(*args, **kwargs)
+        return call
+
+    calculator.speech_act_classifier.classify_speech_act = slow(classify)
+    calculator.entity_extractor.extract_entities_checked = slow(extract)
+
+    result = calculator.analyze("Иванов пришел")
+    assert result.tier == 'entities'
+    stats = calculator.get_overlap_stats()
+    assert stats['messages'] == 1
+    assert stats['component_time'] >= 0.1
+    assert stats['wall_time'] < 0.9 * stats['component_time']
+
+def test_single_worker_skips_unneeded_natasha(calculator):
+    fake_models(calculator, 'COMMISSIVE', 0)
+    calls = []
+    extract = calculator.entity_extractor.extract_entities_checked
+    calculator.entity_extractor.extract_entities_checked = lambda *args: calls.append(args) or extract(*args)
+    calculator.workers = 1
+    calculator.cache_size = 0
+
+    # Комиссив решает градацию: Natasha не запускается
+    result = calculator.analyze("Иванов пришел")
+    assert result.tier == 'speech_act'
+    assert calls == []
+
+    fake_models(calculator, 'REPRESENTATIVE', 1)
+    calculator.entity_extractor.extract_entities_checked = lambda *args: calls.append(args) or extract(*args)
+    result = calculator.analyze("Иванов пришел")
+    assert result.tier == 'entities'
+    assert len(calls) == 1
+
+@pytest.mark.parametrize('act', SPEECH_ACT_NAMES)
+def test_detailed_analysis_keeps_cascade_level(calculator, act):
+    fake_models(calculator, act, 1)
+    for text in MARKER_CORPUS:
+        exact = reference_level(calculator, text)
+        level = calculator.analyze(text).critical_level
+        counts = calculator.get_cascade_stats()
+
+        details = calculator.get_detailed_analysis(text)
+        assert details['critical_level'] == level, text
+        assert details['speech_act']['act'] == act
+        assert details['entities'] is not None
+        assert details['exact_level'] == exact
+        assert calculator.get_cascade_stats() == counts
+
+def test_cache_hit_for_normalized_spelling(calculator):
+    fake_models(calculator, 'REPRESENTATIVE', 0)
+
+    def extract(text, keyword_matches=None):
+        start = text.lower().index('иванов')
+        person = {'text': text[start:start + 6], 'type': 'PER', 'start': start, 'stop': start + 6,
+                  'normalized': 'Иванов'}
+        return calculator.entity_extractor._extract_industrial_entities(text, keyword_matches) + [person], True
+    calculator.entity_extractor.extract_entities_checked = extract
+    calculator.cascade_enabled = False  # сущности нужны в кэше
+
+    first = calculator.analyze("Иванов, насос в цехе не работает")
+    assert first.entities
+    assert calculator.cache_key("  ИВАНОВ насос в цехе не работает!!") == calculator.cache_key(first.text)
+
+    text = "  ИВАНОВ насос в цехе не работает!!"
+    result = calculator.analyze(text)
+    assert calculator.last_tier == 'cache'
+    assert result.critical_level == first.critical_level
+    assert calculator.get_cache_stats()['hits'] == 1
+    # Позиции и написание - для нового текста
+    for entity in result.entities:
+        assert text[entity['start']:entity['stop']] == entity['text']
+    assert sorted(entity['text'] for entity in result.entities) == ['ИВАНОВ', 'насос', 'цехе']
+    assert result.markers['safety_denials'] == ['не работает']
+
+    # Правка копии не меняет кэш
+    result.entities.clear()
+    assert calculator.analyze(first.text).entities
+
+def test_cache_invalidated_by_settings_and_models(calculator):
+    fake_models(calculator, 'DIRECTIVE', 0)
+    text = "Стоп насос"
+    calculator.analyze(text)
+    calculator.analyze(text)
+    assert calculator.last_tier == 'cache'
+
+    calculator.markers_detector.setup_patterns()
+    calculator.analyze(text)
+    assert calculator.last_tier != 'cache'
+
+    calculator.speech_act_classifier.backend = 'onnx'
+    calculator.analyze(text)
+    assert calculator.last_tier != 'cache'
+
+def test_fallback_results_are_not_cached(calculator):
+    # Модели не загружены: запасной UNKNOWN и только промышленные сущности
+    text = "Иванов пришел"
+    calculator.analyze(text)
+    calculator.analyze(text)
+    assert calculator.last_tier != 'cache'
+    assert calculator.get_cache_stats()['size'] == 0
+
+    fake_models(calculator, 'REPRESENTATIVE', 1)
+    calculator.entity_extractor.extract_entities_checked = lambda text, matches=None: ([], False)
+    assert calculator.analyze(text).tier == 'entities'
+    assert calculator.get_cache_stats()['size'] == 0
+
+def fake_backend(classifier, calls):
+    """Бэкенд без модели: класс фразы - длина текста по модулю числа классов"""
+    import numpy as np
+
+    def probabilities(texts):
+        calls.append(list(texts))
+        probabilities = np.full((len(texts), len(SPEECH_ACT_NAMES)), 0.1)
+        for row, text in enumerate(texts):
+            probabilities[row, len(text) % len(SPEECH_ACT_NAMES)] = 0.6
+        return probabilities
+
+    classifier.backend = 'onnx'
+    classifier.id2label = {i: f'LABEL_{i}' for i in range(len(SPEECH_ACT_NAMES))}
+    classifier._probabilities = probabilities
+
+def test_batch_classify_preserves_input_order(calculator):
+    classifier = calculator.speech_act_classifier
+    calls = []
+    fake_backend(classifier, calls)
+
+    texts = ["Срочно всем покинуть цех номер три", "", "Стоп", "Насос не работает", "Отойди", "Эвакуация"]
+    results = classifier.batch_classify(texts, batch_size=2)
+
+    assert len(calls) == 3
+    assert all(len(batch) <= 2 for batch in calls)
+    assert results[1] == {'act': 'UNKNOWN', 'confidence': 0.0}
+    for text, result in zip(texts, results):
+        if text:
+            assert result['act'] == SPEECH_ACT_NAMES[len(text) % len(SPEECH_ACT_NAMES)]
+            assert result == classifier.batch_classify([text])[0]
+
+def test_analyze_batch_classifies_in_one_pass(calculator):
+    calls = []
+    fake_backend(calculator.speech_act_classifier, calls)
+    calculator.entity_extractor.extract_entities_checked = lambda text, matches=None: (
+        calculator.entity_extractor._extract_industrial_entities(text, matches), True)
+    calculator.cache_size = 0
+
+    results = calculator.analyze_batch(MARKER_CORPUS)
+    # Одним пакетом - только фразы, которым нужен классификатор
+    assert len(calls) == 1
+    assert len(calls[0]) == sum(calculator._needs_classifier(text) for text in MARKER_CORPUS)
+    assert [result.critical_level for result in results] == \
+        [calculator.analyze(text).critical_level for text in MARKER_CORPUS]
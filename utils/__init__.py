@@ -5,6 +5,8 @@
 from .logger import setup_logger
 from .helpers import ensure_dir, load_config, save_config, timeit
 from .constants import CRITICAL_LEVELS, COLORS, SPEECH_ACTS
+from .startup import StartupOrchestrator
+from .cpu_budget import CpuBudget, get_cpu_budget
 
 __all__ = [
     'setup_logger',
@@ -14,5 +16,8 @@ __all__ = [
     'timeit',
     'CRITICAL_LEVELS',
     'COLORS',
-    'SPEECH_ACTS'
+    'SPEECH_ACTS',
+    'StartupOrchestrator',
+    'CpuBudget',
+    'get_cpu_budget'
 ]
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Закрепление стадий конвейера за ядрами и учет процессорного времени
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from config.cpu_config import CPU_CONFIG
+from .logger import setup_logger
+
+class CpuBudget:
+    """Бюджет ядер: стадия -> набор ядер и число потоков torch
+
+    Потоки закрепляются через sched_setaffinity по native id, поэтому
+    стадии, выполняемые в одном потоке, переключают ядра при входе в
+    stage(). Потоки, создаваемые внутри стадии (пул torch), наследуют ее
+    ядра. Число потоков torch задается на процесс, так что раздельные
+    значения для ASR и NLP действуют, когда ASR выполняется в своем процессе.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or CPU_CONFIG
+        self.logger = setup_logger('cpu_budget')
+        self.stages = self.config['stages']
+        self.enabled = self.config.get('enabled', True) and hasattr(os, 'sched_setaffinity')
+        self.available = set(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else set()
+
+        self._lock = threading.Lock()
+        self.stats = {name: {'cpu': 0.0, 'wall': 0.0, 'calls': 0} for name in self.stages}
+        self.last_report = time.monotonic()
+
+    def cores(self, stage):
+        """Ядра стадии, существующие на этой машине"""
+        cores = set(self.stages.get(stage, {}).get('cores') or []) & self.available
+        return cores or self.available
+
+    def _set_affinity(self, cores, thread_id=0):
+        if not self.enabled or not cores:
+            return
+        try:
+            os.sched_setaffinity(thread_id, cores)
+        except OSError as e:
+            self.logger.warning(f"Не удалось закрепить поток за ядрами {sorted(cores)}: {e}")
+
+    def pin_thread(self, stage):
+        """Закрепление текущего потока за ядрами стадии"""
+        self._set_affinity(self.cores(stage), threading.get_native_id())
+
+    def set_torch_threads(self, stage):
+        """Число потоков torch в этом процессе по настройке стадии"""
+        threads = self.stages.get(stage, {}).get('torch_threads')
+        if not threads:
+            return
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    def apply_process(self, stage):
+        """Настройка процесса, целиком отданного стадии (например, ASR)"""
+        self.pin_thread(stage)
+        self.set_torch_threads(stage)
+
+    @contextmanager
+    def stage(self, name):
+        """Выполнение участка на ядрах стадии с учетом времени
+
+        Учитывается процессорное время вызывающего потока: при одном
+        потоке torch на стадию это все время стадии.
+        """
+        thread_id = threading.get_native_id()
+        previous = None
+        if self.enabled:
+            previous = os.sched_getaffinity(thread_id)
+            self._set_affinity(self.cores(name), thread_id)
+
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.thread_time() - cpu_start, time.perf_counter() - wall_start)
+            if previous is not None:
+                self._set_affinity(previous, thread_id)
+
+    def record(self, stage, cpu, wall, calls=1):
+        """Учет времени, измеренного вне stage() (например, в другом процессе)
+
+        calls=0 добавляет время вспомогательных потоков к уже учтенному вызову.
+        """
+        with self._lock:
+            entry = self.stats.setdefault(stage, {'cpu': 0.0, 'wall': 0.0, 'calls': 0})
+            entry['cpu'] += cpu
+            entry['wall'] += wall
+            entry['calls'] += calls
+
+    def get_report(self):
+        """Процессорное время, время выполнения и число вызовов по стадиям"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self.stats.items()}
+
+    def log_report(self):
+        """Вывод статистики по стадиям в лог"""
+        for name, entry in self.get_report().items():
+            if entry['calls'] == 0:
+                continue
+            self.logger.info(
+                f"  {name:<8} ядра {sorted(self.cores(name))}: CPU {entry['cpu']:.2f} сек, "
+                f"время {entry['wall']:.2f} сек, вызовов {entry['calls']}, "
+                f"в среднем {entry['wall'] / entry['calls'] * 1000:.1f} мс"
+            )
+
+    def maybe_log_report(self):
+        """Периодический вывод статистики"""
+        now = time.monotonic()
+        if now - self.last_report >= self.config.get('report_interval', 60):
+            self.last_report = now
+            self.logger.info("Нагрузка по стадиям:")
+            self.log_report()
+
+_cpu_budget = None
+
+def get_cpu_budget():
+    """Общий для процесса бюджет ядер"""
+    global _cpu_budget
+    if _cpu_budget is None:
+        _cpu_budget = CpuBudget()
+    return _cpu_budget
@@ -16,7 +16,8 @@ def load_config(config_path):
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
             return json.load(f)
-    except FileNotFoundError:
+    except (FileNotFoundError, json.JSONDecodeError):
+        # Отсутствующий или пустой файл - пустой конфиг
         return {}
 
 def save_config(config, config_path):
@@ -0,0 +1,103 @@
+"""
+Параллельная загрузка и прогрев моделей при запуске
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .logger import setup_logger
+
+class StartupOrchestrator:
+    """Загрузка моделей в рабочих потоках с прогревом и замером времени
+
+    Каждая задача - функции загрузки, пробного инференса и проверки
+    готовности (функции загрузки моделей перехватывают свои ошибки, поэтому
+    успешный возврат еще не значит, что модель загружена). Задачи
+    выполняются одновременно, поэтому общее время старта близко к времени
+    самой медленной модели. Основной цикл может работать сразу: компоненты
+    сами проверяют готовность своих моделей.
+    """
+
+    def __init__(self):
+        self.logger = setup_logger('startup')
+        self.tasks = {}
+        self.report = {}
+        self.futures = {}
+        self.executor = None
+        self.started_at = None
+
+    def register(self, name, load_fn, warmup_fn=None, ready_fn=None):
+        """Регистрация модели: функции загрузки, прогрева и проверки загрузки"""
+        self.tasks[name] = (load_fn, warmup_fn, ready_fn)
+        self.report[name] = {'load': None, 'warmup': None, 'ready': False, 'error': None, 'finished_at': None}
+
+    def _run_task(self, name):
+        """Загрузка и прогрев одной модели в рабочем потоке"""
+        load_fn, warmup_fn, ready_fn = self.tasks[name]
+        entry = self.report[name]
+
+        try:
+            start = time.perf_counter()
+            load_fn()
+            entry['load'] = time.perf_counter() - start
+            if ready_fn is not None and not ready_fn():
+                raise RuntimeError("модель не загружена")
+
+            if warmup_fn is not None:
+                start = time.perf_counter()
+                warmup_fn()
+                entry['warmup'] = time.perf_counter() - start
+
+            entry['ready'] = True
+            self.logger.info(f"Модель '{name}' готова: загрузка {entry['load']:.2f} сек, "
+                             f"прогрев {(entry['warmup'] or 0):.2f} сек")
+        except Exception as e:
+            entry['error'] = str(e)
+            self.logger.error(f"Ошибка загрузки модели '{name}': {e}")
+        finally:
+            entry['finished_at'] = time.perf_counter() - self.started_at
+
+    def start(self):
+        """Запуск загрузки всех моделей без ожидания"""
+        if self.executor is not None:
+            return
+        self.started_at = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.tasks)), thread_name_prefix='model-load')
+        for name in self.tasks:
+            self.futures[name] = self.executor.submit(self._run_task, name)
+        self.executor.shutdown(wait=False)
+
+    def is_ready(self, name):
+        """Модель загружена и прогрета"""
+        return self.report.get(name, {}).get('ready', False)
+
+    def all_done(self):
+        """Все задачи завершены (успешно или с ошибкой)"""
+        return bool(self.futures) and all(future.done() for future in self.futures.values())
+
+    def wait(self, timeout=None):
+        """Ожидание завершения всех задач"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for future in self.futures.values():
+            remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                return False
+        return True
+
+    def get_report(self):
+        """Время загрузки и прогрева по моделям"""
+        return {name: dict(entry) for name, entry in self.report.items()}
+
+    def log_report(self):
+        """Вывод итогов загрузки в лог"""
+        for name, entry in self.report.items():
+            if entry['error']:
+                self.logger.info(f"  {name}: ошибка ({entry['error']})")
+            else:
+                self.logger.info(f"  {name}: загрузка {(entry['load'] or 0):.2f} сек, "
+                                 f"прогрев {(entry['warmup'] or 0):.2f} сек")
+        finished = [entry['finished_at'] for entry in self.report.values() if entry['finished_at'] is not None]
+        if finished:
+            self.logger.info(f"Модели готовы через {max(finished):.2f} сек после запуска "
+                             f"(последовательно: {sum((e['load'] or 0) + (e['warmup'] or 0) for e in self.report.values()):.2f} сек)")